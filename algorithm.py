@@ -1,86 +1,268 @@
 # Modified algorithm.py
+import logging
+import math
+import time
 import numpy as np
 import heapq
 import pygame
 from bresenham import bresenham
+from grid_path import ElevationProfile, GridPath
+from plan_stats import PlanStats
+from terrain import Terrain, elevation_at, elevation_of, obstacle_mask
+
+logger = logging.getLogger(__name__)
+
+# Searches poll Algorithm.cancel_event once per this many expansions
+CANCEL_CHECK_INTERVAL = 1024
+
+
+class PlanningCancelled(Exception):
+    """Raised inside a search when Algorithm.cancel_event is set"""
+
+# Planner memory per window cell when searching a tiled provider: float32 edge
+# costs (16), float64 temporaries while they are built, search state (17 per
+# direction), masks and the assembled window itself; measured peaks are ~85
+PLANNER_BYTES_PER_CELL = 96
+
+# Cardinal movement directions shared by the planner and terrain precomputation
+DIRECTIONS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+SQRT2 = math.sqrt(2)
+
+def _shift_slices(offset, size):
+    """Slices pairing each cell (source) with its neighbor at +offset (destination)"""
+    return slice(max(0, -offset), size - max(0, offset)), slice(max(0, offset), size + min(0, offset))
 
 class Algorithm:
     def __init__(self):
         self.elevation_profile = []
         self.max_slope = 45  # Maximum slope in degrees
         self.cliff_threshold = 1.0  # Minimum elevation drop to be considered a cliff
+        self.uphill_weight = 0.8  # Extra cost per unit of elevation gained
+        self.downhill_weight = 0.3  # Extra cost per unit of elevation lost
+        self.search_engine = "array"  # "array" (flat NumPy state) or "dict" (tuple keys)
+        self.bidirectional = False  # Search from both start and goal for long-range queries
+        self.heuristic_mode = "cost_scaled"  # See heuristic() for the available modes
+        self.visibility_margin = 32  # Padding around start/goal for the "visibility" heuristic
+        self.tile_margin = 64  # Cells loaded around start/goal when planning on a tiled provider
         # Store all impassable cells (too steep) for visualization
         self.impassable_cells = set()
+        # Terrain caches, rebuilt only when the grid or the slope limit changes
+        self.terrain_version = 0
+        self._terrain_grid = None
+        self._mask_key = None
+        self._impassable_mask = None
+        self._blocked_mask = None
+        self._edge_cost_key = None
+        self._edge_costs = None
+        self._search_buffers = {}
+        self.nodes_expanded = 0  # Expansions made by the last search
+        self.last_search_report = {}
+        # Instrumentation: PlanStats of the last find_path call and an optional
+        # profiling callback, called as profile_hook(phase, seconds, stats)
+        self.last_stats = None
+        self.profile_hook = None
+        self._stats = None
+        self.terrain_cache_hits = 0
+        self.terrain_cache_misses = 0
+        # threading.Event set by another thread to abandon the search in progress
+        self.cancel_event = None
+        self._visibility = None
+        self._elevation_grid = None  # Grid whose elevation array is cached in _elevation
+        self._elevation = None
+        self._bordered_key = None  # Provider window last planned on; see _bordered_window
+        self._bordered = None
+
+    def invalidate_terrain(self):
+        """Drop cached terrain data after the grid has been modified in place"""
+        self.terrain_version += 1
+
+    def _sync_terrain(self, grid):
+        """Bump the terrain version when a different grid object is passed in"""
+        if grid is not self._terrain_grid:
+            self._terrain_grid = grid
+            self.terrain_version += 1
+        return self.terrain_version
+
+    def _compute_impassable(self, elevation, obstacles):
+        """Vectorized slope check over an elevation array; see get_impassable_mask"""
+        # Terrain holds float32 elevation; differences are taken in float64 as for dense grids
+        elevation = np.asarray(elevation, dtype=np.float64)
+        # Slope of every edge along x and along y (unit distance between cells)
+        steep_x = np.degrees(np.arctan2(np.abs(elevation[1:, :] - elevation[:-1, :]), 1.0)) > self.max_slope
+        steep_y = np.degrees(np.arctan2(np.abs(elevation[:, 1:] - elevation[:, :-1]), 1.0)) > self.max_slope
+
+        # A cell is impassable if the slope to any neighbor is too steep
+        mask = np.zeros(obstacles.shape, dtype=bool)
+        mask[:-1, :] |= steep_x
+        mask[1:, :] |= steep_x
+        mask[:, :-1] |= steep_y
+        mask[:, 1:] |= steep_y
+        # Obstacles are tracked separately, same as the old per-cell loop
+        mask &= ~obstacles
+        return mask
+
+    def get_impassable_mask(self, grid):
+        """
+        Boolean (W, H) mask of cells that are too steep to enter.
+        Computed with vectorized slope checks and cached per terrain version.
+        """
+        key = (self._sync_terrain(grid), self.max_slope)
+        if self._mask_key == key:
+            self.terrain_cache_hits += 1
+            return self._impassable_mask
+
+        self.terrain_cache_misses += 1
+        obstacles = obstacle_mask(grid)
+        mask = self._compute_impassable(self.get_elevation(grid), obstacles)
+
+        self._impassable_mask = mask
+        self._blocked_mask = mask | obstacles
+        self._mask_key = key
+        return mask
+
+    def get_elevation(self, grid):
+        """
+        (W, H) elevation array of a dense grid or Terrain, looked up once per grid
+        object. It is a view, so in-place edits of the grid show through.
+        """
+        if grid is not self._elevation_grid:
+            self._elevation = elevation_of(grid)
+            self._elevation_grid = grid
+        return self._elevation
+
+    def get_blocked_mask(self, grid):
+        """Boolean (W, H) mask of cells that are obstacles or impassable"""
+        self.get_impassable_mask(grid)
+        return self._blocked_mask
+
+    def _compute_edge_costs(self, elevation, blocked):
+        """
+        Cost of moving from each cell in each of the DIRECTIONS, shape (4, W, H).
+        Edges leaving the grid, entering blocked cells, steeper than max_slope or
+        dropping off a cliff are infinite. Stored as float32 (16 bytes per cell
+        instead of 32), with every cost rounded up so no route looks cheaper than
+        it is and the heuristics stay admissible.
+        """
+        width, height = blocked.shape
+        costs = np.full((len(DIRECTIONS), width, height), np.inf, dtype=np.float32)
+        elevation = np.asarray(elevation, dtype=np.float64)
         
-    def calculate_impassable_terrain(self, grid):
-        """Pre-calculate all cells that are impassable due to steep slopes"""
-        self.impassable_cells.clear()
+        for d, (dx, dy) in enumerate(DIRECTIONS):
+            src_x, dst_x = _shift_slices(dx, width)
+            src_y, dst_y = _shift_slices(dy, height)
+            
+            elevation_diff = elevation[dst_x, dst_y] - elevation[src_x, src_y]
+            slope = np.degrees(np.arctan2(np.abs(elevation_diff), 1.0))
+            
+            passable = ~blocked[dst_x, dst_y] & (slope <= self.max_slope)
+            # Downward cliffs must also respect the slope limit
+            cliff = (elevation_diff < 0) & (np.abs(elevation_diff) > self.cliff_threshold)
+            passable &= ~(cliff & (slope > self.max_slope))
+            
+            # Higher penalty for going uphill vs downhill
+            movement_cost = np.where(elevation_diff > 0,
+                                     1 + np.abs(elevation_diff) * self.uphill_weight,
+                                     1 + np.abs(elevation_diff) * self.downhill_weight)
+            narrowed = movement_cost.astype(np.float32)
+            narrowed = np.where(narrowed < movement_cost, np.nextafter(narrowed, np.float32(np.inf)), narrowed)
+            costs[d, src_x, src_y] = np.where(passable, narrowed, np.inf)
         
-        # Loop through all grid cells
-        for x in range(grid.shape[0]):
-            for y in range(grid.shape[1]):
-                # Skip cells that are already obstacles
-                if grid[x, y, 0] == 1:
-                    continue
-                    
-                # Check all neighbors
-                directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
-                for dx, dy in directions:
-                    nx, ny = x + dx, y + dy
-                    # Check if neighbor is in bounds
-                    if (0 <= nx < grid.shape[0] and 0 <= ny < grid.shape[1]):
-                        # Calculate slope
-                        elev1 = grid[x, y, 1]
-                        elev2 = grid[nx, ny, 1]
-                        elevation_diff = abs(elev2 - elev1)
-                        distance = 1.0
-                        slope = np.degrees(np.arctan2(elevation_diff, distance))
-                        
-                        # If slope is too steep in any direction, mark cell as impassable
-                        if slope > self.max_slope:
-                            self.impassable_cells.add((x, y))
-                            break
+        return costs
+
+    def _edge_cost_params(self):
+        return (self.max_slope, self.cliff_threshold, self.uphill_weight, self.downhill_weight)
+
+    def get_edge_costs(self, grid):
+        """
+        Per-direction movement cost arrays, shape (4, W, H), indexed as
+        costs[direction, x, y]. Built once per terrain version and cost model,
+        then shared by every query on the same terrain.
+        """
+        blocked = self.get_blocked_mask(grid)
+        key = (self.terrain_version,) + self._edge_cost_params()
+        if self._edge_cost_key != key:
+            self.terrain_cache_misses += 1
+            self._edge_costs = self._compute_edge_costs(self.get_elevation(grid), blocked)
+            self._edge_cost_key = key
+        else:
+            self.terrain_cache_hits += 1
+        return self._edge_costs
+
+    def update_terrain_cells(self, grid, cells):
+        """
+        Patch the cached masks and edge costs after cells of grid were edited in place.
+        Only a small window around the changed cells is recomputed. Returns the box
+        (x0, y0, x1, y1) of cells whose outgoing edge costs may have changed, or None
+        when there was nothing cached to patch and the whole terrain was invalidated.
+        """
+        cells = list(cells)
+        mask_valid = grid is self._terrain_grid and self._mask_key == (self.terrain_version, self.max_slope)
+        costs_valid = mask_valid and self._edge_cost_key == (self.terrain_version,) + self._edge_cost_params()
+        if not cells or not mask_valid:
+            self.invalidate_terrain()
+            return None
+        
+        width, height = grid.shape[0], grid.shape[1]
+        xs = [x for x, _ in cells]
+        ys = [y for _, y in cells]
+        
+        def box(pad):
+            return (max(0, min(xs) - pad), max(0, min(ys) - pad),
+                    min(width, max(xs) + pad + 1), min(height, max(ys) + pad + 1))
+        
+        # A cell's impassability depends on its direct neighbors
+        wx0, wy0, wx1, wy1 = box(2)
+        mx0, my0, mx1, my1 = box(1)
+        elevation = self.get_elevation(grid)
+        obstacles = obstacle_mask(grid, wx0, wy0, wx1, wy1)
+        mask = self._compute_impassable(elevation[wx0:wx1, wy0:wy1], obstacles)
+        inner = (slice(mx0 - wx0, mx1 - wx0), slice(my0 - wy0, my1 - wy0))
+        self._impassable_mask[mx0:mx1, my0:my1] = mask[inner]
+        self._blocked_mask[mx0:mx1, my0:my1] = mask[inner] | obstacles[inner]
         
+        # An edge cost depends on both endpoints and on whether the target is blocked
+        cx0, cy0, cx1, cy1 = box(2)
+        if costs_valid:
+            wx0, wy0, wx1, wy1 = box(3)
+            costs = self._compute_edge_costs(elevation[wx0:wx1, wy0:wy1], self._blocked_mask[wx0:wx1, wy0:wy1])
+            self._edge_costs[:, cx0:cx1, cy0:cy1] = costs[:, cx0 - wx0:cx1 - wx0, cy0 - wy0:cy1 - wy0]
+        
+        # New version for anything keyed on the terrain, but the patched caches stay valid
+        self.terrain_version += 1
+        self._mask_key = (self.terrain_version, self.max_slope)
+        if costs_valid:
+            self._edge_cost_key = (self.terrain_version,) + self._edge_cost_params()
+        return (cx0, cy0, cx1, cy1)
+
+    def terrain_key(self, grid):
+        """
+        Hashable key identifying the terrain state and cost model a plan depends on.
+        Changes whenever the grid is replaced, edited through invalidate_terrain or
+        update_terrain_cells, or when a slope/cost parameter changes.
+        """
+        if getattr(grid, "is_tiled", False):
+            terrain = ("tiled", id(grid), grid.version)
+        else:
+            terrain = (self._sync_terrain(grid),)
+        return terrain + self._edge_cost_params()
+
+    def in_bounds(self, pos, grid):
+        return 0 <= pos[0] < grid.shape[0] and 0 <= pos[1] < grid.shape[1]
+
+    def calculate_impassable_terrain(self, grid):
+        """Pre-calculate all cells that are impassable due to steep slopes"""
+        mask = self.get_impassable_mask(grid)
+        self.impassable_cells = set(map(tuple, np.argwhere(mask).tolist()))
         return self.impassable_cells
 
     def get_neighbors(self, pos, grid):
+        """Traversable cardinal neighbors of pos, from the precomputed edge costs"""
+        edge_costs = self.get_edge_costs(grid)
         neighbors = []
-        # Only cardinal directions (remove diagonals for simpler movement)
-        directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
         
-        for dx, dy in directions:
-            new_x, new_y = pos[0] + dx, pos[1] + dy
-            
-            # Check bounds
-            if (0 <= new_x < grid.shape[0] and 
-                0 <= new_y < grid.shape[1]):
-                
-                # Skip if it's an obstacle or in impassable cells list
-                if grid[new_x, new_y, 0] == 1 or (new_x, new_y) in self.impassable_cells:
-                    continue
-                
-                # Check slope between current and new cell
-                current_elevation = grid[pos[0], pos[1], 1]
-                new_elevation = grid[new_x, new_y, 1]
-                
-                # Calculate elevation difference
-                elevation_diff = new_elevation - current_elevation
-                
-                # Calculate slope in degrees
-                distance = 1.0  # Since we're only using cardinal directions
-                slope = np.degrees(np.arctan2(abs(elevation_diff), distance))
-                
-                # Check if slope is navigable (not too steep)
-                if slope <= self.max_slope:
-                    # Extra check for downward cliffs
-                    if elevation_diff < 0 and abs(elevation_diff) > self.cliff_threshold:
-                        # This is a significant drop - check if it's too steep to go down
-                        downward_slope = np.degrees(np.arctan2(abs(elevation_diff), distance))
-                        if downward_slope <= self.max_slope:
-                            neighbors.append((new_x, new_y))
-                    else:
-                        # Normal traversable terrain
-                        neighbors.append((new_x, new_y))
+        for d, (dx, dy) in enumerate(DIRECTIONS):
+            if edge_costs[d, pos[0], pos[1]] != np.inf:
+                neighbors.append((pos[0] + dx, pos[1] + dy))
         
         return neighbors
 
@@ -93,34 +275,107 @@ class Algorithm:
         if distance == 0:
             return 0
             
-        elevation_diff = grid[pos2[0], pos2[1], 1] - grid[pos1[0], pos1[1], 1]
+        elevation_diff = elevation_at(grid, pos2[0], pos2[1]) - elevation_at(grid, pos1[0], pos1[1])
         return np.degrees(np.arctan2(abs(elevation_diff), distance))
 
-    def heuristic(self, a, b, grid=None):
+    def heuristic(self, a, b, grid=None, mode=None):
         """
-        A* heuristic with hybrid distance calculation.
-        Uses Euclidean by default, switches to Manhattan when navigating around obstacles.
+        A* heuristic: a lower bound on the cost of moving from a to b.
         
         Parameters:
         a: Current position (x, y)
         b: Goal position (x, y)
         grid: The terrain and obstacle grid
+        mode: Overrides heuristic_mode for this call. One of
+            "manhattan"   - exact step count for 4-connected moves
+            "octile"      - diagonal-aware distance, always <= manhattan
+            "euclidean"   - straight-line distance
+            "cost_scaled" - manhattan plus the cheapest possible climb/descent
+                            cost to reach b's elevation (needs grid)
+            "visibility"  - euclidean where the precomputed goal visibility
+                            field says b is in sight, manhattan elsewhere
+            or a callable (a, b, grid) -> float.
+        All built-in modes except "visibility" are consistent, so each node
+        is expanded at most once.
         """
-        # Calculate direct Euclidean distance as baseline
-        euclidean_dist = np.sqrt((b[0] - a[0])**2 + (b[1] - a[1])**2)
+        mode = mode or self.heuristic_mode
+        if callable(mode):
+            return mode(a, b, grid)
         
-        if grid is None:
-            return euclidean_dist
+        dx = abs(b[0] - a[0])
+        dy = abs(b[1] - a[1])
         
-        # Check if there's a clear line of sight between current position and goal
-        if self.has_line_of_sight(a, b, grid):
-            # Use Euclidean distance when no obstacles in between
-            return euclidean_dist
-        else:
-            # Use Manhattan distance when navigating around obstacles
-            # Apply a small weight to favor paths that make progress toward goal
-            manhattan_dist = abs(b[0] - a[0]) + abs(b[1] - a[1])
-            return manhattan_dist * 1.1
+        if mode == "manhattan":
+            return dx + dy
+        if mode == "octile":
+            return max(dx, dy) + (SQRT2 - 1) * min(dx, dy)
+        if mode == "euclidean":
+            return math.sqrt(dx * dx + dy * dy)
+        if mode == "cost_scaled":
+            if grid is None:
+                return dx + dy
+            # Any path has to make up the elevation difference at least once
+            elevation = self.get_elevation(grid)
+            climb = float(elevation[b[0], b[1]]) - float(elevation[a[0], a[1]])
+            if climb > 0:
+                return dx + dy + climb * self.uphill_weight
+            return dx + dy - climb * self.downhill_weight
+        if mode == "visibility":
+            if self._visible_from_goal(a, b):
+                return math.sqrt(dx * dx + dy * dy)
+            return dx + dy
+        raise ValueError(f"Unknown heuristic mode: {mode}")
+
+    def prepare_visibility_field(self, start, goal, grid):
+        """
+        Precompute which cells can see the goal, once per query.
+        Covers the box around start and goal padded by visibility_margin; every
+        line to the goal is stepped in lockstep with vectorized blocked-cell and
+        slope checks instead of a Bresenham walk per heuristic call.
+        """
+        blocked = self.get_blocked_mask(grid)
+        elevation = self.get_elevation(grid)
+        margin = self.visibility_margin
+        x0 = max(0, min(start[0], goal[0]) - margin)
+        y0 = max(0, min(start[1], goal[1]) - margin)
+        x1 = min(grid.shape[0], max(start[0], goal[0]) + margin + 1)
+        y1 = min(grid.shape[1], max(start[1], goal[1]) + margin + 1)
+        
+        xs, ys = np.meshgrid(np.arange(x0, x1), np.arange(y0, y1), indexing="ij")
+        visible = ~blocked[x0:x1, y0:y1]
+        
+        # Only cells that are still visible keep being traced
+        cells = np.flatnonzero(visible)
+        ox, oy = xs.ravel()[cells], ys.ravel()[cells]  # Line origins
+        px, py = ox, oy  # Last traced cell on each line
+        steps = np.maximum(np.abs(goal[0] - ox), np.abs(goal[1] - oy))
+        step = 1
+        while len(cells):
+            active = steps >= step
+            cells, ox, oy, px, py, steps = (arr[active] for arr in (cells, ox, oy, px, py, steps))
+            if not len(cells):
+                break
+            t = step / steps
+            nx = np.rint(ox + (goal[0] - ox) * t).astype(np.int64)
+            ny = np.rint(oy + (goal[1] - oy) * t).astype(np.int64)
+            
+            distance = np.hypot(nx - px, ny - py)
+            slope = np.degrees(np.arctan2(np.abs(elevation[nx, ny].astype(np.float64) - elevation[px, py]), distance))
+            clear = ~blocked[nx, ny] & (slope <= self.max_slope)
+            
+            visible.ravel()[cells[~clear]] = False
+            cells, ox, oy, px, py, steps = (arr[clear] for arr in (cells, ox, oy, nx, ny, steps))
+            step += 1
+        
+        self._visibility = (tuple(goal), x0, y0, visible)
+        return visible
+
+    def _visible_from_goal(self, a, goal):
+        if self._visibility is None or self._visibility[0] != tuple(goal):
+            return False
+        _, x0, y0, visible = self._visibility
+        x, y = a[0] - x0, a[1] - y0
+        return 0 <= x < visible.shape[0] and 0 <= y < visible.shape[1] and bool(visible[x, y])
     
     def has_line_of_sight(self, start, end, grid):
         """
@@ -130,6 +385,8 @@ class Algorithm:
         Returns:
         True if there's a clear path, False if obstacles or impassable terrain in the way
         """
+        blocked = self.get_blocked_mask(grid)
+        
         # Get all cells on the line using Bresenham's algorithm
         line_cells = list(bresenham(start[0], start[1], end[0], end[1]))
         
@@ -143,7 +400,7 @@ class Algorithm:
                 return False
                 
             # Check if cell is an obstacle or impassable
-            if grid[x, y, 0] == 1 or (x, y) in self.impassable_cells:
+            if blocked[x, y]:
                 return False
                 
             # Check if slope between cells is acceptable
@@ -163,80 +420,693 @@ class Algorithm:
         """
         if self.has_line_of_sight(start, goal, grid):
             # Get path cells using Bresenham's algorithm
-            line_cells = list(bresenham(start[0], start[1], goal[0], goal[1]))
+            line_cells = GridPath.from_cells(list(bresenham(start[0], start[1], goal[0], goal[1])))
             
             # Store elevation profile for visualization
-            self.elevation_profile = [(pos, grid[pos[0], pos[1], 1]) for pos in line_cells]
+            self.elevation_profile = ElevationProfile.from_grid(line_cells, grid)
             
             return line_cells
         
         return None
 
-    def find_path(self, start, goal, grid):
-        """Find a path using A* algorithm, avoiding steep terrain"""
-        # First, calculate impassable terrain based on slopes
-        self.calculate_impassable_terrain(grid)
+    def _segment_cells(self, a, b):
+        """Cells visited walking the straight line from a to b, as x and y index arrays"""
+        n = max(abs(b[0] - a[0]), abs(b[1] - a[1]))
+        t = np.arange(n + 1) / max(n, 1)
+        xs = np.rint(a[0] + t * (b[0] - a[0])).astype(np.intp)
+        ys = np.rint(a[1] + t * (b[1] - a[1])).astype(np.intp)
+        return xs, ys
+
+    def segment_cost(self, a, b, grid):
+        """
+        Movement cost of driving straight from cell a to cell b, or inf if the line
+        crosses a blocked cell, squeezes between two blocked cells that only touch
+        at a corner, or has a step steeper than max_slope. All checks are vectorized
+        over the cells on the line.
+        """
+        return self._segment_cost(a, b, self.get_blocked_mask(grid), self.get_elevation(grid))
+
+    def _segment_cost(self, a, b, blocked, elevation):
+        if max(abs(b[0] - a[0]), abs(b[1] - a[1])) <= 4:
+            # NumPy call overhead dominates on short lines, which are most of the checks
+            return self._short_segment_cost(a, b, blocked, elevation)
+        xs, ys = self._segment_cells(a, b)
+        if blocked[xs[1:], ys[1:]].any():
+            return math.inf
         
-        # If start or goal is in impassable terrain, return None
-        if start in self.impassable_cells or goal in self.impassable_cells:
-            print(f"Start {start} or goal {goal} is in impassable terrain!")
-            return None
-            
-        # NEW: Try direct path first if possible
-        direct_path = self.find_direct_path(start, goal, grid)
-        if direct_path:
-            print("Direct path found!")
-            return direct_path
-            
-        print("Direct path not possible, using A* algorithm...")
+        dx, dy = np.diff(xs), np.diff(ys)
+        diagonal = (dx != 0) & (dy != 0)
+        if diagonal.any():
+            cx, cy = xs[:-1][diagonal], ys[:-1][diagonal]
+            if (blocked[cx + dx[diagonal], cy] | blocked[cx, cy + dy[diagonal]]).any():
+                return math.inf
         
-        # Standard A* implementation
+        elevation_diff = np.diff(elevation[xs, ys].astype(np.float64))
+        step = np.where(diagonal, SQRT2, 1.0)
+        if (np.degrees(np.arctan2(np.abs(elevation_diff), step)) > self.max_slope).any():
+            return math.inf
+        weights = np.where(elevation_diff > 0, self.uphill_weight, self.downhill_weight)
+        return math.hypot(b[0] - a[0], b[1] - a[1]) + float(np.sum(np.abs(elevation_diff) * weights))
+
+    def _short_segment_cost(self, a, b, blocked, elevation):
+        """Scalar version of _segment_cost with the same cells, rules and result"""
+        n = max(abs(b[0] - a[0]), abs(b[1] - a[1]))
+        prev_x, prev_y = a
+        prev_z = float(elevation[prev_x, prev_y])
+        climb = 0.0
+        for k in range(1, n + 1):
+            t = k / n
+            x, y = round(a[0] + t * (b[0] - a[0])), round(a[1] + t * (b[1] - a[1]))
+            if blocked[x, y]:
+                return math.inf
+            step = 1.0
+            if x != prev_x and y != prev_y:
+                if blocked[x, prev_y] or blocked[prev_x, y]:
+                    return math.inf
+                step = SQRT2
+            z = float(elevation[x, y])
+            if math.degrees(math.atan2(abs(z - prev_z), step)) > self.max_slope:
+                return math.inf
+            climb += abs(z - prev_z) * (self.uphill_weight if z > prev_z else self.downhill_weight)
+            prev_x, prev_y, prev_z = x, y, z
+        return math.hypot(b[0] - a[0], b[1] - a[1]) + climb
+
+    def smooth_path(self, path, grid, cost_tolerance=0.0):
+        """
+        Shrink a cell path to a few straight segments by string pulling.
+        From each anchor the furthest path cell reachable in a straight line is
+        found by doubling the jump and then bisecting, with segment_cost as the
+        feasibility test, so every segment respects the obstacle and max-slope rules.
+        A shortcut is only taken if it costs no more than (1 + cost_tolerance)
+        times the part of the path it replaces.
+        """
+        if path is None or len(path) < 3:
+            return path
+        if getattr(grid, "is_tiled", False):
+            # Smooth on the dense window around the path, in window coordinates
+            path = GridPath.from_cells(path)
+            x0, y0 = (int(v) for v in path.xy.min(axis=0))
+            x1, y1 = (int(v) + 1 for v in path.xy.max(axis=0))
+            window, ox, oy = self._bordered_window(grid, x0, y0, x1, y1)
+            local = self.smooth_path(path.shifted(-ox, -oy), window, cost_tolerance)
+            return local.shifted(ox, oy)
+        
+        blocked = self.get_blocked_mask(grid)
+        elevation = self.get_elevation(grid)
+        path = GridPath.from_cells(path)
+        points = path.xy
+        cells = points.tolist()
+        elevation_diff = np.diff(elevation[points[:, 0], points[:, 1]].astype(np.float64))
+        weights = np.where(elevation_diff > 0, self.uphill_weight, self.downhill_weight)
+        steps = np.hypot(*np.diff(points, axis=0).T) + np.abs(elevation_diff) * weights
+        prefix = np.concatenate(([0.0], np.cumsum(steps)))
+        
+        last = len(path) - 1
+        smoothed = [0]
+        i = 0
+        while i < last:
+            def shortcut_ok(j):
+                limit = (prefix[j] - prefix[i]) * (1 + cost_tolerance) + 1e-9
+                return self._segment_cost(cells[i], cells[j], blocked, elevation) <= limit
+            
+            # The next path cell is always reachable; gallop outwards, then bisect
+            good, bad, jump = i + 1, None, 2
+            while good < last:
+                j = min(i + jump, last)
+                if not shortcut_ok(j):
+                    bad = j
+                    break
+                good, jump = j, jump * 2
+            while bad is not None and bad - good > 1:
+                mid = (good + bad) // 2
+                if shortcut_ok(mid):
+                    good = mid
+                else:
+                    bad = mid
+            smoothed.append(good)
+            i = good
+        return GridPath(points[smoothed])
+
+    def find_path_tiled(self, start, goal, provider, margin=None, engine=None, heuristic=None, bidirectional=None,
+                        allowed=None):
+        """
+        Plan on a TiledTerrainProvider by loading only a window around start and goal.
+        The window grows until a path is found, it covers the whole raster, or the
+        tiles it needs plus the planner's working set for it (PLANNER_BYTES_PER_CELL
+        per window cell) would no longer fit the provider's memory budget.
+        engine, heuristic, bidirectional and allowed (a raster-sized corridor mask)
+        apply to the search in each window as in find_path.
+        """
+        start, goal = tuple(start), tuple(goal)
+        margin = self.tile_margin if margin is None else margin
+        if not (self.in_bounds(start, provider) and self.in_bounds(goal, provider)):
+            logger.warning("Start %s or goal %s is outside the terrain", start, goal)
+            return self._tiled_outcome(start, goal, "out_of_bounds")
+        margin = self._largest_fitting_margin(start, goal, provider, 0, margin)
+        if margin is None:
+            logger.warning("Start %s and goal %s are too far apart to plan within the tile memory budget",
+                           start, goal)
+            return self._tiled_outcome(start, goal, "no_path")
+
+        checked = False
+        while True:
+            x0, y0, x1, y1 = self._tiled_window(start, goal, provider, margin)
+            window, ox, oy = self._bordered_window(provider, x0, y0, x1, y1)
+            local_start, local_goal = (start[0] - ox, start[1] - oy), (goal[0] - ox, goal[1] - oy)
+            if not checked:
+                # The border makes the window's slope mask exact for every searchable
+                # cell, so this is final for the endpoints; log in raster coordinates
+                impassable = self.get_impassable_mask(window)
+                if impassable[local_start] or impassable[local_goal]:
+                    logger.warning("Start %s or goal %s is in impassable terrain", start, goal)
+                    return self._tiled_outcome(start, goal, "impassable")
+                checked = True
+
+            local_allowed = None
+            if allowed is not None:
+                local_allowed = allowed[ox:ox + window.shape[0], oy:oy + window.shape[1]]
+            local_path = self.find_path(local_start, local_goal, window, engine, heuristic, bidirectional,
+                                        local_allowed)
+            if local_path:
+                path = GridPath.from_cells(local_path).shifted(ox, oy)
+                self.elevation_profile = self.elevation_profile.shifted(ox, oy)
+                # Keep the tiles along the route warm for the robot that follows it
+                provider.prefetch_path(path)
+                return path
+            if self.last_stats.outcome in ("impassable", "out_of_bounds"):
+                return None
+
+            if x0 == 0 and y0 == 0 and x1 == provider.width and y1 == provider.height:
+                return None
+            wider = self._largest_fitting_margin(start, goal, provider, margin, margin * 2)
+            if wider == margin:
+                logger.info("No path from %s to %s within the tile memory budget", start, goal)
+                return None
+            margin = wider
+
+    def _tiled_window(self, start, goal, provider, margin):
+        """(x0, y0, x1, y1) of the window margin cells around start and goal, clipped to the raster"""
+        return (max(0, min(start[0], goal[0]) - margin), max(0, min(start[1], goal[1]) - margin),
+                min(provider.width, max(start[0], goal[0]) + margin + 1),
+                min(provider.height, max(start[1], goal[1]) + margin + 1))
+
+    def _border_bounds(self, provider, x0, y0, x1, y1):
+        """The box grown by one cell on every side, clipped to the raster"""
+        return max(0, x0 - 1), max(0, y0 - 1), min(provider.width, x1 + 1), min(provider.height, y1 + 1)
+
+    def _bordered_window(self, provider, x0, y0, x1, y1):
+        """
+        (window, ox, oy): the box x0 <= x < x1, y0 <= y < y1 of a tiled provider plus a
+        one-cell border where the raster has one, with window cell (0, 0) at raster
+        (ox, oy). A cell's slope mask depends on its neighbours, so the border's
+        elevations keep the mask on the box edge the same as on the whole raster;
+        border cells are marked as obstacles so no search or shortcut enters them.
+        The window is reused while its bounds and the provider are unchanged.
+        """
+        bounds = self._border_bounds(provider, x0, y0, x1, y1)
+        ox, oy = bounds[:2]
+        key = (provider, provider.version) + bounds
+        if self._bordered_key != key:
+            window = provider.window(*bounds)
+            obstacles = window.obstacle_mask().copy()
+            obstacles[:x0 - ox] = True
+            obstacles[x1 - ox:] = True
+            obstacles[:, :y0 - oy] = True
+            obstacles[:, y1 - oy:] = True
+            self._bordered = Terrain(window.elevations, obstacles)
+            self._bordered_key = key
+        return self._bordered, ox, oy
+
+    def _largest_fitting_margin(self, start, goal, provider, low, high):
+        """Largest margin in [low, high] whose bordered window fits the provider's memory budget, or None"""
+        def fits(margin):
+            x0, y0, x1, y1 = self._tiled_window(start, goal, provider, margin)
+            return provider.fits_budget(*self._border_bounds(provider, x0, y0, x1, y1), PLANNER_BYTES_PER_CELL)
+
+        if not fits(low):
+            return None
+        while low < high:
+            mid = (low + high + 1) // 2
+            if fits(mid):
+                low = mid
+            else:
+                high = mid - 1
+        return low
+
+    def _tiled_outcome(self, start, goal, outcome):
+        """Record a tiled query that ended before any search, and return None"""
+        stats = PlanStats(start, goal, self.profile_hook)
+        stats.outcome = outcome
+        self.last_stats = stats
+        return None
+
+    def _search_stats(self):
+        """PlanStats of the find_path call in progress, or a throwaway one for direct engine calls"""
+        return self._stats if self._stats is not None else PlanStats()
+
+    def _search_dict(self, start, goal, grid, heuristic=None):
+        """A* keyed on (x, y) tuples; returns the goal-to-start parent map"""
+        stats = self._search_stats()
+        began = time.perf_counter()
+        edge_costs = self.get_edge_costs(grid)
         frontier = []
         heapq.heappush(frontier, (0, start))
         came_from = {start: None}
         cost_so_far = {start: 0}
+        self.nodes_expanded = 0
+        pushed = 1
+        peak_frontier = 1
+        cancel = self.cancel_event
         
         while frontier:
             current = heapq.heappop(frontier)[1]
             
             if current == goal:
                 break
+            self.nodes_expanded += 1
+            if cancel is not None and not self.nodes_expanded % CANCEL_CHECK_INTERVAL and cancel.is_set():
+                raise PlanningCancelled()
                 
-            for next_pos in self.get_neighbors(current, grid):
-                # Calculate new cost including elevation difference
-                elevation_diff = abs(grid[next_pos[0], next_pos[1], 1] - 
-                                  grid[current[0], current[1], 1])
-                
-                # Higher penalty for going uphill vs downhill
-                if grid[next_pos[0], next_pos[1], 1] > grid[current[0], current[1], 1]:
-                    # Going uphill - higher cost
-                    movement_cost = 1 + elevation_diff * 0.8
-                else:
-                    # Going downhill - lower cost but still some penalty
-                    movement_cost = 1 + elevation_diff * 0.3
+            for d, (dx, dy) in enumerate(DIRECTIONS):
+                # One lookup per edge: slope, cliff and uphill/downhill rules are precomputed
+                movement_cost = float(edge_costs[d, current[0], current[1]])
+                if movement_cost == np.inf:
+                    continue
+                next_pos = (current[0] + dx, current[1] + dy)
                 
                 new_cost = cost_so_far[current] + movement_cost
                 
                 if next_pos not in cost_so_far or new_cost < cost_so_far[next_pos]:
                     cost_so_far[next_pos] = new_cost
-                    priority = new_cost + self.heuristic(next_pos, goal, grid)
+                    priority = new_cost + self.heuristic(next_pos, goal, grid, heuristic)
                     heapq.heappush(frontier, (priority, next_pos))
                     came_from[next_pos] = current
+                    pushed += 1
+                    if len(frontier) > peak_frontier:
+                        peak_frontier = len(frontier)
+        
+        stats.nodes_expanded = self.nodes_expanded
+        stats.nodes_pushed = pushed
+        stats.peak_frontier = peak_frontier
+        stats.heuristic_calls = pushed - 1
+        stats.record("search", time.perf_counter() - began)
         
         # Reconstruct path
         if goal not in came_from:
-            print(f"No path found from {start} to {goal}!")
             return None
             
-        path = []
-        current = goal
-        while current is not None:
-            path.append(current)
-            current = came_from[current]
-        path.reverse()
+        with stats.phase("reconstruction"):
+            path = []
+            current = goal
+            while current is not None:
+                path.append(current)
+                current = came_from[current]
+            path.reverse()
+        return GridPath.from_cells(path)
+
+    def _get_search_buffers(self, size, direction="forward"):
+        """
+        g-score, parent and closed arrays for a grid of size cells.
+        Allocated once per search direction and reset only where a search touched
+        them, so memory stays fixed at roughly 17 bytes per cell no matter how
+        many queries run.
+        """
+        buffers = self._search_buffers.get(direction)
+        if buffers is None or len(buffers[0]) != size:
+            buffers = (np.full(size, np.inf),
+                       np.full(size, -1, dtype=np.int64),
+                       np.zeros(size, dtype=bool))
+            self._search_buffers[direction] = buffers
+        return buffers
+
+    def _search_array(self, start, goal, grid, heuristic=None, allowed=None):
+        """
+        A* over flat cell indices (x * height + y) with preallocated NumPy state.
+        Nodes are closed in a bitmap and stale heap entries are skipped on pop
+        (lazy deletion). Expansion and tie-breaking order match _search_dict,
+        so both engines return the same path.
+        allowed is an optional boolean (W, H) mask; cells outside it are never entered.
+        """
+        stats = self._search_stats()
+        began = time.perf_counter()
+        edge_costs = self.get_edge_costs(grid)
+        height = grid.shape[1]
+        g_score, parent, closed = self._get_search_buffers(grid.shape[0] * height)
+        
+        # memoryviews give fast scalar access to the NumPy storage from Python
+        costs = [memoryview(edge_costs[d].reshape(-1)) for d in range(len(DIRECTIONS))]
+        offsets = [dx * height + dy for dx, dy in DIRECTIONS]
+        g = memoryview(g_score)
+        came_from = memoryview(parent)
+        done = memoryview(closed)
+        inside = None
+        if allowed is not None:
+            inside = memoryview(np.ascontiguousarray(allowed, dtype=bool).reshape(-1))
+        
+        start_index = start[0] * height + start[1]
+        goal_index = goal[0] * height + goal[1]
+        touched = [start_index]
+        g[start_index] = 0.0
+        frontier = [(0, start_index)]
+        found = False
+        expanded = 0
+        pushed = 1
+        peak_frontier = 1
+        cancel = self.cancel_event
+        
+        try:
+            while frontier:
+                current = heapq.heappop(frontier)[1]
+                
+                if current == goal_index:
+                    found = True
+                    break
+                if done[current]:
+                    continue
+                done[current] = True
+                expanded += 1
+                if cancel is not None and not expanded % CANCEL_CHECK_INTERVAL and cancel.is_set():
+                    raise PlanningCancelled()
+                
+                current_cost = g[current]
+                for d in range(len(offsets)):
+                    movement_cost = costs[d][current]
+                    if movement_cost == np.inf:
+                        continue
+                    next_index = current + offsets[d]
+                    if inside is not None and not inside[next_index]:
+                        continue
+                    new_cost = current_cost + movement_cost
+                    
+                    if new_cost < g[next_index]:
+                        if g[next_index] == np.inf:
+                            touched.append(next_index)
+                        g[next_index] = new_cost
+                        came_from[next_index] = current
+                        # Reopen the node if it was expanded with a worse cost
+                        done[next_index] = False
+                        next_pos = divmod(next_index, height)
+                        priority = new_cost + self.heuristic(next_pos, goal, grid, heuristic)
+                        heapq.heappush(frontier, (priority, next_index))
+                        pushed += 1
+                        if len(frontier) > peak_frontier:
+                            peak_frontier = len(frontier)
+            stats.record("search", time.perf_counter() - began)
+            
+            path = None
+            if found:
+                with stats.phase("reconstruction"):
+                    indices = [goal_index]
+                    current = goal_index
+                    while current != start_index:
+                        current = came_from[current]
+                        indices.append(current)
+                    path = GridPath.from_indices(indices[::-1], height)
+            return path
+        finally:
+            self.nodes_expanded = expanded
+            stats.nodes_expanded = expanded
+            stats.nodes_pushed = pushed
+            stats.peak_frontier = peak_frontier
+            stats.heuristic_calls = pushed - 1
+            # Reset only the cells this search touched
+            touched = np.array(touched, dtype=np.int64)
+            g_score[touched] = np.inf
+            parent[touched] = -1
+            closed[touched] = False
+
+    def _search_bidirectional(self, start, goal, grid, heuristic=None):
+        """
+        Bidirectional A*: one frontier grows forward from start, the other grows
+        backward from goal over reversed edges. A backward step from v to its
+        predecessor u pays the cost of the forward edge u -> v, so the asymmetric
+        uphill/downhill weights are respected. The search stops as soon as the
+        smallest keys of the two frontiers add up to at least the best meeting
+        cost. With the averaged potentials below that is the bidirectional
+        Dijkstra stopping rule on reduced costs, so the result is exact for the
+        consistent heuristic modes.
+        """
+        if start == goal:
+            return GridPath.from_cells([tuple(start)])
+        stats = self._search_stats()
+        began = time.perf_counter()
+        edge_costs = self.get_edge_costs(grid)
+        height = grid.shape[1]
+        size = grid.shape[0] * height
+        costs = [memoryview(edge_costs[d].reshape(-1)) for d in range(len(DIRECTIONS))]
+        offsets = [dx * height + dy for dx, dy in DIRECTIONS]
+        
+        # sides[0] searches from start, sides[1] from goal
+        sides = []
+        for direction, origin in (("forward", start), ("backward", goal)):
+            g_score, parent, closed = self._get_search_buffers(size, direction)
+            index = origin[0] * height + origin[1]
+            g_view = memoryview(g_score)
+            g_view[index] = 0.0
+            sides.append({"arrays": (g_score, parent, closed), "g": g_view,
+                          "parent": memoryview(parent), "closed": memoryview(closed),
+                          "frontier": [], "touched": [index], "expanded": 0})
+        forward, backward = sides
+        
+        def potential(side, index):
+            # Average of the forward and backward heuristics (Ikeda et al.); the
+            # backward side uses the negated value so both see consistent reduced costs
+            pos = divmod(index, height)
+            p_forward = (self.heuristic(pos, goal, grid, heuristic)
+                         - self.heuristic(start, pos, grid, heuristic)) / 2
+            return p_forward if side is forward else -p_forward
+        
+        for side in sides:
+            index = side["touched"][0]
+            side["frontier"] = [(potential(side, index), index)]
+        
+        best_cost = np.inf
+        meeting = -1
+        pushed = 2
+        peak_frontier = 1
+        cancel = self.cancel_event
+        try:
+            while forward["frontier"] and backward["frontier"]:
+                # Drop closed entries so the frontier tops are real lower bounds
+                for side in sides:
+                    frontier = side["frontier"]
+                    while frontier and side["closed"][frontier[0][1]]:
+                        heapq.heappop(frontier)
+                if not forward["frontier"] or not backward["frontier"]:
+                    break
+                # No unexplored meeting point can beat the best one found so far
+                if forward["frontier"][0][0] + backward["frontier"][0][0] >= best_cost:
+                    break
+                
+                # Expand the smaller frontier
+                side = forward if len(forward["frontier"]) <= len(backward["frontier"]) else backward
+                other = backward if side is forward else forward
+                current = heapq.heappop(side["frontier"])[1]
+                side["closed"][current] = True
+                side["expanded"] += 1
+                if cancel is not None and not side["expanded"] % CANCEL_CHECK_INTERVAL and cancel.is_set():
+                    raise PlanningCancelled()
+                g, other_g = side["g"], other["g"]
+                current_cost = g[current]
+                
+                for d in range(len(offsets)):
+                    if side is forward:
+                        movement_cost = costs[d][current]
+                        if movement_cost == np.inf:
+                            continue
+                        next_index = current + offsets[d]
+                    else:
+                        # Predecessor that moves into current along direction d
+                        next_index = current - offsets[d]
+                        if not 0 <= next_index < size:
+                            continue
+                        movement_cost = costs[d][next_index]
+                        if movement_cost == np.inf:
+                            continue
+                    
+                    new_cost = current_cost + movement_cost
+                    if new_cost < g[next_index]:
+                        if g[next_index] == np.inf:
+                            side["touched"].append(next_index)
+                        g[next_index] = new_cost
+                        side["parent"][next_index] = current
+                        side["closed"][next_index] = False
+                        heapq.heappush(side["frontier"], (new_cost + potential(side, next_index), next_index))
+                        pushed += 1
+                        if len(side["frontier"]) > peak_frontier:
+                            peak_frontier = len(side["frontier"])
+                    # Candidate meeting point
+                    if g[next_index] + other_g[next_index] < best_cost:
+                        best_cost = g[next_index] + other_g[next_index]
+                        meeting = next_index
+            
+            self.last_search_report = {"mode": "bidirectional",
+                                       "forward_expanded": forward["expanded"],
+                                       "backward_expanded": backward["expanded"]}
+            self.nodes_expanded = forward["expanded"] + backward["expanded"]
+            stats.nodes_expanded = self.nodes_expanded
+            stats.nodes_pushed = pushed
+            stats.peak_frontier = peak_frontier
+            # Each potential evaluates the heuristic in both directions
+            stats.heuristic_calls = 2 * pushed
+            stats.record("search", time.perf_counter() - began)
+            if meeting == -1:
+                return None
+            
+            # Start ... meeting from forward parents, then meeting ... goal from backward parents
+            with stats.phase("reconstruction"):
+                indices = []
+                current = meeting
+                while current != -1:
+                    indices.append(current)
+                    current = forward["parent"][current]
+                indices.reverse()
+                current = backward["parent"][meeting]
+                while current != -1:
+                    indices.append(current)
+                    current = backward["parent"][current]
+                path = GridPath.from_indices(indices, height)
+            return path
+        finally:
+            for side in sides:
+                g_score, parent, closed = side["arrays"]
+                touched = np.array(side["touched"], dtype=np.int64)
+                g_score[touched] = np.inf
+                parent[touched] = -1
+                closed[touched] = False
+
+    def compare_bidirectional(self, start, goal, grid, heuristic=None):
+        """
+        Run unidirectional and bidirectional A* on the same query and report
+        the node expansions of each and the fraction saved by going bidirectional.
+        """
+        uni_path = self._search_array(start, goal, grid, heuristic)
+        uni_expanded = self.nodes_expanded
+        bi_path = self._search_bidirectional(start, goal, grid, heuristic)
+        report = dict(self.last_search_report)
+        report.update({
+            "unidirectional_expanded": uni_expanded,
+            "bidirectional_expanded": self.nodes_expanded,
+            "savings": 1 - self.nodes_expanded / uni_expanded if uni_expanded else 0.0,
+            "unidirectional_cost": self.path_cost(uni_path, grid) if uni_path else None,
+            "bidirectional_cost": self.path_cost(bi_path, grid) if bi_path else None,
+        })
+        self.last_search_report = report
+        return report
+
+    def path_cost(self, path, grid):
+        """
+        Total movement cost of a path under the current cost model.
+        Cardinal steps use the precomputed edge costs; longer steps (direct or
+        smoothed paths) pay their length plus the uphill/downhill penalty.
+        """
+        edge_costs = self.get_edge_costs(grid)
+        elevation = self.get_elevation(grid)
+        total = 0.0
+        for a, b in zip(path, path[1:]):
+            step = (b[0] - a[0], b[1] - a[1])
+            if step in DIRECTIONS:
+                total += float(edge_costs[DIRECTIONS.index(step), a[0], a[1]])
+                continue
+            elevation_diff = float(elevation[b[0], b[1]]) - float(elevation[a[0], a[1]])
+            weight = self.uphill_weight if elevation_diff > 0 else self.downhill_weight
+            total += math.hypot(*step) + abs(elevation_diff) * weight
+        return float(total)
+
+    def find_path(self, start, goal, grid, engine=None, heuristic=None, bidirectional=None, allowed=None):
+        """
+        Find a path using A* algorithm, avoiding steep terrain.
+        engine selects the search implementation: "array" (flat indices and
+        NumPy state, the default) or "dict" (tuple-keyed dictionaries).
+        heuristic overrides heuristic_mode for this query.
+        bidirectional searches from both ends at once (defaults to self.bidirectional).
+        allowed restricts the search to a boolean (W, H) corridor mask and
+        always uses the array engine.
+        A PlanStats describing the call is left in self.last_stats.
+        """
+        # Tiled terrain is planned over a dense window around the query
+        if getattr(grid, "is_tiled", False):
+            return self.find_path_tiled(start, goal, grid, None, engine, heuristic, bidirectional, allowed)
+        
+        stats = PlanStats(tuple(start), tuple(goal), self.profile_hook)
+        self.last_stats = stats
+        self._stats = stats
+        hits, misses = self.terrain_cache_hits, self.terrain_cache_misses
+        began = time.perf_counter()
+        try:
+            path = self._plan(start, goal, grid, engine, heuristic, bidirectional, allowed, stats)
+            stats.path_length = len(path) if path else 0
+            return path
+        except PlanningCancelled:
+            stats.outcome = "cancelled"
+            raise
+        finally:
+            self._stats = None
+            stats.terrain_cache_hits = self.terrain_cache_hits - hits
+            stats.terrain_cache_misses = self.terrain_cache_misses - misses
+            stats.total_seconds = time.perf_counter() - began
+            if stats.hook is not None:
+                stats.hook("total", stats.total_seconds, stats)
+
+    def _plan(self, start, goal, grid, engine, heuristic, bidirectional, allowed, stats):
+        """Body of find_path, recording its phases into stats"""
+        # First, look up impassable terrain based on slopes (cached per terrain version)
+        with stats.phase("terrain"):
+            impassable = self.get_impassable_mask(grid)
+        
+        # If start or goal is off the grid or in impassable terrain, return None
+        if not (self.in_bounds(start, grid) and self.in_bounds(goal, grid)):
+            logger.warning("Start %s or goal %s is outside the terrain", start, goal)
+            stats.outcome = "out_of_bounds"
+            return None
+        if impassable[start[0], start[1]] or impassable[goal[0], goal[1]]:
+            logger.warning("Start %s or goal %s is in impassable terrain", start, goal)
+            stats.outcome = "impassable"
+            return None
+            
+        # NEW: Try direct path first if possible
+        with stats.phase("direct_path"):
+            direct_path = self.find_direct_path(start, goal, grid)
+        if direct_path:
+            logger.debug("Direct path found from %s to %s", start, goal)
+            stats.outcome = "direct"
+            return direct_path
+            
+        logger.debug("Direct path not possible, using A* from %s to %s", start, goal)
+        
+        heuristic = heuristic or self.heuristic_mode
+        with stats.phase("terrain"):
+            # Edge costs are built lazily; time them with the rest of the precompute
+            self.get_edge_costs(grid)
+            if heuristic == "visibility":
+                self.prepare_visibility_field(start, goal, grid)
+        
+        engine = engine or self.search_engine
+        if bidirectional is None:
+            bidirectional = self.bidirectional
+        if allowed is not None:
+            stats.engine = "array"
+            path = self._search_array(start, goal, grid, heuristic, allowed)
+        elif bidirectional:
+            stats.engine = "bidirectional"
+            path = self._search_bidirectional(start, goal, grid, heuristic)
+        elif engine == "array":
+            stats.engine = engine
+            path = self._search_array(start, goal, grid, heuristic)
+        elif engine == "dict":
+            stats.engine = engine
+            path = self._search_dict(start, goal, grid, heuristic)
+        else:
+            raise ValueError(f"Unknown search engine: {engine}")
+        
+        if path is None:
+            logger.info("No path found from %s to %s", start, goal)
+            stats.outcome = "no_path"
+            return None
+        stats.outcome = "search"
         
         # Store elevation profile for visualization
-        self.elevation_profile = [(pos, grid[pos[0], pos[1], 1]) for pos in path]
+        self.elevation_profile = ElevationProfile.from_grid(path, grid)
         
         return path
 
@@ -249,32 +1119,176 @@ class Algorithm:
         pygame.draw.rect(screen, (255, 255, 255), (x, y, width, height))
         pygame.draw.rect(screen, (0, 0, 0), (x, y, width, height), 1)
         
-        # Get elevation range
-        elevations = [e for _, e in self.elevation_profile]
-        min_elevation = min(elevations)
-        max_elevation = max(elevations)
-        elevation_range = max_elevation - min_elevation or 1
-        
-        # Draw profile
-        points = []
-        for i, (_, elevation) in enumerate(self.elevation_profile):
-            px = x + (i / (len(self.elevation_profile)-1)) * width
-            py = y + height - ((elevation - min_elevation) / elevation_range) * height
-            points.append((int(px), int(py)))
-            
+        # Polyline and steep-section markers are computed once per profile
+        points, markers = self.elevation_profile.geometry(x, y, width, height, self.max_slope * 0.8)
         if len(points) > 1:
             pygame.draw.lines(screen, (0, 0, 255), False, points, 2)
             
-            # Mark steep sections
-            for i in range(len(points)-1):
-                pos1 = self.elevation_profile[i][0]
-                pos2 = self.elevation_profile[i+1][0]
-                
-                # Calculate slope
-                slope = self.get_slope(pos1, pos2, grid)
-                
-                if slope > self.max_slope * 0.8:  # Warning for slopes near maximum
-                    # Draw a warning marker
-                    mid_x = (points[i][0] + points[i+1][0]) // 2
-                    mid_y = (points[i][1] + points[i+1][1]) // 2
-                    pygame.draw.circle(screen, (255, 0, 0), (mid_x, mid_y), 4)
\ No newline at end of file
+            # Warning markers for slopes near maximum
+            for marker in markers:
+                pygame.draw.circle(screen, (255, 0, 0), marker, 4)
+
+
+class DStarLite:
+    """
+    Incremental planner (D* Lite) on top of an Algorithm's edge costs.
+    
+    The search runs backwards from the goal and keeps its g/rhs values between
+    calls, so when the robot moves or a few cells change only the affected part
+    of the search tree is repaired instead of planning from scratch.
+    """
+    # Relative slack when comparing queue keys with the start's, so that vertices
+    # tied with it up to rounding are still settled before the search stops
+    KEY_TOLERANCE = 1e-9
+
+    def __init__(self, algorithm, grid, start, goal):
+        self.algorithm = algorithm
+        self.grid = grid
+        self.start = tuple(start)
+        self.goal = tuple(goal)
+        self.reset()
+
+    def reset(self):
+        """Throw away the search tree and start over from the goal"""
+        self.edge_costs = self.algorithm.get_edge_costs(self.grid)
+        self.terrain_version = self.algorithm.terrain_version
+        self.g = {}
+        self.rhs = {self.goal: 0.0}
+        self.km = 0.0
+        self.last_start = self.start
+        self.open = []
+        self.open_keys = {}
+        self._push(self.goal)
+
+    def _h(self, a, b):
+        # Every step costs at least 1, so Manhattan distance is consistent. Unlike
+        # cost_scaled it does not read elevation, which update_cells may change in
+        # place after keys built from it are already queued.
+        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+    def _key(self, s):
+        best = min(self.g.get(s, np.inf), self.rhs.get(s, np.inf))
+        return (best + self._h(self.start, s) + self.km, best)
+
+    def _push(self, s):
+        key = self._key(s)
+        self.open_keys[s] = key
+        heapq.heappush(self.open, (key, s))
+
+    def _successors(self, s):
+        x, y = s
+        for d, (dx, dy) in enumerate(DIRECTIONS):
+            cost = float(self.edge_costs[d, x, y])
+            if cost != np.inf:
+                yield (x + dx, y + dy), cost
+
+    def _predecessors(self, s):
+        x, y = s
+        width, height = self.edge_costs.shape[1], self.edge_costs.shape[2]
+        for d, (dx, dy) in enumerate(DIRECTIONS):
+            px, py = x - dx, y - dy
+            if 0 <= px < width and 0 <= py < height:
+                cost = float(self.edge_costs[d, px, py])
+                if cost != np.inf:
+                    yield (px, py), cost
+
+    def _update_vertex(self, s):
+        if s != self.goal:
+            self.rhs[s] = min((cost + self.g.get(n, np.inf) for n, cost in self._successors(s)),
+                              default=np.inf)
+        # Lazy deletion: the old heap entry is ignored once its key no longer matches
+        self.open_keys.pop(s, None)
+        if self.g.get(s, np.inf) != self.rhs.get(s, np.inf):
+            self._push(s)
+
+    def compute_shortest_path(self):
+        cancel = self.algorithm.cancel_event
+        processed = 0
+        while self.open:
+            processed += 1
+            if cancel is not None and not processed % CANCEL_CHECK_INTERVAL and cancel.is_set():
+                raise PlanningCancelled()
+            key, s = self.open[0]
+            if self.open_keys.get(s) != key:
+                heapq.heappop(self.open)
+                continue
+            start_key = self._key(self.start)
+            settled = key[0] > start_key[0] + self.KEY_TOLERANCE * max(1.0, abs(start_key[0]))
+            if settled and self.rhs.get(self.start, np.inf) == self.g.get(self.start, np.inf):
+                break
+            
+            heapq.heappop(self.open)
+            del self.open_keys[s]
+            new_key = self._key(s)
+            g_s = self.g.get(s, np.inf)
+            rhs_s = self.rhs.get(s, np.inf)
+            if key < new_key:
+                self._push(s)
+            elif g_s > rhs_s:
+                self.g[s] = rhs_s
+                for p, _ in self._predecessors(s):
+                    self._update_vertex(p)
+            else:
+                self.g[s] = np.inf
+                self._update_vertex(s)
+                for p, _ in self._predecessors(s):
+                    self._update_vertex(p)
+
+    def update_start(self, start):
+        """Move the search start to the robot's current cell"""
+        start = tuple(start)
+        if start != self.start:
+            self.km += self._h(self.last_start, start)
+            self.last_start = start
+            self.start = start
+
+    def update_cells(self, cells):
+        """Repair the search tree after the given cells of the grid were edited"""
+        changed = self.algorithm.update_terrain_cells(self.grid, cells)
+        if changed is None:
+            self.reset()
+            return
+        
+        self.edge_costs = self.algorithm.get_edge_costs(self.grid)
+        self.terrain_version = self.algorithm.terrain_version
+        x0, y0, x1, y1 = changed
+        # Outgoing edge costs only changed for cells inside the returned box
+        for x in range(x0, x1):
+            for y in range(y0, y1):
+                self._update_vertex((x, y))
+
+    def is_current(self, grid, goal):
+        """True if this planner can be reused for grid and goal without a reset"""
+        return (grid is self.grid and tuple(goal) == self.goal
+                and self.terrain_version == self.algorithm.terrain_version)
+
+    def plan(self):
+        """Bring the search tree up to date and return the path from start to goal"""
+        if self.algorithm.terrain_version != self.terrain_version:
+            self.reset()
+        # Same endpoint rule as find_path: edits may leave the start on a slope too steep to be in
+        impassable = self.algorithm.get_impassable_mask(self.grid)
+        if impassable[self.start] or impassable[self.goal]:
+            return None
+        self.compute_shortest_path()
+        if self.g.get(self.start, np.inf) == np.inf:
+            return None
+        
+        # Walk down the cost-to-goal values from the start
+        path = [self.start]
+        current = self.start
+        max_steps = self.edge_costs.shape[1] * self.edge_costs.shape[2]
+        while current != self.goal:
+            best, best_cost = None, np.inf
+            for n, cost in self._successors(current):
+                total = cost + self.g.get(n, np.inf)
+                if total < best_cost:
+                    best, best_cost = n, total
+            if best is None or len(path) > max_steps:
+                return None
+            path.append(best)
+            current = best
+        
+        path = GridPath.from_cells(path)
+        self.algorithm.elevation_profile = ElevationProfile.from_grid(path, self.grid)
+        return path
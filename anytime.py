@@ -0,0 +1,250 @@
+# anytime.py
+import heapq
+import logging
+import time
+
+import numpy as np
+
+from algorithm import CANCEL_CHECK_INTERVAL, DIRECTIONS, PlanningCancelled
+from grid_path import ElevationProfile, GridPath
+from plan_stats import PlanStats
+
+logger = logging.getLogger(__name__)
+
+
+class AnytimeSearch:
+    """
+    Anytime Repairing A* (ARA*) from start to goal on a dense grid.
+
+    The first search inflates the heuristic by epsilon, which finds a path
+    after far fewer expansions than plain A*. Each later iteration lowers
+    epsilon by epsilon_step and repairs the previous search instead of
+    starting over, until epsilon reaches 1 and the path is optimal. Every
+    solution comes with a bound: its cost is at most bound times the optimal
+    cost.
+
+    run() does the work under a time and/or expansion budget and can be
+    called again to keep improving where the last call stopped. The
+    heuristic must be consistent (every built-in mode except "visibility").
+    """
+
+    def __init__(self, algorithm, start, goal, grid, epsilon=3.0, epsilon_step=0.5, heuristic=None):
+        self.algorithm = algorithm
+        self.start, self.goal = tuple(start), tuple(goal)
+        self.grid = grid
+        self.epsilon = max(1.0, epsilon)
+        self.epsilon_step = epsilon_step
+        self.heuristic = heuristic or algorithm.heuristic_mode
+        if self.heuristic == "visibility":
+            raise ValueError("ARA* needs a consistent heuristic; 'visibility' is not")
+        self.terrain_key = algorithm.terrain_key(grid)
+        self.path = None  # Best path so far
+        self.bound = np.inf  # Suboptimality bound of self.path
+        self.done = False  # No further improvement is possible
+        self.nodes_expanded = 0
+        self.iterations = 0
+        self.stats = PlanStats(self.start, self.goal, algorithm.profile_hook)
+        self.stats.engine = "ara"
+
+        # Flat per-cell state, read through memoryviews for fast scalar access
+        self._height = grid.shape[1]
+        size = grid.shape[0] * self._height
+        self._g_score = np.full(size, np.inf)
+        self._parent_index = np.full(size, -1, dtype=np.int64)
+        self._h_cache = np.full(size, -1.0)  # Heuristic values are computed once; -1 is unset
+        self._closed_in = np.zeros(size, dtype=np.int32)  # Iteration (from 1) that closed the cell
+        self._g = memoryview(self._g_score)
+        self._parent = memoryview(self._parent_index)
+        self._h = memoryview(self._h_cache)
+        self._closed = memoryview(self._closed_in)
+        self._open = set()
+        self._incons = set()
+        self._frontier = []
+        self._started = False
+
+    def _h_of(self, index):
+        h = self._h[index]
+        if h < 0:
+            h = self.algorithm.heuristic(divmod(index, self._height), self.goal, self.grid, self.heuristic)
+            self._h[index] = h
+        return h
+
+    def _push(self, index):
+        key = self._g[index] + self.epsilon * self._h_of(index)
+        self._open.add(index)
+        heapq.heappush(self._frontier, (key, index))
+
+    def _check_endpoints(self):
+        """False, with stats.outcome set, when no search is needed or possible"""
+        algorithm, grid, stats = self.algorithm, self.grid, self.stats
+        with stats.phase("terrain"):
+            impassable = algorithm.get_impassable_mask(grid)
+        if not (algorithm.in_bounds(self.start, grid) and algorithm.in_bounds(self.goal, grid)):
+            stats.outcome = "out_of_bounds"
+            return False
+        if impassable[self.start] or impassable[self.goal]:
+            stats.outcome = "impassable"
+            return False
+        # A clear straight line is final, as in find_path
+        with stats.phase("direct_path"):
+            path = algorithm.find_direct_path(self.start, self.goal, grid)
+        if path:
+            stats.outcome = "direct"
+            self.path, self.bound = path, 1.0
+            return False
+        return True
+
+    def _improve_path(self, deadline, max_expanded):
+        """
+        Expand until the goal's g-value is no larger than the smallest open key.
+        Returns False if the budget ran out first; the search resumes from there.
+        """
+        edge_costs = self.algorithm.get_edge_costs(self.grid)
+        costs = [memoryview(edge_costs[d].reshape(-1)) for d in range(len(DIRECTIONS))]
+        offsets = [dx * self._height + dy for dx, dy in DIRECTIONS]
+        goal_index = self.goal[0] * self._height + self.goal[1]
+        g, parent, closed, frontier = self._g, self._parent, self._closed, self._frontier
+        cancel = self.algorithm.cancel_event
+        epsilon = self.epsilon
+        iteration = self.iterations + 1
+
+        while frontier:
+            key, current = frontier[0]
+            if current not in self._open or key != g[current] + epsilon * self._h_of(current):
+                heapq.heappop(frontier)  # Stale entry
+                continue
+            if g[goal_index] <= key:
+                return True
+            if max_expanded is not None and self.nodes_expanded >= max_expanded:
+                return False
+            if deadline is not None and time.perf_counter() >= deadline:
+                return False
+            if cancel is not None and not self.nodes_expanded % CANCEL_CHECK_INTERVAL and cancel.is_set():
+                raise PlanningCancelled()
+
+            heapq.heappop(frontier)
+            self._open.discard(current)
+            closed[current] = iteration
+            self.nodes_expanded += 1
+            current_cost = g[current]
+            for d in range(len(offsets)):
+                movement_cost = costs[d][current]
+                if movement_cost == np.inf:
+                    continue
+                next_index = current + offsets[d]
+                new_cost = current_cost + movement_cost
+                if new_cost < g[next_index]:
+                    g[next_index] = new_cost
+                    parent[next_index] = current
+                    if closed[next_index] == iteration:
+                        # Expanded already in this iteration; revisit in the next one
+                        self._incons.add(next_index)
+                    else:
+                        self._push(next_index)
+        return True
+
+    def _solution_bound(self, goal_cost):
+        """min(epsilon, goal cost / smallest unexpanded g + h): the bound ARA* guarantees"""
+        pending = self._open | self._incons
+        if not pending:
+            return 1.0
+        lowest = min(self._g[i] + self._h_of(i) for i in pending)
+        return max(1.0, min(self.epsilon, goal_cost / lowest if lowest > 0 else self.epsilon))
+
+    def _reconstruct(self, goal_index):
+        start_index = self.start[0] * self._height + self.start[1]
+        indices = [goal_index]
+        current = goal_index
+        while current != start_index:
+            current = self._parent[current]
+            indices.append(current)
+        return GridPath.from_indices(indices[::-1], self._height)
+
+    def _next_iteration(self):
+        """Lower epsilon and requeue open and inconsistent nodes with the new keys"""
+        if self.epsilon <= 1.0:
+            self.done = True
+            return
+        self.epsilon = max(1.0, self.epsilon - self.epsilon_step)
+        pending = self._open | self._incons
+        self._open, self._incons = set(), set()
+        self._frontier = []
+        for index in pending:
+            self._push(index)
+
+    def run(self, time_budget=None, expansion_budget=None):
+        """
+        Generator of (path, bound) for every improved solution found within the
+        budget (seconds and/or node expansions; None means unlimited). Stops when
+        the budget is spent or the path is optimal. Call again to continue.
+        """
+        stats = self.stats
+        run_began = time.perf_counter()
+        try:
+            yield from self._run(run_began, time_budget, expansion_budget)
+        finally:
+            stats.total_seconds += time.perf_counter() - run_began
+
+    def _run(self, began, time_budget, expansion_budget):
+        algorithm, stats = self.algorithm, self.stats
+        deadline = None if time_budget is None else began + time_budget
+        max_expanded = None if expansion_budget is None else self.nodes_expanded + expansion_budget
+        algorithm.last_stats = stats
+
+        if not self._started:
+            self._started = True
+            if not self._check_endpoints():
+                self.done = True
+                if self.path is not None:
+                    algorithm.elevation_profile = ElevationProfile.from_grid(self.path, self.grid)
+                    yield self.path, self.bound
+                return
+            with stats.phase("terrain"):
+                algorithm.get_edge_costs(self.grid)
+            start_index = self.start[0] * self._height + self.start[1]
+            self._g[start_index] = 0.0
+            self._push(start_index)
+
+        goal_index = self.goal[0] * self._height + self.goal[1]
+        while not self.done:
+            search_began = time.perf_counter()
+            try:
+                finished = self._improve_path(deadline, max_expanded)
+            finally:
+                stats.record("search", time.perf_counter() - search_began)
+                stats.nodes_expanded = self.nodes_expanded
+            if not finished:
+                return
+
+            goal_cost = self._g[goal_index]
+            if goal_cost == np.inf:
+                logger.info("No path found from %s to %s", self.start, self.goal)
+                stats.outcome = "no_path"
+                self.done = True
+                return
+            with stats.phase("reconstruction"):
+                path = self._reconstruct(goal_index)
+            self.path, self.bound = path, self._solution_bound(goal_cost)
+            self.iterations += 1
+            stats.outcome = "search"
+            stats.path_length = len(path)
+            logger.debug("ARA* iteration %d: epsilon %.2f, bound %.3f, cost %.2f, %d expanded",
+                         self.iterations, self.epsilon, self.bound, goal_cost, self.nodes_expanded)
+            if self.bound <= 1.0:
+                self.done = True
+            else:
+                self._next_iteration()
+            algorithm.elevation_profile = ElevationProfile.from_grid(path, self.grid)
+            yield path, self.bound
+
+
+def find_path_anytime(algorithm, start, goal, grid, time_budget=None, expansion_budget=None, epsilon=3.0,
+                      epsilon_step=0.5):
+    """
+    Best path found within the budget and its suboptimality bound, as (path, bound);
+    (None, inf) when no path was found in time or none exists.
+    """
+    search = AnytimeSearch(algorithm, start, goal, grid, epsilon, epsilon_step)
+    for _ in search.run(time_budget, expansion_budget):
+        pass
+    return search.path, search.bound
@@ -0,0 +1,117 @@
+# batch_planner.py
+import mmap
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from algorithm import Algorithm
+from terrain import Terrain
+
+BatchResult = namedtuple("BatchResult", ["start", "goal", "path", "seconds", "cpu_seconds", "worker"])
+
+# Per-process state, set up once by _init_worker
+_worker_grid = None
+_worker_algorithm = None
+_worker_shm = None
+
+
+def _share_terrain(grid):
+    """
+    Describe how workers can map the grid without it being pickled per task.
+    Memmaps backed directly by a file are reopened by path; anything else is
+    copied once into a shared memory block, a Terrain as its elevation array
+    followed by its obstacle bits. Returns (descriptor, shm or None).
+    """
+    if isinstance(grid, Terrain):
+        shm = shared_memory.SharedMemory(create=True, size=grid.nbytes)
+        split = grid.elevations.nbytes
+        np.ndarray(grid.elevations.shape, dtype=np.float32, buffer=shm.buf)[...] = grid.elevations
+        np.ndarray(grid.obstacle_bits.shape, dtype=np.uint8, buffer=shm.buf, offset=split)[...] = grid.obstacle_bits
+        return ("terrain", shm.name, grid.width, grid.height), shm
+
+    if isinstance(grid, np.memmap) and isinstance(grid.base, mmap.mmap) and grid.flags.c_contiguous:
+        return ("memmap", grid.filename, grid.dtype.str, grid.shape, grid.offset), None
+
+    shm = shared_memory.SharedMemory(create=True, size=max(1, grid.nbytes))
+    shared = np.ndarray(grid.shape, dtype=grid.dtype, buffer=shm.buf)
+    shared[...] = grid
+    return ("shm", shm.name, grid.dtype.str, grid.shape), shm
+
+
+def _init_worker(terrain, settings):
+    global _worker_grid, _worker_algorithm, _worker_shm
+
+    if terrain[0] == "memmap":
+        _, filename, dtype, shape, offset = terrain
+        _worker_grid = np.memmap(filename, dtype=np.dtype(dtype), mode="r", shape=shape, offset=offset)
+    elif terrain[0] == "terrain":
+        _, name, width, height = terrain
+        _worker_shm = shared_memory.SharedMemory(name=name)
+        elevations = np.ndarray((width, height), dtype=np.float32, buffer=_worker_shm.buf)
+        bits = np.ndarray(-(-width * height // 8), dtype=np.uint8, buffer=_worker_shm.buf, offset=elevations.nbytes)
+        _worker_grid = Terrain.from_buffers(elevations, bits)
+    else:
+        _, name, dtype, shape = terrain
+        # Pool workers share the parent's resource tracker, which unlinks the block once
+        _worker_shm = shared_memory.SharedMemory(name=name)
+        _worker_grid = np.ndarray(shape, dtype=np.dtype(dtype), buffer=_worker_shm.buf)
+
+    _worker_algorithm = Algorithm()
+    for name, value in settings.items():
+        setattr(_worker_algorithm, name, value)
+
+
+def _plan_one(query):
+    start, goal = query
+    began = time.perf_counter()
+    cpu_began = time.process_time()
+    path = _worker_algorithm.find_path(tuple(start), tuple(goal), _worker_grid)
+    return path, time.perf_counter() - began, time.process_time() - cpu_began, os.getpid()
+
+
+def plan_batch(queries, grid, processes=None, settings=None, chunksize=None):
+    """
+    Plan many (start, goal) pairs against one shared terrain on a process pool.
+
+    The grid is shared with the workers through shared memory, or by path when
+    it is a file-backed memmap, so it is never pickled per task. Each worker
+    keeps one Algorithm, so its terrain caches are built once and reused.
+    settings is a dict of Algorithm attributes (max_slope, heuristic_mode, ...).
+
+    Returns (results, report): results is a list of BatchResult in query
+    order with per-query wall and CPU timings, and report summarizes wall
+    time and speedup.
+    """
+    queries = [(tuple(start), tuple(goal)) for start, goal in queries]
+    processes = processes or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, len(queries) // (processes * 4))
+
+    terrain, shm = _share_terrain(grid)
+    began = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                 initargs=(terrain, settings or {})) as pool:
+            planned = list(pool.map(_plan_one, queries, chunksize=chunksize))
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+    wall_seconds = time.perf_counter() - began
+
+    results = [BatchResult(start, goal, *outcome) for (start, goal), outcome in zip(queries, planned)]
+    cpu_seconds = sum(result.cpu_seconds for result in results)
+    report = {
+        "queries": len(results),
+        "processes": processes,
+        "wall_seconds": wall_seconds,
+        "planning_cpu_seconds": cpu_seconds,
+        # CPU time spent planning per second of wall time; approaches processes when scaling well
+        "speedup": cpu_seconds / wall_seconds if wall_seconds else 0.0,
+        "found": sum(result.path is not None for result in results),
+    }
+    return results, report
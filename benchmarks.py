@@ -0,0 +1,242 @@
+# benchmarks.py
+"""
+Planner benchmark suite.
+
+Runs find_path, find_direct_path, calculate_impassable_terrain and
+has_line_of_sight over seeded synthetic terrains (flat, rolling, cliffs,
+maze) at several sizes and over crops of the hillshade TIFF, and records
+wall time, nodes expanded, peak memory and path cost to a JSON file.
+With --sparse the SciPy sparse-graph backend answers the same queries; its
+paths are checked against find_path (same outcome, same cost) and a table
+shows where it overtakes A* by grid size.
+
+Example:
+    python benchmarks.py --sizes 64 128 256 --output bench.json
+    python benchmarks.py --output after.json --compare bench.json
+    python benchmarks.py --sparse --kinds rolling maze --sizes 64 128 256 512
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from algorithm import Algorithm
+from synthetic_terrain import TERRAIN_KINDS, grid_from_elevation, make_terrain, sample_free_cells
+
+DEFAULT_TIFF = "South_Clear_Creek_BareEarth_Hillshade_1m_chunk_8192_0.tiff"
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _measure(func, repeats):
+    """(result, best wall seconds over repeats, peak traced bytes of one extra run)"""
+    best = float("inf")
+    result = None
+    for _ in range(repeats):
+        began = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - began)
+
+    # Tracing slows everything down, so peak memory gets its own run
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, best, peak
+
+
+def tiff_scenarios(tiff_path, sizes):
+    """(name, size, grid) crops from the corner and the centre of a GeoTIFF band"""
+    from terrain_cache import load_terrain
+
+    elevation = load_terrain(tiff_path)
+    rows, cols = elevation.shape
+    for size in sizes:
+        if size > min(rows, cols):
+            continue
+        for label, row, col in (("corner", 0, 0), ("center", (rows - size) // 2, (cols - size) // 2)):
+            yield f"tiff_{label}", size, grid_from_elevation(elevation[row:row + size, col:col + size])
+
+
+def synthetic_scenarios(kinds, sizes, seed):
+    for kind in kinds:
+        for size in sizes:
+            yield kind, size, make_terrain(kind, size, seed=seed)
+
+
+def run_scenario(name, size, grid, queries, repeats, seed, sparse=False):
+    """Benchmark every operation on one terrain; returns a list of result records"""
+    algorithm = Algorithm()
+    backend = None
+    if sparse:
+        from sparse_backend import SparseGraphBackend
+
+        backend = SparseGraphBackend(Algorithm())
+    records = []
+
+    def record(operation, wall, peak, **extra):
+        records.append(dict(scenario=name, size=size, operation=operation,
+                            wall_seconds=wall, peak_bytes=peak, **extra))
+
+    def impassable():
+        # Drop the per-grid caches so every run pays for the full slope analysis
+        algorithm.invalidate_terrain()
+        return algorithm.calculate_impassable_terrain(grid)
+
+    cells, wall, peak = _measure(impassable, repeats)
+    record("calculate_impassable_terrain", wall, peak, impassable_cells=len(cells))
+
+    try:
+        picks = sample_free_cells(algorithm, grid, 2 * queries, seed=seed)
+    except ValueError:
+        return records
+    pairs = list(zip(picks[::2], picks[1::2]))
+
+    for i, (start, goal) in enumerate(pairs):
+        query = {"query": i, "start": list(start), "goal": list(goal)}
+
+        visible, wall, peak = _measure(lambda: algorithm.has_line_of_sight(start, goal, grid), repeats)
+        record("has_line_of_sight", wall, peak, visible=bool(visible), **query)
+
+        direct, wall, peak = _measure(lambda: algorithm.find_direct_path(start, goal, grid), repeats)
+        record("find_direct_path", wall, peak, found=direct is not None, **query)
+
+        path, wall, peak = _measure(lambda: algorithm.find_path(start, goal, grid), repeats)
+        stats = algorithm.last_stats
+        record("find_path", wall, peak, found=path is not None, outcome=stats.outcome,
+               nodes_expanded=stats.nodes_expanded, nodes_pushed=stats.nodes_pushed,
+               peak_frontier=stats.peak_frontier, timings=stats.timings,
+               path_length=len(path) if path else None,
+               path_cost=algorithm.path_cost(path, grid) if path else None, **query)
+
+        if backend is not None:
+            sparse_path, wall, peak = _measure(lambda: backend.find_path(start, goal, grid), repeats)
+            cost = algorithm.path_cost(sparse_path, grid) if sparse_path else None
+            # Both planners are optimal, so equal-cost paths may still differ cell by cell
+            parity = (sparse_path is None) == (path is None) and (
+                path is None or abs(cost - algorithm.path_cost(path, grid)) <= 1e-6 * max(1.0, cost))
+            record("sparse_find_path", wall, peak, found=sparse_path is not None,
+                   outcome=backend.algorithm.last_stats.outcome, path_cost=cost, parity=parity, **query)
+
+    if backend is not None:
+        def build_graph():
+            backend.algorithm.invalidate_terrain()
+            return backend.get_graph(grid)
+
+        graph, wall, peak = _measure(build_graph, repeats)
+        record("sparse_build_graph", wall, peak, edges=int(graph.nnz))
+    return records
+
+
+def summarize(records):
+    """Total wall time per (scenario, size, operation)"""
+    totals = {}
+    for r in records:
+        key = (r["scenario"], r["size"], r["operation"])
+        totals[key] = totals.get(key, 0.0) + r["wall_seconds"]
+    return totals
+
+
+def sparse_crossover(records):
+    """Print A* against the sparse backend per scenario and size, with any parity failures"""
+    totals = summarize(records)
+    failures = [r for r in records if r["operation"] == "sparse_find_path" and not r["parity"]]
+    print(f"\n{'scenario':<14}{'size':>6}{'A*':>10}{'sparse':>10}{'graph':>10}  faster")
+    for scenario, size, operation in sorted(totals):
+        if operation != "find_path":
+            continue
+        astar = totals[(scenario, size, "find_path")]
+        sparse = totals.get((scenario, size, "sparse_find_path"))
+        if sparse is None:
+            continue
+        graph = totals.get((scenario, size, "sparse_build_graph"), 0.0)
+        print(f"{scenario:<14}{size:>6}{astar:>10.4f}{sparse:>10.4f}{graph:>10.4f}  "
+              f"{'sparse' if sparse < astar else 'A*'}")
+    print(f"Parity: {len(failures)} mismatches")
+    for r in failures:
+        print(f"  {r['scenario']} {r['size']} {r['start']} -> {r['goal']}")
+    return failures
+
+
+def compare(records, baseline_path):
+    with open(baseline_path) as f:
+        baseline = summarize(json.load(f)["results"])
+    current = summarize(records)
+    print(f"\n{'scenario':<14}{'size':>6}  {'operation':<30}{'before':>10}{'after':>10}{'ratio':>8}")
+    for key in sorted(current):
+        if key in baseline and baseline[key] > 0:
+            before, after = baseline[key], current[key]
+            print(f"{key[0]:<14}{key[1]:>6}  {key[2]:<30}{before:>10.4f}{after:>10.4f}{after / before:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the path planner")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[64, 128, 256])
+    parser.add_argument("--kinds", nargs="+", default=list(TERRAIN_KINDS), choices=TERRAIN_KINDS)
+    parser.add_argument("--queries", type=int, default=5, help="start/goal pairs per scenario")
+    parser.add_argument("--repeats", type=int, default=3, help="timed runs per measurement (best is kept)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tiff", default=DEFAULT_TIFF, help="GeoTIFF to crop real-terrain scenarios from")
+    parser.add_argument("--output", default="bench_output.json")
+    parser.add_argument("--compare", help="earlier output file to compare against")
+    parser.add_argument("--sparse", action="store_true",
+                        help="also run the SciPy sparse-graph backend and check it against find_path")
+    args = parser.parse_args()
+    if args.sparse:
+        try:
+            # Imported up front so the first timed query does not pay for it
+            import scipy.sparse.csgraph  # noqa: F401
+        except ImportError:
+            parser.error("--sparse needs SciPy installed")
+
+    scenarios = list(synthetic_scenarios(args.kinds, args.sizes, args.seed))
+    if args.tiff and os.path.exists(args.tiff):
+        scenarios += list(tiff_scenarios(args.tiff, args.sizes))
+    else:
+        print(f"Skipping TIFF scenarios, {args.tiff} not found")
+
+    records = []
+    for name, size, grid in scenarios:
+        began = time.perf_counter()
+        records += run_scenario(name, size, grid, args.queries, args.repeats, args.seed, args.sparse)
+        print(f"{name:<14}{size:>6}  {time.perf_counter() - began:.2f}s")
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "argv": sys.argv[1:],
+        },
+        "results": records,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(records)} results to {args.output}")
+
+    failures = sparse_crossover(records) if args.sparse else []
+
+    if args.compare:
+        compare(records, args.compare)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
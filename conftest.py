@@ -0,0 +1,5 @@
+# conftest.py
+# Placing this file at the repository root also puts the top-level modules on sys.path for tests/
+
+# test_pygame.py opens an interactive window rather than testing anything
+collect_ignore = ["test_pygame.py"]
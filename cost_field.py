@@ -0,0 +1,209 @@
+# cost_field.py
+import heapq
+import logging
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from algorithm import CANCEL_CHECK_INTERVAL, DIRECTIONS, PlanningCancelled
+from grid_path import ElevationProfile, GridPath
+from plan_stats import PlanStats
+
+logger = logging.getLogger(__name__)
+
+
+class CostToGoField:
+    """
+    Cost of the cheapest route from every cell to one goal, with the next step
+    to take from each cell.
+
+    Built by a single Dijkstra search outward from the goal over reversed edges
+    of the Algorithm's edge-cost tensor, so the slope, cliff and uphill/downhill
+    rules are the same as find_path's. Afterwards the path from any start is
+    read off by following next_step, in time proportional to its length.
+    """
+
+    def __init__(self, algorithm, grid, goal):
+        self.algorithm = algorithm
+        self.goal = tuple(goal)
+        self.shape = grid.shape[:2]
+        self.terrain_key = algorithm.terrain_key(grid)
+        self.nodes_expanded = 0
+        self.build_seconds = 0.0
+        self.cost, self.next_step = self._build(grid)
+
+    def _build(self, grid):
+        began = time.perf_counter()
+        algorithm = self.algorithm
+        edge_costs = algorithm.get_edge_costs(grid)
+        width, height = self.shape
+        size = width * height
+        cost_to_go = np.full(size, np.inf)
+        next_step = np.full(size, -1, dtype=np.int64)
+        if not algorithm.in_bounds(self.goal, grid) or algorithm.get_impassable_mask(grid)[self.goal]:
+            return cost_to_go.reshape(self.shape), next_step
+
+        # memoryviews give fast scalar access to the NumPy storage from Python
+        costs = [memoryview(edge_costs[d].reshape(-1)) for d in range(len(DIRECTIONS))]
+        offsets = [dx * height + dy for dx, dy in DIRECTIONS]
+        g = memoryview(cost_to_go)
+        parent = memoryview(next_step)
+        goal_index = self.goal[0] * height + self.goal[1]
+        g[goal_index] = 0.0
+        frontier = [(0.0, goal_index)]
+        expanded = 0
+        cancel = algorithm.cancel_event
+
+        while frontier:
+            current_cost, current = heapq.heappop(frontier)
+            if current_cost > g[current]:
+                continue  # Stale entry
+            expanded += 1
+            if cancel is not None and not expanded % CANCEL_CHECK_INTERVAL and cancel.is_set():
+                raise PlanningCancelled()
+
+            # Relax every edge that leads into current: from current - offset in direction d
+            for d in range(len(offsets)):
+                previous = current - offsets[d]
+                if previous < 0 or previous >= size:
+                    continue
+                movement_cost = costs[d][previous]
+                if movement_cost == np.inf:
+                    continue
+                new_cost = current_cost + movement_cost
+                if new_cost < g[previous]:
+                    g[previous] = new_cost
+                    parent[previous] = current
+                    heapq.heappush(frontier, (new_cost, previous))
+
+        self.nodes_expanded = expanded
+        self.build_seconds = time.perf_counter() - began
+        return cost_to_go.reshape(self.shape), next_step
+
+    def cost_to_go(self, cell):
+        """Cost of the cheapest route from cell to the goal (inf when unreachable)"""
+        return float(self.cost[cell[0], cell[1]])
+
+    def path_from(self, start):
+        """Cheapest path from start to the goal as a GridPath, or None if there is none"""
+        start = tuple(start)
+        if not (0 <= start[0] < self.shape[0] and 0 <= start[1] < self.shape[1]):
+            return None
+        if self.cost[start] == np.inf:
+            return None
+
+        height = self.shape[1]
+        step = memoryview(self.next_step)
+        current = start[0] * height + start[1]
+        indices = [current]
+        while step[current] != -1:
+            current = step[current]
+            indices.append(current)
+        return GridPath.from_indices(indices, height)
+
+
+class CostFieldCache:
+    """
+    Front end for many starts planning to the same goal.
+
+    Queries go to fallback (a PathCache or the Algorithm) until a goal has been
+    asked for build_after times on the same terrain; then a CostToGoField is built
+    for it and every further query to that goal is answered by descending the
+    field, with no search. Fields are keyed on (goal, terrain key), so any terrain
+    edit or cost-model change retires them, and at most max_fields are kept in LRU
+    order. Building a field searches the whole grid once, which costs more than a
+    single A* query but is repaid after a few replans or rovers. Grids with more
+    than max_cells cells never get a field, since that search would stall the
+    planner; their queries always go to fallback. Demand is tracked for at most
+    max_tracked goals, least recently asked for dropped first.
+    """
+
+    def __init__(self, algorithm, fallback=None, max_fields=4, build_after=2, max_cells=512 * 512,
+                 max_tracked=256):
+        self.algorithm = algorithm
+        self.fallback = fallback if fallback is not None else algorithm
+        self.max_fields = max_fields
+        self.build_after = build_after
+        self.max_cells = max_cells
+        self.max_tracked = max_tracked
+        self._fields = OrderedDict()  # (goal, terrain key) -> CostToGoField
+        self._requests = OrderedDict()  # goal -> (terrain key, queries seen on it without a field), LRU
+        self.hits = 0
+        self.builds = 0
+
+    def clear(self):
+        self._fields.clear()
+        self._requests.clear()
+
+    def get_field(self, goal, grid, build=True):
+        """The cached field for goal on grid; built if build is set, otherwise None when absent"""
+        goal = tuple(goal)
+        key = (goal, self.algorithm.terrain_key(grid))
+        field = self._fields.get(key)
+        if field is not None:
+            self._fields.move_to_end(key)
+            return field
+        if not build:
+            return None
+
+        field = CostToGoField(self.algorithm, grid, goal)
+        logger.debug("Built cost-to-go field for %s in %.3fs (%d cells)", goal, field.build_seconds,
+                     field.nodes_expanded)
+        self.builds += 1
+        self._fields[key] = field
+        self._requests.pop(goal, None)
+        while len(self._fields) > self.max_fields:
+            self._fields.popitem(last=False)
+        return field
+
+    def find_path(self, start, goal, grid):
+        start, goal = tuple(start), tuple(goal)
+        if getattr(grid, "is_tiled", False) or grid.shape[0] * grid.shape[1] > self.max_cells:
+            # Fields cover a whole dense grid; tiled and oversized terrain is searched per query
+            return self.fallback.find_path(start, goal, grid)
+
+        terrain = self.algorithm.terrain_key(grid)
+        if (goal, terrain) not in self._fields:
+            seen_terrain, count = self._requests.pop(goal, (terrain, 0))
+            count = count + 1 if seen_terrain == terrain else 1
+            self._requests[goal] = (terrain, count)
+            while len(self._requests) > self.max_tracked:
+                self._requests.popitem(last=False)
+            if count < self.build_after:
+                return self.fallback.find_path(start, goal, grid)
+
+        stats = PlanStats(start, goal, self.algorithm.profile_hook)
+        self.algorithm.last_stats = stats
+        began = time.perf_counter()
+        path = self._descend(start, goal, grid, stats)
+        stats.path_length = len(path) if path else 0
+        stats.total_seconds = time.perf_counter() - began
+        return path
+
+    def _descend(self, start, goal, grid, stats):
+        with stats.phase("terrain"):
+            field = self.get_field(goal, grid)
+            impassable = self.algorithm.get_impassable_mask(grid)
+        self.hits += 1
+        if not (self.algorithm.in_bounds(start, grid) and self.algorithm.in_bounds(goal, grid)):
+            stats.outcome = "out_of_bounds"
+            return None
+        if impassable[start] or impassable[goal]:
+            stats.outcome = "impassable"
+            return None
+
+        # A straight line can cut corners the 4-connected field cannot, as in find_path
+        with stats.phase("direct_path"):
+            path = self.algorithm.find_direct_path(start, goal, grid)
+        if path:
+            stats.outcome = "direct"
+            return path
+        with stats.phase("reconstruction"):
+            path = field.path_from(start)
+        if path is None:
+            stats.outcome = "no_path"
+            return None
+        stats.outcome = "cost_field"
+        self.algorithm.elevation_profile = ElevationProfile.from_grid(path, grid)
+        return path
@@ -0,0 +1,170 @@
+# grid_path.py
+from collections.abc import Sequence
+
+import numpy as np
+
+
+class GridPath(Sequence):
+    """
+    Immutable path of grid cells stored as one (n, 2) int32 array of (x, y) rows.
+
+    Behaves like the list of (x, y) tuples it replaces: len(), indexing (cells come
+    back as tuples of ints), slicing (a GridPath view), iteration, `in`, index()
+    and comparison with any sequence of cells. Vectorized helpers gather
+    elevations and step lengths without building per-cell tuples.
+    """
+
+    __slots__ = ("xy",)
+
+    def __init__(self, xy):
+        self.xy = np.ascontiguousarray(xy, dtype=np.int32).reshape(-1, 2)
+
+    @classmethod
+    def from_cells(cls, cells):
+        """GridPath from any sequence of (x, y) cells; GridPaths are returned as-is"""
+        if isinstance(cells, GridPath):
+            return cells
+        return cls(np.array(cells, dtype=np.int32).reshape(-1, 2))
+
+    @classmethod
+    def from_indices(cls, indices, height):
+        """GridPath from flat cell indices x * height + y"""
+        x, y = np.divmod(np.asarray(indices, dtype=np.int64), height)
+        return cls(np.stack((x, y), axis=1))
+
+    @property
+    def xs(self):
+        return self.xy[:, 0]
+
+    @property
+    def ys(self):
+        return self.xy[:, 1]
+
+    def __len__(self):
+        return len(self.xy)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return GridPath(self.xy[i])
+        x, y = self.xy[i]
+        return (int(x), int(y))
+
+    def __iter__(self):
+        return map(tuple, self.xy.tolist())
+
+    def find(self, cell):
+        """Index of the first occurrence of cell, or -1"""
+        matches = np.flatnonzero((self.xy[:, 0] == cell[0]) & (self.xy[:, 1] == cell[1]))
+        return int(matches[0]) if len(matches) else -1
+
+    def index(self, cell, start=0, stop=None):
+        i = self[start:stop].find(cell)
+        if i < 0:
+            raise ValueError(f"{cell} is not on the path")
+        return i + start
+
+    def __contains__(self, cell):
+        return self.find(cell) >= 0
+
+    def __eq__(self, other):
+        if isinstance(other, GridPath):
+            return np.array_equal(self.xy, other.xy)
+        if isinstance(other, Sequence):
+            return len(other) == len(self) and (len(self) == 0 or np.array_equal(self.xy, np.asarray(other)))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __array__(self, dtype=None, copy=None):
+        return self.xy if dtype is None else self.xy.astype(dtype)
+
+    def __repr__(self):
+        if len(self) > 6:
+            return f"GridPath({self.tolist()[:3]} ... {self.tolist()[-2:]}, length={len(self)})"
+        return f"GridPath({self.tolist()})"
+
+    def tolist(self):
+        return list(self)
+
+    def shifted(self, dx, dy):
+        """The same path translated by (dx, dy), e.g. from window to global coordinates"""
+        return GridPath(self.xy + np.array((dx, dy), dtype=np.int32))
+
+    def elevations(self, grid):
+        """Elevation of every cell, gathered in one indexing operation"""
+        return np.asarray(grid[self.xs, self.ys, 1], dtype=np.float64)
+
+    def step_lengths(self):
+        """Euclidean length of each step, shape (n - 1,)"""
+        return np.hypot(*np.diff(self.xy, axis=0).T.astype(np.float64))
+
+
+class ElevationProfile(Sequence):
+    """
+    Elevation along a GridPath, with cumulative distance and per-step slope
+    computed in vectorized form. Items are (cell, elevation) pairs, like the
+    list of tuples it replaces. Screen geometry for draw_elevation_profile is
+    cached per draw rectangle, so redrawing an unchanged profile is cheap.
+    """
+
+    def __init__(self, path, elevations):
+        self.path = GridPath.from_cells(path)
+        self.elevations = np.asarray(elevations, dtype=np.float64)
+        self._distances = None
+        self._slopes = None
+        self._geometry = {}
+
+    @classmethod
+    def from_grid(cls, path, grid):
+        path = GridPath.from_cells(path)
+        return cls(path, path.elevations(grid))
+
+    @property
+    def distances(self):
+        """Distance travelled from the first cell to each cell"""
+        if self._distances is None:
+            self._distances = np.concatenate(([0.0], np.cumsum(self.path.step_lengths())))
+        return self._distances
+
+    @property
+    def slopes(self):
+        """Slope in degrees of each step, shape (n - 1,), matching Algorithm.get_slope"""
+        if self._slopes is None:
+            self._slopes = np.degrees(np.arctan2(np.abs(np.diff(self.elevations)), self.path.step_lengths()))
+        return self._slopes
+
+    def __len__(self):
+        return len(self.elevations)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return ElevationProfile(self.path[i], self.elevations[i])
+        return self.path[i], float(self.elevations[i])
+
+    def shifted(self, dx, dy):
+        return ElevationProfile(self.path.shifted(dx, dy), self.elevations)
+
+    def geometry(self, x, y, width, height, steep_slope):
+        """
+        (polyline points, steep-step markers) in screen pixels for a profile drawn
+        in the rectangle (x, y, width, height). Markers sit at the midpoints of steps
+        steeper than steep_slope. Computed once per rectangle and threshold.
+        """
+        key = (x, y, width, height, steep_slope)
+        cached = self._geometry.get(key)
+        if cached is not None:
+            return cached
+
+        n = len(self)
+        low, high = self.elevations.min(), self.elevations.max()
+        px = (x + np.arange(n) / max(n - 1, 1) * width).astype(int)
+        py = (y + height - (self.elevations - low) / ((high - low) or 1) * height).astype(int)
+        points = list(zip(px.tolist(), py.tolist()))
+
+        steep = np.flatnonzero(self.slopes > steep_slope)
+        mid_x = (px[steep] + px[steep + 1]) // 2
+        mid_y = (py[steep] + py[steep + 1]) // 2
+        markers = list(zip(mid_x.tolist(), mid_y.tolist()))
+
+        self._geometry[key] = (points, markers)
+        return points, markers
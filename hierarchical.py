@@ -0,0 +1,350 @@
+# hierarchical.py
+import heapq
+
+import numpy as np
+
+from algorithm import DIRECTIONS
+from grid_path import GridPath
+
+INF = float("inf")
+EAST = DIRECTIONS.index((1, 0))
+WEST = DIRECTIONS.index((-1, 0))
+SOUTH = DIRECTIONS.index((0, 1))
+NORTH = DIRECTIONS.index((0, -1))
+
+
+def _cluster_dijkstra(graph, source, reverse=False, targets=None):
+    """
+    Dijkstra over a local cluster graph from _local_graph, with flat indices x * h + y.
+    With reverse=True the distances are costs of reaching source rather than
+    leaving it. Stops early once every index in targets is settled.
+    """
+    flat, offsets, size = graph
+    dist = [INF] * size
+    parent = [-1] * size
+    dist[source] = 0.0
+    frontier = [(0.0, source)]
+    remaining = set(targets) if targets is not None else None
+
+    while frontier:
+        current_cost, current = heapq.heappop(frontier)
+        if current_cost > dist[current]:
+            continue
+        if remaining is not None:
+            remaining.discard(current)
+            if not remaining:
+                break
+        for d in range(len(offsets)):
+            if reverse:
+                # Predecessor that moves into current along direction d
+                other = current - offsets[d]
+                if not 0 <= other < size:
+                    continue
+                movement_cost = flat[d][other]
+            else:
+                movement_cost = flat[d][current]
+                other = current + offsets[d]
+            if movement_cost == INF:
+                continue
+            new_cost = current_cost + movement_cost
+            if new_cost < dist[other]:
+                dist[other] = new_cost
+                parent[other] = current
+                heapq.heappush(frontier, (new_cost, other))
+    return dist, parent
+
+
+class HierarchicalPlanner:
+    """
+    HPA* planner: the grid is split into square clusters connected by entrance
+    cells on their shared borders.
+
+    Entrances are found with vectorized checks on the Algorithm's edge costs, so
+    the same slope, cliff and uphill/downhill rules apply. Intra-cluster costs
+    between entrances are computed lazily, the first time the abstract search
+    enters a cluster, and cached until the cluster's terrain changes. Long queries
+    are answered on the abstract graph and only the legs that are needed get
+    refined into cells. Paths are near-optimal rather than optimal.
+    """
+
+    def __init__(self, algorithm, cluster_size=32, max_entrance_width=6):
+        self.algorithm = algorithm
+        self.cluster_size = cluster_size
+        self.max_entrance_width = max_entrance_width  # Wider openings get two transitions
+        self.grid = None
+        self._terrain_key = None
+        self._edge_costs = None
+        self._entrances = {}  # (cluster, side) -> list of (cell, cell) pairs across the border
+        self._inter = {}  # cell -> {cell in neighboring cluster: cost}
+        self._intra = {}  # cluster -> {cell: {cell: cost}}, filled lazily
+        self.nodes_expanded = 0
+
+    def _cluster_of(self, pos):
+        return (pos[0] // self.cluster_size, pos[1] // self.cluster_size)
+
+    def _cluster_bounds(self, cluster):
+        width, height = self._edge_costs.shape[1], self._edge_costs.shape[2]
+        x0, y0 = cluster[0] * self.cluster_size, cluster[1] * self.cluster_size
+        return x0, y0, min(width, x0 + self.cluster_size), min(height, y0 + self.cluster_size)
+
+    def _cluster_count(self):
+        width, height = self._edge_costs.shape[1], self._edge_costs.shape[2]
+        return -(-width // self.cluster_size), -(-height // self.cluster_size)
+
+    def build(self, grid):
+        """Find every cluster entrance; intra-cluster costs are filled in on demand"""
+        self.grid = grid
+        self._edge_costs = self.algorithm.get_edge_costs(grid)
+        self._terrain_key = self.algorithm.terrain_key(grid)
+        self._entrances.clear()
+        self._inter.clear()
+        self._intra.clear()
+
+        clusters_x, clusters_y = self._cluster_count()
+        for cx in range(clusters_x):
+            for cy in range(clusters_y):
+                for side in ("east", "south"):
+                    self._build_border((cx, cy), side)
+
+    def _build_border(self, cluster, side):
+        """(Re)compute the entrances between cluster and its east or south neighbor"""
+        self._remove_border(cluster, side)
+        clusters_x, clusters_y = self._cluster_count()
+        x0, y0, x1, y1 = self._cluster_bounds(cluster)
+        costs = self._edge_costs
+        blocked = self.algorithm.get_blocked_mask(self.grid)
+
+        if side == "east":
+            if cluster[0] + 1 >= clusters_x:
+                return
+            forward, backward = costs[EAST, x1 - 1, y0:y1], costs[WEST, x1, y0:y1]
+            inside, outside = blocked[x1 - 1, y0:y1], blocked[x1, y0:y1]
+            cells = [((x1 - 1, y), (x1, y)) for y in range(y0, y1)]
+        else:
+            if cluster[1] + 1 >= clusters_y:
+                return
+            forward, backward = costs[SOUTH, x0:x1, y1 - 1], costs[NORTH, x0:x1, y1]
+            inside, outside = blocked[x0:x1, y1 - 1], blocked[x0:x1, y1]
+            cells = [((x, y1 - 1), (x, y1)) for x in range(x0, x1)]
+
+        # Edges leaving a blocked cell are finite, so a pair only counts as crossable
+        # when both cells are open and the move is allowed both ways
+        open_cells = ~inside & ~outside & np.isfinite(forward) & np.isfinite(backward)
+        # Contiguous runs of crossable border cells
+        edges = np.diff(np.concatenate(([0], open_cells.astype(np.int8), [0])))
+        starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+        pairs = []
+        for run_start, run_end in zip(starts.tolist(), ends.tolist()):
+            if run_end - run_start <= self.max_entrance_width:
+                picks = {(run_start + run_end - 1) // 2}
+            else:
+                picks = {run_start, run_end - 1}
+            for i in sorted(picks):
+                a, b = cells[i]
+                pairs.append((a, b))
+                self._inter.setdefault(a, {})[b] = float(forward[i])
+                self._inter.setdefault(b, {})[a] = float(backward[i])
+        self._entrances[(cluster, side)] = pairs
+
+    def _remove_border(self, cluster, side):
+        for a, b in self._entrances.pop((cluster, side), ()):
+            for u, v in ((a, b), (b, a)):
+                out = self._inter.get(u)
+                if out is not None:
+                    out.pop(v, None)
+                    if not out:
+                        del self._inter[u]
+
+    def _cluster_nodes(self, cluster):
+        """Entrance cells that lie inside cluster"""
+        cx, cy = cluster
+        nodes = set()
+        for key in ((cluster, "east"), (cluster, "south"), ((cx - 1, cy), "east"), ((cx, cy - 1), "south")):
+            for a, b in self._entrances.get(key, ()):
+                for cell in (a, b):
+                    if self._cluster_of(cell) == cluster:
+                        nodes.add(cell)
+        return nodes
+
+    def _local_graph(self, cluster):
+        """
+        Edge costs restricted to one cluster as flat Python lists, with edges leaving
+        the cluster set to infinity. Returns the graph plus the cluster's origin and height.
+        """
+        x0, y0, x1, y1 = self._cluster_bounds(cluster)
+        local = self._edge_costs[:, x0:x1, y0:y1].copy()
+        for d, (dx, dy) in enumerate(DIRECTIONS):
+            if dx == 1:
+                local[d, -1, :] = INF
+            elif dx == -1:
+                local[d, 0, :] = INF
+            if dy == 1:
+                local[d, :, -1] = INF
+            elif dy == -1:
+                local[d, :, 0] = INF
+        
+        height = y1 - y0
+        flat = [local[d].ravel().tolist() for d in range(len(DIRECTIONS))]
+        offsets = [dx * height + dy for dx, dy in DIRECTIONS]
+        return (flat, offsets, (x1 - x0) * height), x0, y0, height
+
+    def _intra_edges(self, cluster):
+        edges = self._intra.get(cluster)
+        if edges is not None:
+            return edges
+
+        graph, x0, y0, height = self._local_graph(cluster)
+        nodes = self._cluster_nodes(cluster)
+        index = {node: (node[0] - x0) * height + node[1] - y0 for node in nodes}
+        edges = {}
+        for node in nodes:
+            dist, _ = _cluster_dijkstra(graph, index[node], targets=index.values())
+            edges[node] = {other: dist[i] for other, i in index.items()
+                           if other != node and dist[i] != INF}
+        self._intra[cluster] = edges
+        return edges
+
+    def update_cells(self, grid, cells):
+        """Rebuild only the clusters and borders around cells that were edited in place"""
+        if grid is not self.grid or self._terrain_key != self.algorithm.terrain_key(grid):
+            # Our abstraction is out of date anyway; the Algorithm caches may still be patchable
+            self.algorithm.update_terrain_cells(grid, cells)
+            self.build(grid)
+            return
+
+        changed = self.algorithm.update_terrain_cells(grid, cells)
+        if changed is None:
+            self.build(grid)
+            return
+        self._edge_costs = self.algorithm.get_edge_costs(grid)
+        self._terrain_key = self.algorithm.terrain_key(grid)
+
+        # Edge costs changed for sources inside the box, whose targets reach one cell further
+        x0, y0, x1, y1 = changed
+        clusters_x, clusters_y = self._cluster_count()
+        cx0, cy0 = self._cluster_of((max(0, x0 - 1), max(0, y0 - 1)))
+        cx1, cy1 = self._cluster_of((x1, y1))
+        affected = {(cx, cy)
+                    for cx in range(cx0, min(cx1, clusters_x - 1) + 1)
+                    for cy in range(cy0, min(cy1, clusters_y - 1) + 1)}
+
+        stale = set(affected)
+        for cx, cy in affected:
+            for border in (((cx, cy), "east"), ((cx, cy), "south"),
+                           ((cx - 1, cy), "east"), ((cx, cy - 1), "south")):
+                cluster, side = border
+                if 0 <= cluster[0] < clusters_x and 0 <= cluster[1] < clusters_y:
+                    self._build_border(cluster, side)
+                    # Both clusters on a rebuilt border may have gained or lost entrances
+                    stale.add(cluster)
+                    stale.add((cluster[0] + 1, cluster[1]) if side == "east" else (cluster[0], cluster[1] + 1))
+        for cluster in stale:
+            self._intra.pop(cluster, None)
+
+    def find_abstract_path(self, start, goal, grid):
+        """Node sequence start, entrances..., goal through the abstract graph, or None"""
+        if grid is not self.grid or self._terrain_key != self.algorithm.terrain_key(grid):
+            self.build(grid)
+        start, goal = tuple(start), tuple(goal)
+        impassable = self.algorithm.get_impassable_mask(grid)
+        if not (self.algorithm.in_bounds(start, grid) and self.algorithm.in_bounds(goal, grid)):
+            return None
+        if impassable[start] or impassable[goal]:
+            return None
+        if start == goal:
+            return [start]
+
+        # Temporary edges from the start into its cluster and from the goal's cluster to the goal
+        start_cluster, goal_cluster = self._cluster_of(start), self._cluster_of(goal)
+        targets = self._cluster_nodes(start_cluster)
+        if start_cluster == goal_cluster:
+            targets.add(goal)
+        graph, x0, y0, height = self._local_graph(start_cluster)
+        dist, _ = _cluster_dijkstra(graph, (start[0] - x0) * height + start[1] - y0,
+                                    targets=[(n[0] - x0) * height + n[1] - y0 for n in targets])
+        start_edges = {}
+        for node in targets:
+            cost = dist[(node[0] - x0) * height + node[1] - y0]
+            if cost != INF and node != start:
+                start_edges[node] = cost
+
+        sources = self._cluster_nodes(goal_cluster)
+        graph, x0, y0, height = self._local_graph(goal_cluster)
+        dist, _ = _cluster_dijkstra(graph, (goal[0] - x0) * height + goal[1] - y0, reverse=True,
+                                    targets=[(n[0] - x0) * height + n[1] - y0 for n in sources])
+        goal_edges = {}
+        for node in sources:
+            cost = dist[(node[0] - x0) * height + node[1] - y0]
+            if cost != INF and node != goal:
+                goal_edges[node] = cost
+
+        def neighbors(node):
+            if node == start:
+                # start_edges stand in for its intra-cluster edges; an entrance start
+                # still crosses its own border
+                yield from start_edges.items()
+                yield from self._inter.get(node, {}).items()
+                return
+            yield from self._inter.get(node, {}).items()
+            yield from self._intra_edges(self._cluster_of(node)).get(node, {}).items()
+            if node in goal_edges:
+                yield goal, goal_edges[node]
+
+        # A* on the abstract graph
+        self.nodes_expanded = 0
+        frontier = [(0.0, start)]
+        came_from = {start: None}
+        cost_so_far = {start: 0.0}
+        while frontier:
+            priority, current = heapq.heappop(frontier)
+            if current == goal:
+                break
+            if priority > cost_so_far[current] + self.algorithm.heuristic(current, goal, grid, "cost_scaled"):
+                continue
+            self.nodes_expanded += 1
+            for next_node, movement_cost in neighbors(current):
+                new_cost = cost_so_far[current] + movement_cost
+                if next_node not in cost_so_far or new_cost < cost_so_far[next_node]:
+                    cost_so_far[next_node] = new_cost
+                    came_from[next_node] = current
+                    priority = new_cost + self.algorithm.heuristic(next_node, goal, grid, "cost_scaled")
+                    heapq.heappush(frontier, (priority, next_node))
+
+        if goal not in came_from:
+            return None
+        path = []
+        current = goal
+        while current is not None:
+            path.append(current)
+            current = came_from[current]
+        path.reverse()
+        return path
+
+    def refine_legs(self, abstract_path):
+        """Yield the cell path of each abstract edge, one leg at a time"""
+        for a, b in zip(abstract_path, abstract_path[1:]):
+            if self._cluster_of(a) != self._cluster_of(b):
+                # Entrance pair: neighboring cells across a border
+                yield [a, b]
+                continue
+            graph, x0, y0, height = self._local_graph(self._cluster_of(a))
+            target = (b[0] - x0) * height + b[1] - y0
+            _, parent = _cluster_dijkstra(graph, (a[0] - x0) * height + a[1] - y0, targets=(target,))
+            leg = []
+            current = target
+            while current != -1:
+                leg.append((current // height + x0, current % height + y0))
+                current = parent[current]
+            leg.reverse()
+            yield leg
+
+    def find_path(self, start, goal, grid):
+        """Full cell path from start to goal, refining every abstract leg"""
+        abstract_path = self.find_abstract_path(start, goal, grid)
+        if abstract_path is None:
+            return None
+        path = [tuple(start)]
+        for leg in self.refine_legs(abstract_path):
+            path.extend(leg[1:])
+        return GridPath.from_cells(path)
@@ -1,18 +1,20 @@
+import logging
 import pygame
 from robot_class import Robot
-from PIL import Image
-import rasterio
-import numpy as np
+from terrain_cache import load_terrain
+from terrain_provider import TiledTerrainProvider
+from terrain_overlay import TerrainOverlay
+from render import FrameRenderer, RouteLayer, box_surface, text_cache
 
-pygame.init()
-with rasterio.open("South_Clear_Creek_BareEarth_Hillshade_1m_chunk_8192_0.tiff") as src:
-    data = src.read(1)
-    with open("shade.txt", "w") as f:
-        for row in data:
-            f.write(" ".join(map(str, row)) + "\n")
+TERRAIN_TIFF = "South_Clear_Creek_BareEarth_Hillshade_1m_chunk_8192_0.tiff"
 
-image = Image.open("South_Clear_Creek_BareEarth_Hillshade_1m_chunk_8192_0.tiff")
-width, height = image.size
+logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+pygame.init()
+# Memory-mapped copy of the raster band, converted once and reused on later launches
+terrain = load_terrain(TERRAIN_TIFF)
+# Tile streaming for planning, so rasters larger than RAM never need a full read
+terrain_tiles = TiledTerrainProvider(TERRAIN_TIFF, tile_size=512, memory_budget=256 * 1024 * 1024)
+width, height = terrain_tiles.width, terrain_tiles.height
 
 screen = pygame.display.set_mode((512 , 512))
 clock = pygame.time.Clock()
@@ -22,45 +24,43 @@ screen.blit(imp, (0, 0))
 
 # Create robot and load terrain data
 bot = Robot(2, width=10, height=10)
-bot.load_terrain_data("shade.txt")
-
-# Add font for displaying current mode
-font = pygame.font.Font(None, 36)
-small_font = pygame.font.Font(None, 24)
+bot.load_terrain_data(terrain)
+# Plan on the background worker so a slow search never stalls the frame loop
+bot.async_planning = True
 
-# Create a heatmap visualization overlay (optional)
-def create_terrain_overlay(terrain_data, alpha=128):
-    max_value = np.max(terrain_data)
-    min_value = np.min(terrain_data)
-    
-    h, w = terrain_data.shape
-    overlay = pygame.Surface((w, h), pygame.SRCALPHA)
-    
-    for y in range(h):
-        for x in range(w):
-            # Normalize to 0-255 range
-            value = terrain_data[y, x]
-            normalized = int(255 * (value - min_value) / (max_value - min_value))
-            
-            # Higher values (better paths) are brighter green
-            overlay.set_at((x, y), (0, normalized, 0, alpha))
-    
-    return pygame.transform.scale(overlay, (width, height))
+# Only changed screen areas are redrawn and pushed to the display each frame
+renderer = FrameRenderer(screen, imp)
+route_layer = RouteLayer(line_width=2, dot_radius=3)
+robot_box = None
+shown_overlay = None
 
-# Create overlay (comment out if not needed)
-# overlay = create_terrain_overlay(bot.terrain_data, alpha=50)
+# Terrain heatmap overlay, rebuilt only when the terrain or the view changes
+terrain_overlay = TerrainOverlay(alpha=50)
 camera = pygame.Rect(0,0, width, height)
 # For toggling overlay
 show_overlay = False
 show_help = True
 position = (500, 200)
+requested_position = None
 running = True
 panning = False
 pan_start = (0, 0)
+
+
+def show_route(path):
+    """Route to position from find_path_async, delivered by poll_plan on this thread"""
+    bot.path = list(path) if path else []
+
+
 while running:
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             running = False
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_o:
+                show_overlay = not show_overlay
+            elif event.key == pygame.K_h:
+                show_help = not show_help
         elif event.type == pygame.MOUSEBUTTONDOWN:
             panning = True
             pan_start = event.pos
@@ -78,13 +78,24 @@ while running:
 
 
         
-    bot.find_path(position)
-    screen.blit(imp, (0, 0))
-    
-    # Show terrain overlay if enabled
+    # Request a route only when the target changes; poll_plan() hands the result to show_route
+    if position != requested_position:
+        bot.find_path_async(position, terrain_tiles, callback=show_route)
+        requested_position = position
+    bot.poll_plan()
+    # Show terrain overlay if enabled; the background is only recomposed when it changes.
+    # The overlay is keyed on its own elevation array, which planning never edits
+    # (the planner's terrain_version moves with every tiled window it searches)
+    overlay = None
     if show_overlay and hasattr(bot, 'terrain_data') and bot.terrain_data is not None:
-        overlay = create_terrain_overlay(bot.terrain_data, alpha=50)
-        screen.blit(overlay, (0, 0))
+        overlay = terrain_overlay.get_surface(bot.terrain_data, screen.get_size(), camera)
+    if overlay is not shown_overlay:
+        background = imp
+        if overlay is not None:
+            background = imp.copy()
+            background.blit(overlay, (0, 0))
+        renderer.set_background(background)
+        shown_overlay = overlay
     
     try:
         if bot.target:
@@ -92,20 +103,19 @@ while running:
     except ValueError:
         bot.path = []
         
-    # Draw route if there are route points
+    # Draw route if there are route points, from a surface rebuilt only when the route changes
     if len(bot.route_points) > 1:
-        pygame.draw.lines(screen, (0, 255, 0), False, bot.route_points, 2)
-        
-        # Draw small circles at waypoints for visibility
-        for point in bot.route_points:
-            pygame.draw.circle(screen, (255, 255, 0), point, 3)
+        route, route_rect = route_layer.render(bot.route_points, (0, 255, 0), (255, 255, 0))
+        renderer.add(route, route_rect.topleft)
     
     # Draw the robot
-    pygame.draw.rect(screen, (255, 0, 0), bot.robot)
+    if robot_box is None or robot_box.get_size() != bot.robot.size:
+        robot_box = box_surface(bot.robot.size, (255, 0, 0))
+    renderer.add(robot_box, bot.robot.topleft)
     
     # Display current movement type and distance threshold
-    text = font.render(f"Mode: {bot.movement_type} (Threshold: {bot.distance_threshold}px)", True, (255, 255, 255))
-    screen.blit(text, (10, 10))
+    text = text_cache.render(f"Mode: {bot.movement_type} (Threshold: {bot.distance_threshold}px)", 36, (255, 255, 255))
+    renderer.add(text, (10, 10))
     
     # Show help text
     if show_help:
@@ -117,10 +127,10 @@ while running:
         ]
         
         for i, line in enumerate(help_text):
-            help_line = small_font.render(line, True, (255, 255, 255))
-            screen.blit(help_line, (10, height - 100 + i*20))
+            renderer.add(text_cache.render(line, 24, (255, 255, 255)), (10, height - 100 + i*20))
     
-    pygame.display.flip()
+    renderer.present()
     clock.tick(60)
 
+bot.close_planner()
 pygame.quit()
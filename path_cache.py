@@ -0,0 +1,98 @@
+# path_cache.py
+from collections import OrderedDict
+
+from grid_path import GridPath
+from plan_stats import PlanStats
+
+
+class PathCache:
+    """
+    Memoizing front end for Algorithm.find_path.
+
+    Results are keyed on (start, goal, terrain key, search settings) and evicted in
+    LRU order once either max_entries or max_cells (total path length) is
+    exceeded. If the start lies on a cached path to the same goal, the
+    remaining part of that path is returned without searching again.
+    Paths are immutable GridPaths, so cached ones are returned without copying.
+    """
+
+    def __init__(self, algorithm, max_entries=64, max_cells=250000):
+        self.algorithm = algorithm
+        self.max_entries = max_entries
+        self.max_cells = max_cells
+        self._entries = OrderedDict()  # key -> (GridPath, ElevationProfile)
+        self._by_goal = {}  # (goal, terrain, settings...) -> set of keys
+        self.total_cells = 0
+        self.hits = 0
+        self.suffix_hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self._entries.clear()
+        self._by_goal.clear()
+        self.total_cells = 0
+
+    def _goal_key(self, goal, grid):
+        # Engines can return different equal-cost (or, with the inconsistent
+        # "visibility" heuristic, different-cost) paths, so results are not shared
+        algorithm = self.algorithm
+        return (tuple(goal), algorithm.terrain_key(grid), algorithm.heuristic_mode, algorithm.search_engine,
+                algorithm.bidirectional)
+
+    def find_path(self, start, goal, grid):
+        start, goal = tuple(start), tuple(goal)
+        goal_key = self._goal_key(goal, grid)
+        key = (start,) + goal_key
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            path, profile = entry
+            self.algorithm.elevation_profile = profile
+            self._record_hit(start, goal, path, "exact")
+            return path
+
+        # Reuse the remainder of any cached path to the same goal that passes through start
+        for other in self._by_goal.get(goal_key, ()):
+            path, profile = self._entries[other]
+            i = -1 if path is None else path.find(start)
+            if i >= 0:
+                self._entries.move_to_end(other)
+                self.suffix_hits += 1
+                self.algorithm.elevation_profile = profile[i:]
+                self._record_hit(start, goal, path[i:], "suffix")
+                return path[i:]
+
+        self.misses += 1
+        path = self.algorithm.find_path(start, goal, grid)
+        return self._store(key, goal_key, path)
+
+    def _record_hit(self, start, goal, path, kind):
+        """Leave a PlanStats for a cache hit where the planner's own stats would be"""
+        stats = PlanStats(start, goal, self.algorithm.profile_hook)
+        stats.outcome = "path_cache" if path is not None else "no_path"
+        stats.path_cache_hit = kind
+        stats.path_length = len(path) if path else 0
+        self.algorithm.last_stats = stats
+
+    def _store(self, key, goal_key, path):
+        """Cache path (None for no path) under key and return it as stored"""
+        if path is None:
+            entry = (None, [])
+        else:
+            path = GridPath.from_cells(path)
+            entry = (path, self.algorithm.elevation_profile)
+        self._entries[key] = entry
+        self._by_goal.setdefault(goal_key, set()).add(key)
+        self.total_cells += max(1, len(entry[0] or ()))
+
+        while self._entries and (len(self._entries) > self.max_entries or self.total_cells > self.max_cells):
+            old_key, old_entry = self._entries.popitem(last=False)
+            self.total_cells -= max(1, len(old_entry[0] or ()))
+            keys = self._by_goal.get(old_key[1:])
+            if keys is not None:
+                keys.discard(old_key)
+                if not keys:
+                    del self._by_goal[old_key[1:]]
+        return path
@@ -0,0 +1,78 @@
+# plan_stats.py
+import time
+
+
+class PlanStats:
+    """
+    What one planning call did: the outcome, per-phase wall times and search counters.
+
+    Phases are "terrain" (impassable mask and edge-cost precompute), "direct_path",
+    "search" and "reconstruction"; a phase that did not run is absent from timings.
+    outcome is one of "direct", "search", "no_path", "out_of_bounds", "impassable",
+    "cancelled", "path_cache" (served by a PathCache without planning) or
+    "cost_field" (read off a CostToGoField without searching).
+    """
+
+    def __init__(self, start=None, goal=None, hook=None):
+        self.start = start
+        self.goal = goal
+        self.outcome = None
+        self.engine = None
+        self.timings = {}
+        self.nodes_expanded = 0
+        self.nodes_pushed = 0
+        self.peak_frontier = 0
+        self.heuristic_calls = 0
+        self.terrain_cache_hits = 0
+        self.terrain_cache_misses = 0
+        self.path_cache_hit = None  # "exact" or "suffix" when served by a PathCache
+        self.path_length = 0
+        self.total_seconds = 0.0
+        # Optional profiling callback, called as hook(phase, seconds, stats)
+        self.hook = hook
+
+    def record(self, phase, seconds):
+        self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+        if self.hook is not None:
+            self.hook(phase, seconds, self)
+
+    def phase(self, name):
+        """Context manager timing the enclosed block as one phase"""
+        return _Phase(self, name)
+
+    def as_dict(self):
+        return {
+            "start": self.start,
+            "goal": self.goal,
+            "outcome": self.outcome,
+            "engine": self.engine,
+            "timings": dict(self.timings),
+            "total_seconds": self.total_seconds,
+            "nodes_expanded": self.nodes_expanded,
+            "nodes_pushed": self.nodes_pushed,
+            "peak_frontier": self.peak_frontier,
+            "heuristic_calls": self.heuristic_calls,
+            "terrain_cache_hits": self.terrain_cache_hits,
+            "terrain_cache_misses": self.terrain_cache_misses,
+            "path_cache_hit": self.path_cache_hit,
+            "path_length": self.path_length,
+        }
+
+    def __repr__(self):
+        timings = ", ".join(f"{name}={seconds * 1000:.2f}ms" for name, seconds in self.timings.items())
+        return (f"PlanStats({self.outcome}, expanded={self.nodes_expanded}, pushed={self.nodes_pushed}, "
+                f"peak_frontier={self.peak_frontier}, {timings})")
+
+
+class _Phase:
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.began = time.perf_counter()
+        return self.stats
+
+    def __exit__(self, *exc):
+        self.stats.record(self.name, time.perf_counter() - self.began)
+        return False
@@ -0,0 +1,146 @@
+# pyramid_planner.py
+import numpy as np
+
+from algorithm import Algorithm
+from terrain import elevation_of
+
+
+def _block_reduce(values, factor, reduce):
+    """Reduce a (W, H) array over factor x factor blocks, padding ragged edges with edge values"""
+    width, height = values.shape
+    coarse_w, coarse_h = -(-width // factor), -(-height // factor)
+    padded = np.pad(values, ((0, coarse_w * factor - width), (0, coarse_h * factor - height)), mode="edge")
+    return reduce(padded.reshape(coarse_w, factor, coarse_h, factor), axis=(1, 3))
+
+
+def _steepest_slope(elevation):
+    """Slope in degrees of the steepest edge from each cell to a 4-connected neighbor"""
+    elevation = np.asarray(elevation, dtype=np.float64)
+    slope_x = np.degrees(np.arctan2(np.abs(np.diff(elevation, axis=0)), 1.0))
+    slope_y = np.degrees(np.arctan2(np.abs(np.diff(elevation, axis=1)), 1.0))
+    steepest = np.zeros(elevation.shape)
+    for view, slopes in ((steepest[:-1, :], slope_x), (steepest[1:, :], slope_x),
+                         (steepest[:, :-1], slope_y), (steepest[:, 1:], slope_y)):
+        np.maximum(view, slopes, out=view)
+    return steepest
+
+
+class PyramidPlanner:
+    """
+    Coarse-to-fine planner over a terrain pyramid.
+
+    Each level downsamples the one below by factor: elevation is the block mean
+    divided by factor, so the Algorithm's per-cell slope rule sees the average
+    gradient across the wider cells. Averaging can flatten a cliff, so each
+    level also keeps a conservative max-slope layer, max_slopes, holding the
+    steepest full-resolution slope inside every coarse cell. A coarse cell is an
+    obstacle when that slope exceeds max_slope or when more than
+    blocked_fraction of the cells it covers are blocked. A query is solved
+    at the coarsest level first; each finer level then searches only a corridor
+    of corridor_radius cells around the path from the level above. When a
+    corridor search fails, that level is searched in full; when a coarse level
+    has no path at all, the next finer level starts without a corridor. The
+    full-resolution level therefore finds a path whenever one exists. Paths
+    are near-optimal; on terrain whose passages are narrower than a coarse
+    cell, such as one-cell mazes, the fallbacks make it slower than plain A*.
+    """
+
+    def __init__(self, algorithm, factor=4, levels=2, corridor_radius=2, blocked_fraction=0.5):
+        self.algorithm = algorithm
+        self.factor = factor
+        self.levels = levels
+        self.corridor_radius = corridor_radius
+        self.blocked_fraction = blocked_fraction
+        self.grids = []  # grids[k] is level k + 1; level 0 is the grid itself
+        self.max_slopes = []  # max_slopes[k] is the steepest full-resolution slope in each cell of grids[k]
+        self._planners = []  # One Algorithm per coarse level, so each keeps its own terrain caches
+        self._terrain_key = None
+        self.nodes_expanded = 0
+        self.last_report = {}
+
+    def _coarse_planner(self):
+        """Algorithm for a coarse level, sharing the fine planner's slope and cost settings"""
+        planner = Algorithm()
+        for name in ("max_slope", "cliff_threshold", "uphill_weight", "downhill_weight", "heuristic_mode"):
+            setattr(planner, name, getattr(self.algorithm, name))
+        return planner
+
+    def build(self, grid):
+        """Build the coarse levels from grid"""
+        self.grids = []
+        self.max_slopes = []
+        self._planners = []
+        blocked = self.algorithm.get_blocked_mask(grid)
+        elevation = elevation_of(grid)
+        max_slope = _steepest_slope(elevation)
+        for _ in range(self.levels):
+            if min(blocked.shape) < 2 * self.factor:
+                break
+            coarse = np.zeros((-(-blocked.shape[0] // self.factor), -(-blocked.shape[1] // self.factor), 2))
+            elevation = _block_reduce(np.asarray(elevation, dtype=np.float64), self.factor, np.mean)
+            max_slope = _block_reduce(max_slope, self.factor, np.max)
+            coarse[..., 1] = elevation / self.factor ** (len(self.grids) + 1)
+            mostly_blocked = _block_reduce(blocked.astype(np.float64), self.factor, np.mean) > self.blocked_fraction
+            coarse[..., 0] = mostly_blocked | (max_slope > self.algorithm.max_slope)
+            planner = self._coarse_planner()
+            self.grids.append(coarse)
+            self.max_slopes.append(max_slope)
+            self._planners.append(planner)
+            blocked = planner.get_blocked_mask(coarse)
+        self._terrain_key = self.algorithm.terrain_key(grid)
+
+    def _corridor(self, path, shape, radius):
+        """Cells of the next finer level, of the given shape, within radius cells of a coarse path"""
+        coarse_shape = (-(-shape[0] // self.factor), -(-shape[1] // self.factor))
+        mask = np.zeros(coarse_shape, dtype=bool)
+        for x, y in path:
+            mask[max(0, x - radius):x + radius + 1, max(0, y - radius):y + radius + 1] = True
+        fine = np.repeat(np.repeat(mask, self.factor, axis=0), self.factor, axis=1)
+        return fine[:shape[0], :shape[1]]
+
+    def find_path(self, start, goal, grid):
+        """Path from start to goal on grid, refined level by level down a corridor"""
+        if self._terrain_key != self.algorithm.terrain_key(grid):
+            self.build(grid)
+        start, goal = tuple(start), tuple(goal)
+        self.nodes_expanded = 0
+        self.last_report = {"levels": [], "corridor_cells": 0, "fallback": False}
+
+        # Short and unobstructed routes never need the pyramid
+        direct_path = self.algorithm.find_direct_path(start, goal, grid)
+        if direct_path:
+            return direct_path
+
+        # Start at the coarsest level where neither endpoint falls in a blocked coarse cell
+        top = 0
+        for level in range(len(self.grids), 0, -1):
+            scale = self.factor ** level
+            blocked = self._planners[level - 1].get_blocked_mask(self.grids[level - 1])
+            if not (blocked[start[0] // scale, start[1] // scale] or blocked[goal[0] // scale, goal[1] // scale]):
+                top = level
+                break
+
+        path = None
+        for level in range(top, -1, -1):
+            scale = self.factor ** level
+            level_start = (start[0] // scale, start[1] // scale)
+            level_goal = (goal[0] // scale, goal[1] // scale)
+            level_grid = grid if level == 0 else self.grids[level - 1]
+            planner = self.algorithm if level == 0 else self._planners[level - 1]
+
+            allowed = None
+            if path is not None:
+                allowed = self._corridor(path, level_grid.shape[:2], self.corridor_radius)
+                if level == 0:
+                    self.last_report["corridor_cells"] = int(allowed.sum())
+            path = planner.find_path(level_start, level_goal, level_grid, allowed=allowed)
+            self.nodes_expanded += planner.last_stats.nodes_expanded
+            self.last_report["levels"].append(planner.last_stats.nodes_expanded)
+
+            if path is None and allowed is not None:
+                # The coarser level ruled out a route that may still exist; search this level in full
+                self.last_report["fallback"] = True
+                path = planner.find_path(level_start, level_goal, level_grid)
+                self.nodes_expanded += planner.last_stats.nodes_expanded
+                self.last_report["levels"][-1] += planner.last_stats.nodes_expanded
+        return path
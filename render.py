@@ -0,0 +1,180 @@
+# render.py
+from collections import OrderedDict
+
+import numpy as np
+import pygame
+
+_fonts = {}
+
+
+def get_font(size, name=None):
+    """Shared pygame Font for (name, size); fonts are created once instead of every frame"""
+    key = (name, size)
+    font = _fonts.get(key)
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = pygame.font.Font(name, size)
+        _fonts[key] = font
+    return font
+
+
+class TextCache:
+    """
+    LRU cache of rendered text surfaces. Text is only rendered again when the
+    string, font or colors change, so HUD values that hold still cost a lookup.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._surfaces = OrderedDict()
+
+    def _remember(self, key, surface):
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def render(self, text, size, color, font_name=None):
+        key = ("text", text, size, color, font_name)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            return surface
+        return self._remember(key, get_font(size, font_name).render(text, True, color))
+
+    def label(self, text, size, color, background, border=None, padding=(4, 2)):
+        """Text on a filled box with an optional 1px border, as one cached surface"""
+        key = ("label", text, size, color, background, border, padding)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            return surface
+
+        text_surface = self.render(text, size, color)
+        width, height = text_surface.get_size()
+        surface = pygame.Surface((width + 2 * padding[0], height + 2 * padding[1]))
+        surface.fill(background)
+        if border is not None:
+            pygame.draw.rect(surface, border, surface.get_rect(), 1)
+        surface.blit(text_surface, padding)
+        return self._remember(key, surface)
+
+
+# Shared by the robot HUD and main.py
+text_cache = TextCache()
+
+
+def box_surface(size, color, border=None):
+    """Filled rectangle with an optional 1px border, for blitting instead of drawing"""
+    surface = pygame.Surface(size)
+    surface.fill(color)
+    if border is not None:
+        pygame.draw.rect(surface, border, surface.get_rect(), 1)
+    return surface
+
+
+class RouteLayer:
+    """
+    A route pre-rendered onto a transparent surface the size of its bounding box.
+    The surface is rebuilt only when a different point list or style is passed;
+    point lists are compared by identity, so pass a new list when the route changes.
+    """
+
+    def __init__(self, line_width=2, dot_radius=2):
+        self.line_width = line_width
+        self.dot_radius = dot_radius
+        self._points = None
+        self._style = None
+        self._surface = None
+        self._rect = None
+
+    def render(self, points, line_color, dot_color=None, scale=1, offset=0):
+        """
+        (surface, screen rect) for the route through points. Each point is mapped
+        to screen pixels as point * scale + offset, so grid paths can be passed as-is.
+        """
+        style = (line_color, dot_color, scale, offset)
+        if points is self._points and style == self._style:
+            return self._surface, self._rect
+
+        pad = max(self.line_width, self.dot_radius) + 1
+        # GridPaths convert to an (n, 2) array without building tuples
+        screen_xy = (np.asarray(points, dtype=np.float64).reshape(-1, 2) * scale + offset).astype(int)
+        (left, top), (right, bottom) = screen_xy.min(axis=0), screen_xy.max(axis=0)
+        rect = pygame.Rect(int(left) - pad, int(top) - pad, int(right - left) + 2 * pad + 1,
+                           int(bottom - top) + 2 * pad + 1)
+        local = (screen_xy - rect.topleft).tolist()
+
+        surface = pygame.Surface(rect.size, pygame.SRCALPHA)
+        if len(local) > 1:
+            pygame.draw.lines(surface, line_color, False, local, self.line_width)
+        if dot_color is not None:
+            for point in local:
+                pygame.draw.circle(surface, dot_color, point, self.dot_radius)
+
+        self._points, self._style = points, style
+        self._surface, self._rect = surface, rect
+        return surface, rect
+
+
+class FrameRenderer:
+    """
+    Retained-mode frame compositor that pushes only changed screen areas.
+
+    Each frame the caller add()s the surfaces to show over a static background.
+    present() compares them with the previous frame by surface identity and
+    position, repaints only the areas that changed (background first, then every
+    item overlapping them, in order) and sends just those rectangles to
+    pygame.display.update. A frame identical to the last one costs no drawing.
+    Use cached surfaces (TextCache, RouteLayer, box_surface) so unchanged items
+    keep their identity.
+    """
+
+    def __init__(self, screen, background):
+        self.screen = screen
+        self.background = background
+        self._items = []
+        self._previous = []
+        self._full_redraw = True
+
+    def set_background(self, background):
+        """Replace the background; the next present() repaints the whole screen"""
+        if background is not self.background:
+            self.background = background
+            self._full_redraw = True
+
+    def add(self, surface, position):
+        rect = surface.get_rect(topleft=(int(position[0]), int(position[1])))
+        self._items.append((surface, rect))
+        return rect
+
+    def present(self):
+        """Draw and push this frame's changes; returns the updated rectangles"""
+        current, self._items = self._items, []
+        previous, self._previous = self._previous, current
+
+        if self._full_redraw:
+            self._full_redraw = False
+            self.screen.blit(self.background, (0, 0))
+            for surface, rect in current:
+                self.screen.blit(surface, rect)
+            pygame.display.flip()
+            return [self.screen.get_rect()]
+
+        shown = {(id(surface), tuple(rect)) for surface, rect in current}
+        was_shown = {(id(surface), tuple(rect)) for surface, rect in previous}
+        dirty = [rect for surface, rect in previous if (id(surface), tuple(rect)) not in shown]
+        dirty += [rect for surface, rect in current if (id(surface), tuple(rect)) not in was_shown]
+        if not dirty:
+            return []
+
+        for area in dirty:
+            self.screen.set_clip(area)
+            self.screen.blit(self.background, area.topleft, area)
+            for surface, rect in current:
+                if rect.colliderect(area):
+                    self.screen.blit(surface, rect)
+        self.screen.set_clip(None)
+        pygame.display.update(dirty)
+        return dirty
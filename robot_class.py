@@ -1,7 +1,19 @@
 # robot_class.py
 import pygame
 import math
-from algorithm import Algorithm
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+import numpy as np
+from algorithm import Algorithm, DStarLite, PlanningCancelled
+from anytime import AnytimeSearch
+from cost_field import CostFieldCache
+from grid_path import GridPath
+from path_cache import PathCache
+from terrain_cache import load_terrain
+from render import RouteLayer, text_cache
+from terrain import elevation_at
 
 class Robot:
     def __init__(self, x, y):
@@ -12,6 +24,11 @@ class Robot:
         self.speed = 2
         self.robot = pygame.Rect(x - 10, y - 10, 20, 20)
         self.algorithm = Algorithm()
+        # Memoized plans, so asking for the same route again does not search again
+        self.path_cache = PathCache(self.algorithm)
+        # Cost-to-go fields for goals replanned to repeatedly, so replans after
+        # deviations are a walk down the field instead of a search
+        self.cost_fields = CostFieldCache(self.algorithm, fallback=self.path_cache)
         self.current_path = []
         self.current_waypoint = 0
         self.has_path = False
@@ -19,6 +36,50 @@ class Robot:
         self.current_target_index = 0
         self.current_elevation = 0
         self.current_slope = 0
+        self.terrain_data = None
+        # D* Lite search tree for the current goal, reused while the goal is unchanged
+        self.incremental_planner = None
+        # Time spent and number of calls in path planning, for throughput reports
+        self.planning_seconds = 0.0
+        self.plans_computed = 0
+        # Background planning: searches run on a single worker thread and finished
+        # plans are applied by poll_plan(), so the caller's loop never blocks
+        self.async_planning = False
+        # Collapse planned staircases into a few straight, slope-checked segments
+        self.smooth_paths = False
+        # Anytime (ARA*) planning: when set, the robot moves off on the first, inflated
+        # solution and spends up to this many seconds per update improving it
+        self.anytime_budget = None
+        self._anytime = None  # (AnytimeSearch, waypoint index) still improving the current path
+        self._anytime_candidate = None  # Search behind the plan being computed, adopted with it
+        self._improved = deque()  # (search, better path) streamed from a background anytime search
+        self.on_plan_ready = None  # Called with each new path (or None) as it is applied
+        self._executor = None
+        # (future, cancel event, on_done, key) of the robot's own latest replan or path improvement,
+        # and separately of the latest find_path_async request, so neither cancels the other
+        self._pending = None
+        self._request = None
+        self._background = []  # Terrain updates queued ahead of a replan
+        # Current path pre-rendered for draw(), rebuilt only when the path changes
+        self._route_layer = RouteLayer(line_width=2, dot_radius=2)
+
+    def load_terrain_data(self, source):
+        """
+        Load terrain elevation as a (rows, cols) array.
+        Accepts an array or memmap (used as-is, no copy), a GeoTIFF path (opened
+        through the terrain cache), a .npy path, or a legacy text file like shade.txt.
+        """
+        if isinstance(source, np.ndarray):
+            data = source
+        elif source.lower().endswith((".tif", ".tiff")):
+            data = load_terrain(source)
+        elif source.lower().endswith(".npy"):
+            data = np.load(source, mmap_mode="r")
+        else:
+            data = np.loadtxt(source)
+
+        self.terrain_data = data
+        return data
 
     def set_waypoints(self, points, grid):
         self.waypoints = points
@@ -35,22 +96,252 @@ class Robot:
             self.recalculate_path_from_current(grid)
 
     def recalculate_path_from_current(self, grid):
-        if self.current_target_index < len(self.waypoints):
-            current_pos = (self.grid_x, self.grid_y)
-            target = self.waypoints[self.current_target_index]
-            
-            new_path = self.algorithm.find_path(current_pos, target, grid)
+        """
+        Replan from the robot's current cell to its current waypoint.
+        With async_planning the search runs in the background; the robot keeps
+        following its current path, or holds position at its end, until
+        poll_plan() applies the result.
+        """
+        start, index = (self.grid_x, self.grid_y), self.current_target_index
+        self._anytime = None
+        if self.async_planning:
+            self._submit(lambda: self._compute_path(grid, start, index), self._apply_path, ("waypoint", index))
+        else:
+            self._apply_path(self._compute_path(grid, start, index))
+
+    def _compute_path(self, grid, current_pos, target_index):
+        """Path to waypoint target_index, or None when there is no path or no waypoint left"""
+        began = time.perf_counter()
+        self._anytime_candidate = None
+        try:
+            if target_index >= len(self.waypoints):
+                return None
+            target = self.waypoints[target_index]
             
-            if new_path:
-                self.current_path = new_path
-                self.current_waypoint = 0
-                self.has_path = True
+            planner = self.incremental_planner
+            if planner is not None and planner.is_current(grid, target):
+                # Same goal and no untracked terrain edits: repair the existing search tree
+                planner.update_start(current_pos)
+                path = planner.plan()
             else:
-                self.has_path = False
+                self.incremental_planner = None
+                if self.anytime_budget is not None and not getattr(grid, "is_tiled", False):
+                    search = AnytimeSearch(self.algorithm, current_pos, target, grid)
+                    # The first solution is always waited for; the inflated heuristic keeps it quick
+                    path = next(search.run(), (None, None))[0]
+                    if not search.done:
+                        self._anytime_candidate = (search, target_index)
+                else:
+                    path = self.cost_fields.find_path(current_pos, target, grid)
+            if self.smooth_paths:
+                path = self.algorithm.smooth_path(path, grid)
+            return path
+        finally:
+            self.planning_seconds += time.perf_counter() - began
+            self.plans_computed += 1
+
+    def _apply_path(self, new_path):
+        # Runs on the caller's thread, so a superseded background plan never gets here
+        self._anytime, self._anytime_candidate = self._anytime_candidate, None
+        self._improved.clear()
+        if new_path:
+            new_path = GridPath.from_cells(new_path)
+            self.current_path = new_path
+            # A background plan can arrive after the robot has moved on, so resume from its cell
+            self.current_waypoint = max(new_path.find((self.grid_x, self.grid_y)), 0)
+            self.has_path = True
         else:
             self.has_path = False
+        if self.on_plan_ready is not None:
+            self.on_plan_ready(new_path)
+
+    def _improve_plan(self):
+        """
+        Keep improving the current path with its anytime search: anytime_budget
+        seconds per update in the caller's thread, or without a budget on the
+        planning worker, which hands each better path over as soon as it is found.
+        """
+        search, index = self._anytime
+        while self._improved:
+            source, path = self._improved.popleft()
+            if source is search:
+                self._apply_improved_path(path, search.grid)
+        if search.done or index != self.current_target_index:
+            if self._pending is None or self._pending[3] != ("improve", index):
+                self._anytime = None
+        elif self.async_planning:
+            if self._pending is None:
+                def hand_over(path):
+                    self._improved.append((search, path))
+                self._submit(lambda: self._anytime_step(search, None, hand_over), lambda path: None,
+                             ("improve", index))
+        else:
+            self._apply_improved_path(self._anytime_step(search, self.anytime_budget), search.grid)
+
+    def _anytime_step(self, search, budget, on_path=None):
+        """Best path the search finds within budget seconds (None if no better one)"""
+        began = time.perf_counter()
+        try:
+            path = None
+            for path, _ in search.run(budget):
+                if self.smooth_paths:
+                    path = self.algorithm.smooth_path(path, search.grid)
+                if on_path is not None:
+                    on_path(path)
+            return path
+        finally:
+            self.planning_seconds += time.perf_counter() - began
+
+    def _route_cost(self, path, grid):
+        """Movement cost of a feasible path, from its elevations alone (no planner caches)"""
+        rise = np.diff(path.elevations(grid))
+        weights = np.where(rise > 0, self.algorithm.uphill_weight, self.algorithm.downhill_weight)
+        return float(np.sum(path.step_lengths() + np.abs(rise) * weights))
+
+    def _apply_improved_path(self, path, grid):
+        """
+        Switch to a better path for the same waypoint. If the robot has already
+        left the start, it retraces its steps to the last cell the two paths share;
+        the switch is only made when that route beats the rest of the current path.
+        """
+        if path is None or not self.has_path:
+            return
+        here = self.current_path.find((self.grid_x, self.grid_y))
+        if here < 0:
+            return
+        for back in range(here, -1, -1):
+            join = path.find(self.current_path[back])
+            if join >= 0:
+                break
+        else:
+            return
+        # Back along the travelled cells to the shared one, then on along the new path
+        route = GridPath(np.concatenate((self.current_path[here:back:-1].xy, path[join:].xy)))
+        if self._route_cost(route, grid) >= self._route_cost(self.current_path[here:], grid):
+            return
+        self.current_path = route
+        self.current_waypoint = 0
+        if self.on_plan_ready is not None:
+            self.on_plan_ready(route)
+
+    def find_path(self, target, grid):
+        """Path from the robot's current cell to target, served from the path cache when possible"""
+        return self.path_cache.find_path((self.grid_x, self.grid_y), target, grid)
+
+    def find_path_async(self, target, grid, callback=None):
+        """
+        Plan from the robot's current cell to target in the background and return a Future.
+        callback(path) runs from poll_plan() on the caller's thread. Asking again for the
+        same route returns the pending request; asking for another one cancels it. The
+        robot's own waypoint replans are tracked separately and are never cancelled by it.
+        """
+        start, target = (self.grid_x, self.grid_y), tuple(target)
+        key = ("find_path", start, target)
+        if self._request is not None and self._request[3] == key:
+            return self._request[0]
+
+        def job():
+            began = time.perf_counter()
+            try:
+                return self.path_cache.find_path(start, target, grid)
+            finally:
+                self.planning_seconds += time.perf_counter() - began
+                self.plans_computed += 1
+        return self._submit(job, callback or (lambda path: None), key, external=True)
+
+    def _get_executor(self):
+        if self._executor is None:
+            # One worker: the planner's caches are not shared between threads
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="planner")
+        return self._executor
+
+    def _submit(self, job, on_done, key, external=False):
+        """
+        Queue job on the planning worker, cancelling the request it supersedes: the
+        previous find_path_async request if external is set, otherwise the robot's
+        previous replan. Jobs run in order on the one worker either way.
+        """
+        self._cancel(external)
+        cancel = threading.Event()
+
+        def run():
+            self.algorithm.cancel_event = cancel
+            try:
+                return job()
+            finally:
+                self.algorithm.cancel_event = None
+
+        future = self._get_executor().submit(run)
+        if external:
+            self._request = (future, cancel, on_done, key)
+        else:
+            self._pending = (future, cancel, on_done, key)
+        return future
+
+    def _cancel(self, external):
+        entry = self._request if external else self._pending
+        if entry is not None:
+            future, cancel, _, _ = entry
+            cancel.set()
+            future.cancel()
+        if external:
+            self._request = None
+        else:
+            self._pending = None
+
+    def cancel_pending_plan(self, requests=True):
+        """
+        Drop the robot's outstanding background replan and, unless requests is False,
+        any find_path_async request; a search in progress stops early
+        """
+        self._cancel(False)
+        if requests:
+            self._cancel(True)
+
+    def poll_plan(self):
+        """Apply a finished background plan. Returns True if one was applied."""
+        # Surface errors from queued terrain updates instead of losing them in the worker
+        for task in [task for task in self._background if task.done()]:
+            self._background.remove(task)
+            task.result()
+        
+        applied = False
+        for external in (False, True):
+            entry = self._request if external else self._pending
+            if entry is None or not entry[0].done():
+                continue
+            future, _, on_done, _ = entry
+            if external:
+                self._request = None
+            else:
+                self._pending = None
+            try:
+                result = future.result()
+            except PlanningCancelled:
+                continue
+            on_done(result)
+            applied = True
+        return applied
+
+    def wait_for_plan(self, timeout=None):
+        """Block until the pending background work finishes, then apply it"""
+        futures = [entry[0] for entry in (self._pending, self._request) if entry is not None]
+        if futures:
+            wait(futures, timeout)
+        return self.poll_plan()
+
+    def close_planner(self):
+        """Cancel outstanding work and stop the planning worker"""
+        self.cancel_pending_plan()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.poll_plan()
 
     def update(self, grid):
+        self.poll_plan()
+        if self._anytime is not None:
+            self._improve_plan()
         if self.has_path and self.current_waypoint < len(self.current_path):
             # Get target position in grid coordinates
             target_grid = self.current_path[self.current_waypoint]
@@ -79,9 +370,13 @@ class Robot:
                 robot_size = 10  # Half of old size to match smaller grid
                 self.robot = pygame.Rect(self.x - robot_size, self.y - robot_size, robot_size*2, robot_size*2)
 
+                # Stream in terrain tiles around the robot as it moves
+                if getattr(grid, "is_tiled", False):
+                    grid.prefetch_around(self.grid_x, self.grid_y)
+
                 # Update elevation
                 if 0 <= self.grid_x < grid.shape[0] and 0 <= self.grid_y < grid.shape[1]:
-                    self.current_elevation = grid[self.grid_x, self.grid_y, 1]
+                    self.current_elevation = elevation_at(grid, self.grid_x, self.grid_y)
                     
                     # Calculate slope if we have a previous point
                     if self.current_waypoint > 0:
@@ -97,61 +392,19 @@ class Robot:
     def draw(self, screen, grid, path_color=(255, 0, 0), robot_color=(0, 0, 255)):
         GRID_SIZE = 20  # Changed from 32 to 20
         
-        # Draw path with brighter color and thicker lines
+        # Path with a dot on every point, blitted from a surface cached per path
         if self.has_path and len(self.current_path) > 1:
-            for i in range(len(self.current_path) - 1):
-                start_pos = (self.current_path[i][0] * GRID_SIZE + GRID_SIZE//2,
-                           self.current_path[i][1] * GRID_SIZE + GRID_SIZE//2)
-                end_pos = (self.current_path[i+1][0] * GRID_SIZE + GRID_SIZE//2,
-                          self.current_path[i+1][1] * GRID_SIZE + GRID_SIZE//2)
-                pygame.draw.line(screen, path_color, start_pos, end_pos, 2)  # Slightly thinner line for smaller grid
-                
-                # Add dots at path points for better visibility
-                pygame.draw.circle(screen, path_color, start_pos, 2)  # Smaller dots
-            
-            # Draw last point
-            last_pos = (self.current_path[-1][0] * GRID_SIZE + GRID_SIZE//2,
-                       self.current_path[-1][1] * GRID_SIZE + GRID_SIZE//2)
-            pygame.draw.circle(screen, path_color, last_pos, 2)  # Smaller dot
+            route, rect = self._route_layer.render(self.current_path, path_color, path_color,
+                                                   scale=GRID_SIZE, offset=GRID_SIZE // 2)
+            screen.blit(route, rect)
 
-        # Draw robot with customizable color
-        pygame.draw.rect(screen, robot_color, self.robot)
-        
-        # Add a border around the robot for better visibility
-        border = self.robot.copy()
-        border.inflate_ip(2, 2)  # Smaller inflation for smaller robot
-        pygame.draw.rect(screen, (0, 0, 0), border, 1)  # Thinner border
-        
-        # Draw debug information with white background for better visibility
-        font = pygame.font.Font(None, 20)  # Smaller font
-        
-        # Create position text
-        pos_text = font.render(f"Pos: ({int(self.x)}, {int(self.y)}) Grid: ({self.grid_x}, {self.grid_y})", True, (0, 0, 0))
-        pos_rect = pos_text.get_rect(topleft=(10, 50))
-        
-        # Create background for position text
-        bg_rect = pos_rect.copy()
-        bg_rect.inflate_ip(8, 4)  # Smaller inflation for smaller text
-        pygame.draw.rect(screen, (255, 255, 255), bg_rect)
-        pygame.draw.rect(screen, (0, 0, 0), bg_rect, 1)
-        
-        # Display position text
-        screen.blit(pos_text, pos_rect)
+        self.draw_without_path(screen, grid, robot_color)
 
         # Display target information if we have a path
         if self.has_path and self.current_waypoint < len(self.current_path):
             target = self.current_path[self.current_waypoint]
-            target_text = font.render(f"Target: {target}", True, (0, 0, 0))
-            target_rect = target_text.get_rect(topleft=(10, 75))
-            
-            # Create background for target text
-            bg_rect = target_rect.copy()
-            bg_rect.inflate_ip(8, 4)  # Smaller inflation for smaller text
-            pygame.draw.rect(screen, (255, 255, 255), bg_rect)
-            pygame.draw.rect(screen, (0, 0, 0), bg_rect, 1)
-            
-            # Display target text
-            screen.blit(target_text, target_rect)
+            label = text_cache.label(f"Target: {target}", 20, (0, 0, 0), (255, 255, 255), (0, 0, 0))
+            screen.blit(label, (6, 73))
             
     def draw_without_path(self, screen, grid, robot_color=(0, 0, 255)):
         """Draw only the robot without drawing the path"""
@@ -163,22 +416,44 @@ class Robot:
         border.inflate_ip(2, 2)  # Smaller inflation for smaller robot
         pygame.draw.rect(screen, (0, 0, 0), border, 1)  # Thinner border
         
-        # Draw debug information with white background for better visibility
-        font = pygame.font.Font(None, 20)  # Smaller font
-        
-        # Create position text
-        pos_text = font.render(f"Pos: ({int(self.x)}, {int(self.y)}) Grid: ({self.grid_x}, {self.grid_y})", True, (0, 0, 0))
-        pos_rect = pos_text.get_rect(topleft=(10, 50))
-        
-        # Create background for position text
-        bg_rect = pos_rect.copy()
-        bg_rect.inflate_ip(8, 4)  # Smaller inflation for smaller text
-        pygame.draw.rect(screen, (255, 255, 255), bg_rect)
-        pygame.draw.rect(screen, (0, 0, 0), bg_rect, 1)
-        
-        # Display position text
-        screen.blit(pos_text, pos_rect)
+        # Position text on a white, bordered background; only re-rendered when it changes
+        label = text_cache.label(f"Pos: ({int(self.x)}, {int(self.y)}) Grid: ({self.grid_x}, {self.grid_y})",
+                                 20, (0, 0, 0), (255, 255, 255), (0, 0, 0))
+        screen.blit(label, (6, 48))
+
+    def handle_obstacle_change(self, grid, changed_cells=None):
+        """
+        Recalculate path when obstacles change.
+        If the edited cells are known, the D* Lite search tree for the current goal
+        is repaired around them instead of replanning from scratch.
+        """
+        start, index = (self.grid_x, self.grid_y), self.current_target_index
+        if self.async_planning:
+            # The planner's caches live on the worker thread: stop the stale search and
+            # queue the terrain update there, ahead of the replan, where it cannot be cancelled.
+            # find_path_async requests are left to finish; their callers asked for them.
+            self.cancel_pending_plan(requests=False)
+            self._background.append(self._get_executor().submit(
+                self._prepare_for_terrain_change, grid, changed_cells, start, index))
+        else:
+            self._prepare_for_terrain_change(grid, changed_cells, start, index)
+        self.recalculate_path_from_current(grid)
 
-    def handle_obstacle_change(self, grid):
-        """Recalculate path when obstacles change"""
-        self.recalculate_path_from_current(grid)
\ No newline at end of file
+    def _prepare_for_terrain_change(self, grid, changed_cells, start, target_index):
+        # D* Lite keeps whole-grid state, so tiled terrain is simply replanned
+        # over fresh windows (the provider's version moves with every edit)
+        tiled = getattr(grid, "is_tiled", False)
+        if changed_cells is None or target_index >= len(self.waypoints) or tiled:
+            # The grid was edited in place, so cached terrain masks are stale
+            self.algorithm.invalidate_terrain()
+            self.incremental_planner = None
+            return
+        
+        target = self.waypoints[target_index]
+        planner = self.incremental_planner
+        if planner is not None and planner.is_current(grid, target):
+            planner.update_cells(changed_cells)
+        else:
+            # Patch the terrain caches first so the new search tree sees the edit
+            self.algorithm.update_terrain_cells(grid, changed_cells)
+            self.incremental_planner = DStarLite(self.algorithm, grid, start, target)
@@ -0,0 +1,141 @@
+# simulation.py
+"""
+Headless simulation runner.
+
+Steps one or more robots along their waypoint routes as fast as possible,
+with no display and no frame cap, and reports throughput: ticks per second,
+planning time versus movement time, and simulated traverse time.
+
+Example:
+    python simulation.py --terrain rolling --size 256 --robots 4 --waypoints 5
+    python simulation.py --terrain terrain.npy --max-ticks 200000
+"""
+import argparse
+import json
+import logging
+import os
+import time
+
+from robot_class import Robot
+from synthetic_terrain import TERRAIN_KINDS, grid_from_elevation, make_terrain, sample_free_cells
+from terrain import Terrain
+
+CELL_SIZE = 20  # Pixels per grid cell, as used by Robot
+TICK_RATE = 60  # Frames per second of the interactive loop, for simulated time
+
+
+def _robot_at(cell):
+    """Robot placed at the center of a grid cell"""
+    return Robot(cell[0] * CELL_SIZE + CELL_SIZE // 2, cell[1] * CELL_SIZE + CELL_SIZE // 2)
+
+
+def run_simulation(routes, grid, max_ticks=1_000_000, tick_rate=TICK_RATE):
+    """
+    Drive one robot per route (a list of grid cells, the first being its start)
+    until every robot has finished or got stuck, or max_ticks is reached.
+    Returns a report dict with overall and per-robot timings.
+    """
+    robots = []
+    for route in routes:
+        robot = _robot_at(route[0])
+        robot.set_waypoints(list(route), grid)
+        robots.append(robot)
+
+    finished_at = [None] * len(robots)
+    update_seconds = 0.0
+    planning_before = sum(robot.planning_seconds for robot in robots)
+    ticks = 0
+    began = time.perf_counter()
+    while ticks < max_ticks:
+        active = [i for i, robot in enumerate(robots) if robot.has_path]
+        if not active:
+            break
+        tick_began = time.perf_counter()
+        for i in active:
+            robots[i].update(grid)
+            if not robots[i].has_path:
+                finished_at[i] = ticks + 1
+        update_seconds += time.perf_counter() - tick_began
+        ticks += 1
+    wall_seconds = time.perf_counter() - began
+
+    # Replans happen inside update(); take them out of the movement share
+    replanning = sum(robot.planning_seconds for robot in robots) - planning_before
+    per_robot = []
+    for robot, route, done in zip(robots, routes, finished_at):
+        reached = robot.current_target_index >= len(robot.waypoints)
+        per_robot.append({
+            "route": [list(cell) for cell in route],
+            "finished": reached,
+            "stuck": not reached and not robot.has_path,
+            "ticks": done,
+            "traverse_seconds": done / tick_rate if done is not None else None,
+            "planning_seconds": robot.planning_seconds,
+            "plans_computed": robot.plans_computed,
+        })
+
+    return {
+        "robots": len(robots),
+        "ticks": ticks,
+        "wall_seconds": wall_seconds,
+        "ticks_per_second": ticks / wall_seconds if wall_seconds else 0.0,
+        "planning_seconds": sum(robot.planning_seconds for robot in robots),
+        "movement_seconds": update_seconds - replanning,
+        "traverse_seconds": ticks / tick_rate,
+        "per_robot": per_robot,
+    }
+
+
+def load_grid(terrain, size, seed):
+    """Synthetic terrain by kind name, or a (rows, cols) elevation raster from a file"""
+    if terrain in TERRAIN_KINDS:
+        return make_terrain(terrain, size, seed=seed)
+    robot = Robot(0, 0)
+    elevation = robot.load_terrain_data(terrain)
+    # Large rasters are cropped to the requested size from the top-left corner
+    return grid_from_elevation(elevation[:size, :size])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run robots headlessly and report throughput")
+    parser.add_argument("--terrain", default="rolling",
+                        help=f"one of {', '.join(TERRAIN_KINDS)}, or a .tif/.npy/.txt elevation file")
+    parser.add_argument("--size", type=int, default=128, help="terrain size in cells (crop size for files)")
+    parser.add_argument("--robots", type=int, default=1)
+    parser.add_argument("--waypoints", type=int, default=4, help="waypoints per robot, including its start")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-ticks", type=int, default=1_000_000)
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--compact", action="store_true",
+                        help="hold the terrain as a Terrain (float32 elevation, packed obstacle bits)")
+    parser.add_argument("--verbose", action="store_true", help="show planner debug logging")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING,
+                        format="%(levelname)s %(name)s: %(message)s")
+
+    grid = load_grid(args.terrain, args.size, args.seed)
+    if args.compact:
+        grid = Terrain.from_grid(grid)
+    robot = Robot(0, 0)
+    cells = sample_free_cells(robot.algorithm, grid, args.robots * args.waypoints, seed=args.seed)
+    routes = [cells[i * args.waypoints:(i + 1) * args.waypoints] for i in range(args.robots)]
+
+    report = run_simulation(routes, grid, max_ticks=args.max_ticks)
+
+    print(f"Robots: {report['robots']}  ticks: {report['ticks']}  wall: {report['wall_seconds']:.2f}s")
+    print(f"Ticks per second: {report['ticks_per_second']:.0f}")
+    print(f"Planning: {report['planning_seconds']:.3f}s  movement: {report['movement_seconds']:.3f}s")
+    print(f"Simulated traverse time: {report['traverse_seconds']:.1f}s at {TICK_RATE} ticks/s")
+    for i, result in enumerate(report["per_robot"]):
+        status = "finished" if result["finished"] else "stuck" if result["stuck"] else "running"
+        print(f"  robot {i}: {status}, {result['plans_computed']} plans, "
+              f"{result['planning_seconds']:.3f}s planning")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {os.path.abspath(args.json)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# sparse_backend.py
+import logging
+import time
+
+import numpy as np
+
+from algorithm import DIRECTIONS
+from grid_path import ElevationProfile, GridPath
+from plan_stats import PlanStats
+
+logger = logging.getLogger(__name__)
+
+# scipy.sparse.csgraph marks cells without a predecessor with this value
+NO_PREDECESSOR = -9999
+
+
+class SparseGraphBackend:
+    """
+    Whole-grid shortest paths with scipy.sparse.csgraph (SciPy is imported on first use).
+
+    The terrain is converted once per terrain key into a CSR adjacency matrix
+    whose entries are the Algorithm's edge costs, so slopes, cliffs and
+    uphill/downhill weights are handled exactly as in find_path. Queries then
+    run in compiled code: one start to one or many goals, many starts at once
+    (each cell reached from its cheapest start), and cost-to-go fields over the
+    reversed graph. csgraph has no A*, so every query searches all reachable
+    cells: it beats the Python A* on winding routes that make A* expand much of
+    the grid anyway, while short or nearly straight routes stay faster with
+    find_path. `benchmarks.py --sparse` prints the crossover by grid size.
+    """
+
+    def __init__(self, algorithm):
+        self.algorithm = algorithm
+        self._graph = None
+        self._reverse = None
+        self._graph_key = None
+        self.build_seconds = 0.0
+
+    def get_graph(self, grid):
+        """CSR matrix of shape (W*H, W*H) with graph[i, j] = cost of the move from flat cell i to j"""
+        key = self.algorithm.terrain_key(grid)
+        if self._graph_key != key:
+            from scipy import sparse
+
+            began = time.perf_counter()
+            edge_costs = self.algorithm.get_edge_costs(grid)
+            width, height = grid.shape[0], grid.shape[1]
+            size = width * height
+            sources, targets, weights = [], [], []
+            for d, (dx, dy) in enumerate(DIRECTIONS):
+                costs = edge_costs[d].reshape(-1)
+                source = np.flatnonzero(np.isfinite(costs))
+                sources.append(source)
+                targets.append(source + dx * height + dy)
+                weights.append(costs[source])
+            self._graph = sparse.csr_matrix(
+                (np.concatenate(weights), (np.concatenate(sources), np.concatenate(targets))), shape=(size, size))
+            self._reverse = None
+            self._graph_key = key
+            self.build_seconds = time.perf_counter() - began
+            logger.debug("Built %dx%d sparse graph with %d edges in %.3fs", width, height, self._graph.nnz,
+                         self.build_seconds)
+        return self._graph
+
+    def _reverse_graph(self, grid):
+        graph = self.get_graph(grid)
+        if self._reverse is None:
+            self._reverse = graph.transpose().tocsr()
+        return self._reverse
+
+    def _dijkstra(self, graph, indices, **kwargs):
+        from scipy.sparse import csgraph
+
+        return csgraph.dijkstra(graph, directed=True, indices=indices, **kwargs)
+
+    def single_source(self, start, grid):
+        """(cost from start to every cell as (W, H), flat predecessor array)"""
+        height = grid.shape[1]
+        dist, predecessors = self._dijkstra(self.get_graph(grid), start[0] * height + start[1],
+                                            return_predecessors=True)
+        return dist.reshape(grid.shape[:2]), predecessors
+
+    def multi_source(self, starts, grid):
+        """
+        (cost from the cheapest start, flat predecessor array, flat index of that
+        start) for every cell, from one search seeded with all starts.
+        """
+        height = grid.shape[1]
+        indices = [x * height + y for x, y in starts]
+        dist, predecessors, nearest = self._dijkstra(self.get_graph(grid), indices, return_predecessors=True,
+                                                     min_only=True)
+        return dist.reshape(grid.shape[:2]), predecessors, nearest
+
+    def cost_to_go(self, goal, grid):
+        """Cost from every cell to goal, as (W, H), from a search over the reversed graph"""
+        height = grid.shape[1]
+        dist = self._dijkstra(self._reverse_graph(grid), goal[0] * height + goal[1])
+        return dist.reshape(grid.shape[:2])
+
+    def path_to(self, predecessors, goal, height):
+        """GridPath ending at goal by walking a predecessor array back to its source, or None"""
+        current = goal[0] * height + goal[1]
+        step = memoryview(predecessors)
+        indices = [current]
+        while step[current] != NO_PREDECESSOR:
+            current = step[current]
+            indices.append(current)
+        if len(indices) == 1:
+            return None
+        return GridPath.from_indices(indices[::-1], height)
+
+    def find_paths(self, start, goals, grid):
+        """Paths from start to each of goals (None where unreachable) from a single search"""
+        start = tuple(start)
+        _, predecessors = self.single_source(start, grid)
+        height = grid.shape[1]
+        paths = []
+        for goal in goals:
+            goal = tuple(goal)
+            if goal == start:
+                paths.append(GridPath.from_cells([start]))
+            else:
+                paths.append(self.path_to(predecessors, goal, height))
+        return paths
+
+    def find_path(self, start, goal, grid):
+        """
+        Drop-in for Algorithm.find_path on dense grids: the same endpoint checks
+        and direct-line shortcut, then a compiled Dijkstra search instead of A*.
+        """
+        start, goal = tuple(start), tuple(goal)
+        algorithm = self.algorithm
+        stats = PlanStats(start, goal, algorithm.profile_hook)
+        algorithm.last_stats = stats
+        stats.engine = "sparse"
+        began = time.perf_counter()
+        try:
+            path = self._plan(start, goal, grid, stats)
+            stats.path_length = len(path) if path else 0
+            return path
+        finally:
+            stats.total_seconds = time.perf_counter() - began
+
+    def _plan(self, start, goal, grid, stats):
+        algorithm = self.algorithm
+        with stats.phase("terrain"):
+            impassable = algorithm.get_impassable_mask(grid)
+        if not (algorithm.in_bounds(start, grid) and algorithm.in_bounds(goal, grid)):
+            logger.warning("Start %s or goal %s is outside the terrain", start, goal)
+            stats.outcome = "out_of_bounds"
+            return None
+        if impassable[start] or impassable[goal]:
+            logger.warning("Start %s or goal %s is in impassable terrain", start, goal)
+            stats.outcome = "impassable"
+            return None
+
+        with stats.phase("direct_path"):
+            path = algorithm.find_direct_path(start, goal, grid)
+        if path:
+            stats.outcome = "direct"
+            return path
+
+        with stats.phase("terrain"):
+            self.get_graph(grid)
+        with stats.phase("search"):
+            path = self.find_paths(start, [goal], grid)[0]
+        if path is None:
+            logger.info("No path found from %s to %s", start, goal)
+            stats.outcome = "no_path"
+            return None
+        stats.outcome = "search"
+        algorithm.elevation_profile = ElevationProfile.from_grid(path, grid)
+        return path
@@ -0,0 +1,97 @@
+# synthetic_terrain.py
+import numpy as np
+
+TERRAIN_KINDS = ("flat", "rolling", "cliffs", "maze")
+
+
+def grid_from_elevation(elevation):
+    """Planner grid, (x, y, channel), from a (rows, cols) elevation raster such as a TIFF crop"""
+    elevation = np.asarray(elevation, dtype=np.float64)
+    grid = np.zeros((elevation.shape[1], elevation.shape[0], 2))
+    grid[..., 1] = elevation.T
+    return grid
+
+
+def _rolling(width, height, rng):
+    """Smooth hills built from a few random sinusoids, gentle enough to stay mostly passable"""
+    xx, yy = np.meshgrid(np.arange(width), np.arange(height), indexing="ij")
+    elevation = np.zeros((width, height))
+    for _ in range(4):
+        wavelength = rng.uniform(30, 80)
+        angle = rng.uniform(0, np.pi)
+        phase = rng.uniform(0, 2 * np.pi)
+        along = xx * np.cos(angle) + yy * np.sin(angle)
+        elevation += rng.uniform(1.0, 3.0) * np.sin(along * 2 * np.pi / wavelength + phase)
+    return elevation + rng.random((width, height)) * 0.3
+
+
+def _cliff_bands(width, height, rng):
+    """Rolling terrain crossed by vertical cliff walls, each with a few gaps to pass through"""
+    elevation = _rolling(width, height, rng) * 0.5
+    spacing = max(4, width // 5)
+    for x in range(spacing, width - 1, spacing):
+        wall = np.ones(height, dtype=bool)
+        for _ in range(max(1, height // 32)):
+            gap = rng.integers(0, max(1, height - 3))
+            wall[gap:gap + 3] = False
+        elevation[x, wall] += 10.0
+    return elevation
+
+
+def _maze(width, height, rng):
+    """Obstacle channel for a perfect maze with one-cell corridors (iterative backtracker)"""
+    walls = np.ones((width, height))
+    cells_x, cells_y = (width - 1) // 2, (height - 1) // 2
+    if cells_x < 1 or cells_y < 1:
+        return np.zeros((width, height))
+
+    visited = np.zeros((cells_x, cells_y), dtype=bool)
+    stack = [(0, 0)]
+    visited[0, 0] = True
+    walls[1, 1] = 0
+    while stack:
+        cx, cy = stack[-1]
+        options = [(cx + dx, cy + dy) for dx, dy in ((0, 1), (1, 0), (0, -1), (-1, 0))
+                   if 0 <= cx + dx < cells_x and 0 <= cy + dy < cells_y and not visited[cx + dx, cy + dy]]
+        if not options:
+            stack.pop()
+            continue
+        nx, ny = options[rng.integers(len(options))]
+        visited[nx, ny] = True
+        # Open the new cell and the wall between it and the current one
+        walls[2 * nx + 1, 2 * ny + 1] = 0
+        walls[cx + nx + 1, cy + ny + 1] = 0
+        stack.append((nx, ny))
+    return walls
+
+
+def make_terrain(kind, width, height=None, seed=0):
+    """
+    Seeded synthetic planner grid of shape (width, height, 2).
+    kind is one of TERRAIN_KINDS; the same (kind, size, seed) always gives the same grid.
+    """
+    height = width if height is None else height
+    rng = np.random.default_rng(seed)
+    grid = np.zeros((width, height, 2))
+
+    if kind == "flat":
+        pass
+    elif kind == "rolling":
+        grid[..., 1] = _rolling(width, height, rng)
+    elif kind == "cliffs":
+        grid[..., 1] = _cliff_bands(width, height, rng)
+    elif kind == "maze":
+        grid[..., 0] = _maze(width, height, rng)
+    else:
+        raise ValueError(f"Unknown terrain kind: {kind}")
+    return grid
+
+
+def sample_free_cells(algorithm, grid, count, seed=0):
+    """count distinct cells that are neither obstacles nor too steep, in random order"""
+    free = np.argwhere(~algorithm.get_blocked_mask(grid))
+    if len(free) < count:
+        raise ValueError(f"Only {len(free)} free cells, {count} requested")
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(free), size=count, replace=False)
+    return [tuple(int(v) for v in free[i]) for i in picks]
@@ -0,0 +1,171 @@
+# terrain.py
+import numpy as np
+
+OBSTACLE, ELEVATION = 0, 1  # Channels of the (x, y, channel) grid layout
+
+
+class Terrain:
+    """
+    Compact planner grid: float32 elevation plus a packed obstacle bitmap.
+
+    A dense (W, H, 2) float64 grid spends 16 bytes per cell; this keeps the
+    elevation as one C-contiguous (W, H) float32 array and the obstacle flags
+    as bits in x-major order (cell x * H + y), about 4.1 bytes per cell.
+
+    Indexing follows the dense layout, so terrain[x, y, 1], terrain[..., 0]
+    and fancy indexing like terrain[xs, ys, 1] keep working, and shape is
+    (W, H, 2). Hot code should use the direct accessors instead: elevations
+    for the whole array, elevation(x, y) and is_obstacle(x, y) for single
+    cells, and obstacle_mask() for a boolean block. Module-level
+    elevation_of, obstacle_mask and elevation_at accept a Terrain or a dense
+    grid alike.
+    """
+
+    ndim = 3
+
+    def __init__(self, elevations, obstacles=None):
+        self.elevations = np.ascontiguousarray(elevations, dtype=np.float32)
+        if self.elevations.ndim != 2:
+            raise ValueError(f"Elevation must be 2-D (W, H), got shape {self.elevations.shape}")
+        self.width, self.height = self.elevations.shape
+        self.shape = (self.width, self.height, 2)
+        if obstacles is None:
+            self.obstacle_bits = np.zeros(-(-self.width * self.height // 8), dtype=np.uint8)
+        else:
+            self.obstacle_bits = np.packbits(np.asarray(obstacles, dtype=bool).reshape(-1))
+
+    @classmethod
+    def from_grid(cls, grid):
+        """Terrain from a dense (W, H, 2) grid; channel 0 == 1 marks obstacles"""
+        return cls(grid[..., ELEVATION], grid[..., OBSTACLE] == 1)
+
+    @classmethod
+    def from_elevation(cls, elevation, obstacles=None):
+        """Terrain from a (rows, cols) raster such as a TIFF crop, like grid_from_elevation"""
+        return cls(np.asarray(elevation).T, None if obstacles is None else np.asarray(obstacles).T)
+
+    @classmethod
+    def from_buffers(cls, elevations, obstacle_bits):
+        """Terrain over existing arrays without copying, e.g. views of shared memory"""
+        terrain = cls.__new__(cls)
+        terrain.elevations = elevations
+        terrain.width, terrain.height = elevations.shape
+        terrain.shape = (terrain.width, terrain.height, 2)
+        terrain.obstacle_bits = obstacle_bits
+        return terrain
+
+    @property
+    def nbytes(self):
+        return self.elevations.nbytes + self.obstacle_bits.nbytes
+
+    def elevation(self, x, y):
+        return float(self.elevations[x, y])
+
+    def _cell_index(self, x, y):
+        """Flat index of one cell; negative x and y count from the end, as in NumPy"""
+        if x < 0:
+            x += self.width
+        if y < 0:
+            y += self.height
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError(f"Cell {(x, y)} is outside the {self.width}x{self.height} terrain")
+        return x * self.height + y
+
+    def is_obstacle(self, x, y):
+        i = self._cell_index(x, y)
+        return bool(self.obstacle_bits[i >> 3] >> (7 - (i & 7)) & 1)
+
+    def set_obstacle(self, x, y, value=1):
+        i = self._cell_index(x, y)
+        if value:
+            self.obstacle_bits[i >> 3] |= 0x80 >> (i & 7)
+        else:
+            self.obstacle_bits[i >> 3] &= ~(0x80 >> (i & 7)) & 0xFF
+
+    def obstacle_mask(self, x0=0, y0=0, x1=None, y1=None):
+        """Boolean obstacle mask of the block x0 <= x < x1, y0 <= y < y1, unpacking only its rows"""
+        x1 = self.width if x1 is None else x1
+        y1 = self.height if y1 is None else y1
+        first, last = x0 * self.height, x1 * self.height
+        bits = np.unpackbits(self.obstacle_bits[first >> 3:-(-last // 8)])
+        offset = first & 7
+        rows = bits[offset:offset + last - first].reshape(x1 - x0, self.height)
+        return rows[:, y0:y1].view(bool)
+
+    def to_grid(self):
+        """Dense (W, H, 2) float64 grid with the same contents"""
+        grid = np.empty(self.shape)
+        grid[..., OBSTACLE] = self.obstacle_mask()
+        grid[..., ELEVATION] = self.elevations
+        return grid
+
+    def __array__(self, dtype=None, copy=None):
+        grid = self.to_grid()
+        return grid if dtype is None else grid.astype(dtype)
+
+    def _flat_indices(self, x, y):
+        """Flat cell indices selected by (x, y) with NumPy's basic/advanced indexing shapes"""
+        rows = np.arange(self.width)[x]
+        cols = np.arange(self.height)[y]
+        if (isinstance(x, slice) or isinstance(y, slice)) and np.ndim(rows) and np.ndim(cols):
+            return rows[:, None] * self.height + cols[None, :]
+        return rows * self.height + cols
+
+    def _split_key(self, key):
+        if not isinstance(key, tuple):
+            raise IndexError("Terrain is indexed as terrain[x, y, channel]")
+        if len(key) == 2 and key[0] is Ellipsis:
+            key = (slice(None), slice(None), key[1])
+        if len(key) != 3 or key[2] not in (OBSTACLE, ELEVATION, OBSTACLE - 2, ELEVATION - 2):
+            raise IndexError(f"Unsupported terrain index {key!r}; use terrain[x, y, 0 or 1]")
+        return key[0], key[1], key[2] % 2
+
+    def __getitem__(self, key):
+        x, y, channel = self._split_key(key)
+        if channel == ELEVATION:
+            return self.elevations[x, y]
+        if isinstance(x, (int, np.integer)) and isinstance(y, (int, np.integer)):
+            return np.uint8(self.is_obstacle(x, y))
+        if isinstance(x, slice) and isinstance(y, slice) and x.step in (None, 1) and y.step in (None, 1):
+            x0, x1, _ = x.indices(self.width)
+            y0, y1, _ = y.indices(self.height)
+            return self.obstacle_mask(x0, y0, max(x0, x1), max(y0, y1)).view(np.uint8)
+        flat = self._flat_indices(x, y)
+        return (self.obstacle_bits[flat >> 3] >> (7 - (flat & 7)) & 1).astype(np.uint8)
+
+    def __setitem__(self, key, value):
+        x, y, channel = self._split_key(key)
+        if channel == ELEVATION:
+            self.elevations[x, y] = value
+            return
+        if isinstance(x, (int, np.integer)) and isinstance(y, (int, np.integer)):
+            self.set_obstacle(x, y, value)
+            return
+        flat, value = np.broadcast_arrays(self._flat_indices(x, y), np.asarray(value) != 0)
+        bits = (0x80 >> (flat & 7)).astype(np.uint8)
+        np.bitwise_and.at(self.obstacle_bits, flat[~value] >> 3, ~bits[~value])
+        np.bitwise_or.at(self.obstacle_bits, flat[value] >> 3, bits[value])
+
+    def __repr__(self):
+        return f"Terrain({self.width}x{self.height}, {self.nbytes / 2**20:.1f} MiB)"
+
+
+def elevation_of(grid):
+    """(W, H) elevation array of a Terrain or a dense (W, H, 2) grid, without copying"""
+    if isinstance(grid, Terrain):
+        return grid.elevations
+    return grid[..., ELEVATION]
+
+
+def obstacle_mask(grid, x0=0, y0=0, x1=None, y1=None):
+    """Boolean obstacle mask of a block of a Terrain or a dense grid (the whole grid by default)"""
+    if isinstance(grid, Terrain):
+        return grid.obstacle_mask(x0, y0, x1, y1)
+    return grid[x0:x1, y0:y1, OBSTACLE] == 1
+
+
+def elevation_at(grid, x, y):
+    """Elevation of one cell of a dense grid, a Terrain or a tiled provider"""
+    if isinstance(grid, np.ndarray):
+        return grid[x, y, ELEVATION]
+    return grid.elevation(x, y)
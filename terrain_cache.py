@@ -0,0 +1,66 @@
+# terrain_cache.py
+import glob
+import hashlib
+import os
+
+import numpy as np
+
+CACHE_DIR = ".terrain_cache"
+
+
+def _source_prefix(tiff_path, band):
+    """File name prefix shared by every cached version of one source band"""
+    source = hashlib.sha1(f"{os.path.abspath(tiff_path)}|{band}".encode("utf-8")).hexdigest()[:8]
+    name = os.path.splitext(os.path.basename(tiff_path))[0]
+    return f"{name}_b{band}_{source}_"
+
+
+def cache_path(tiff_path, band=1, cache_dir=CACHE_DIR):
+    """
+    Location of the cached raster for a GeoTIFF band.
+    The file name is keyed on the absolute source path, its mtime/size and the band,
+    so editing or replacing the TIFF automatically produces a new cache entry.
+    """
+    stat = os.stat(tiff_path)
+    key = f"{os.path.abspath(tiff_path)}|{stat.st_mtime_ns}|{stat.st_size}|{band}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{_source_prefix(tiff_path, band)}{digest}.npy")
+
+
+def build_cache(tiff_path, band=1, cache_dir=CACHE_DIR):
+    """Copy one raster band into a .npy file block by block and return its path"""
+    import rasterio
+
+    path = cache_path(tiff_path, band, cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = path + ".tmp"
+
+    with rasterio.open(tiff_path) as src:
+        out = np.lib.format.open_memmap(tmp_path, mode="w+",
+                                        dtype=np.dtype(src.dtypes[band - 1]),
+                                        shape=(src.height, src.width))
+        # Stream the native blocks so the whole band never has to be held in memory
+        for _, window in src.block_windows(band):
+            out[window.toslices()] = src.read(band, window=window)
+        out.flush()
+        del out
+
+    # Drop entries for older versions of the same source before publishing the new one;
+    # the prefix includes the source path, so same-named rasters elsewhere are kept
+    pattern = glob.escape(os.path.join(cache_dir, _source_prefix(tiff_path, band))) + "*.npy"
+    for stale in glob.glob(pattern):
+        if stale != path:
+            os.remove(stale)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_terrain(tiff_path, band=1, cache_dir=CACHE_DIR):
+    """
+    Return a raster band as a read-only (rows, cols) memmap.
+    The first call converts the TIFF; later launches open the cache zero-copy.
+    """
+    path = cache_path(tiff_path, band, cache_dir)
+    if not os.path.exists(path):
+        build_cache(tiff_path, band, cache_dir)
+    return np.load(path, mmap_mode="r")
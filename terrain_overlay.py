@@ -0,0 +1,101 @@
+# terrain_overlay.py
+import numpy as np
+import pygame
+
+
+def _normalize(values):
+    """Scale finite values to 0..1; non-finite values become NaN"""
+    values = np.asarray(values, dtype=np.float64)
+    finite = np.isfinite(values)
+    if not finite.any():
+        return np.full(values.shape, np.nan)
+    low, high = values[finite].min(), values[finite].max()
+    scaled = (values - low) / ((high - low) or 1)
+    scaled[~finite] = np.nan
+    return scaled
+
+
+def _color_ramp(values, mode):
+    """RGB (h, w, 3) uint8 colors for a (h, w) array of terrain values"""
+    h, w = values.shape
+    rgb = np.zeros((h, w, 3), dtype=np.uint8)
+    if mode == "elevation":
+        # Higher values are brighter green
+        rgb[..., 1] = np.nan_to_num(_normalize(values) * 255).astype(np.uint8)
+    elif mode == "slope":
+        # Boolean impassable mask: red where too steep
+        rgb[np.asarray(values, dtype=bool)] = (255, 0, 0)
+    elif mode == "cost":
+        # Cheap terrain green, expensive red, untraversable black
+        scaled = _normalize(values)
+        known = ~np.isnan(scaled)
+        rgb[..., 0] = np.where(known, np.clip(scaled * 2, 0, 1) * 255, 0).astype(np.uint8)
+        rgb[..., 1] = np.where(known, np.clip(2 - scaled * 2, 0, 1) * 255, 0).astype(np.uint8)
+    else:
+        raise ValueError(f"Unknown overlay mode: {mode}")
+    return rgb
+
+
+def create_terrain_overlay(terrain_data, alpha=128, mode="elevation", size=None):
+    """
+    Build an overlay surface for a (rows, cols) terrain array in one vectorized pass.
+    mode picks the color ramp: "elevation", "slope" (boolean mask, transparent
+    where passable) or "cost" (per-cell movement cost, inf for untraversable).
+    When size is given the data is decimated before the surface is built, so
+    huge rasters never turn into full-resolution surfaces.
+    """
+    data = np.asarray(terrain_data)
+    if size is not None:
+        step_y = max(1, data.shape[0] // size[1])
+        step_x = max(1, data.shape[1] // size[0])
+        data = data[::step_y, ::step_x]
+
+    h, w = data.shape
+    rgb = _color_ramp(data, mode)
+    alpha_values = np.full((h, w), alpha, dtype=np.uint8)
+    if mode == "slope":
+        alpha_values[~data.astype(bool)] = 0
+
+    overlay = pygame.Surface((w, h), pygame.SRCALPHA)
+    # surfarray views are (x, y) indexed, the terrain is (row, col)
+    pixels = pygame.surfarray.pixels3d(overlay)
+    pixels[...] = rgb.transpose(1, 0, 2)
+    del pixels
+    pixels_alpha = pygame.surfarray.pixels_alpha(overlay)
+    pixels_alpha[...] = alpha_values.T
+    del pixels_alpha
+
+    if size is not None and (w, h) != tuple(size):
+        overlay = pygame.transform.scale(overlay, size)
+    return overlay
+
+
+class TerrainOverlay:
+    """
+    Caches the overlay surface and rebuilds it only when the terrain, its
+    version, the visible camera region, the output size or the mode changes.
+    """
+
+    def __init__(self, alpha=128, mode="elevation"):
+        self.alpha = alpha
+        self.mode = mode
+        self._key = None
+        self._surface = None
+
+    def get_surface(self, terrain_data, size, camera=None, terrain_version=0):
+        """
+        Overlay for the camera's region of terrain_data, scaled to size.
+        camera is a pygame.Rect in terrain cells; None shows the whole terrain.
+        """
+        region = tuple(camera) if camera is not None else None
+        key = (id(terrain_data), terrain_version, region, tuple(size), self.mode, self.alpha)
+        if key != self._key:
+            data = terrain_data
+            if camera is not None:
+                data = terrain_data[camera.top:camera.bottom, camera.left:camera.right]
+            self._surface = create_terrain_overlay(data, self.alpha, self.mode, size)
+            self._key = key
+        return self._surface
+
+    def invalidate(self):
+        self._key = None
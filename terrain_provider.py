@@ -0,0 +1,175 @@
+# terrain_provider.py
+from collections import OrderedDict
+
+import numpy as np
+
+from terrain import Terrain
+
+
+class TiledTerrainProvider:
+    """
+    Streams a GeoTIFF band in fixed-size tiles using rasterio windowed reads.
+
+    Tiles are stored as compact Terrain blocks (float32 elevation and packed
+    obstacle bits) indexed like the planner's grid layout, (x, y, channel) with
+    channel 0 the obstacle flag and channel 1 the elevation, and are kept in an LRU cache
+    bounded by memory_budget bytes. Obstacles are held as sparse overrides so
+    they survive tile eviction. When planning, the budget also has to hold the
+    planner's working set for the window it searches; see fits_budget.
+    """
+
+    # Lets Algorithm recognise a provider without importing this module
+    is_tiled = True
+
+    def __init__(self, tiff_path, band=1, tile_size=512, memory_budget=256 * 1024 * 1024):
+        import rasterio
+
+        self._src = rasterio.open(tiff_path)
+        self.band = band
+        self.tile_size = tile_size
+        self.memory_budget = memory_budget
+        self.width = self._src.width
+        self.height = self._src.height
+        self.shape = (self.width, self.height, 2)
+
+        self._tiles = OrderedDict()  # (tile_x, tile_y) -> Terrain
+        self._obstacles = {}  # (x, y) -> obstacle flag
+        self.memory_used = 0
+        self.tile_hits = 0
+        self.tile_misses = 0
+        # Bumped whenever obstacles change so assembled windows can be reused safely
+        self.version = 0
+        self._window_key = None
+        self._window = None
+
+    def close(self):
+        self._src.close()
+        self._tiles.clear()
+        self.memory_used = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _load_tile(self, tile_x, tile_y):
+        from rasterio.windows import Window
+
+        x0 = tile_x * self.tile_size
+        y0 = tile_y * self.tile_size
+        w = min(self.tile_size, self.width - x0)
+        h = min(self.tile_size, self.height - y0)
+        data = self._src.read(self.band, window=Window(x0, y0, w, h))
+
+        # Raster rows are y, the grid is indexed [x, y]
+        tile = Terrain.from_elevation(data)
+        for (x, y), value in self._obstacles.items():
+            if x0 <= x < x0 + w and y0 <= y < y0 + h:
+                tile.set_obstacle(x - x0, y - y0, value)
+        return tile
+
+    def get_tile(self, tile_x, tile_y):
+        """Return a tile, loading it and evicting least recently used tiles as needed"""
+        key = (tile_x, tile_y)
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles.move_to_end(key)
+            self.tile_hits += 1
+            return tile
+
+        self.tile_misses += 1
+        tile = self._load_tile(tile_x, tile_y)
+        self._tiles[key] = tile
+        self.memory_used += tile.nbytes
+
+        # Always keep the tile that was just requested
+        while self.memory_used > self.memory_budget and len(self._tiles) > 1:
+            _, evicted = self._tiles.popitem(last=False)
+            self.memory_used -= evicted.nbytes
+        return tile
+
+    def __getitem__(self, key):
+        """Scalar access in grid layout, provider[x, y, channel]"""
+        x, y, channel = key
+        return self._tile_at(x, y)[x % self.tile_size, y % self.tile_size, channel]
+
+    def _tile_at(self, x, y):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError(f"Cell {(x, y)} is outside the terrain")
+        return self.get_tile(x // self.tile_size, y // self.tile_size)
+
+    def elevation(self, x, y):
+        return self._tile_at(x, y).elevation(x % self.tile_size, y % self.tile_size)
+
+    def is_obstacle(self, x, y):
+        return self._tile_at(x, y).is_obstacle(x % self.tile_size, y % self.tile_size)
+
+    def set_obstacle(self, x, y, value=1):
+        """Mark or clear an obstacle cell, updating the cached tile if it is loaded"""
+        self._obstacles[(x, y)] = value
+        tile = self._tiles.get((x // self.tile_size, y // self.tile_size))
+        if tile is not None:
+            tile.set_obstacle(x % self.tile_size, y % self.tile_size, value)
+        self.version += 1
+
+    def fits_budget(self, x0, y0, x1, y1, bytes_per_cell=0):
+        """
+        Whether every tile overlapping the window x0 <= x < x1, y0 <= y < y1, plus
+        bytes_per_cell of working memory for each window cell (e.g. a planner's
+        masks, edge costs and search state), fits the memory budget at once
+        """
+        ts = self.tile_size
+        tiles = ((x1 - 1) // ts - x0 // ts + 1) * ((y1 - 1) // ts - y0 // ts + 1)
+        # A full tile's float32 elevation plus its packed obstacle bits
+        tile_bytes = tiles * (ts * ts * 4 + -(-ts * ts // 8))
+        return tile_bytes + (x1 - x0) * (y1 - y0) * bytes_per_cell <= self.memory_budget
+
+    def prefetch_around(self, x, y, radius=None):
+        """Make sure the tiles within radius cells of (x, y) are loaded"""
+        radius = self.tile_size // 2 if radius is None else radius
+        x0, x1 = max(0, x - radius), min(self.width - 1, x + radius)
+        y0, y1 = max(0, y - radius), min(self.height - 1, y + radius)
+        for tile_x in range(x0 // self.tile_size, x1 // self.tile_size + 1):
+            for tile_y in range(y0 // self.tile_size, y1 // self.tile_size + 1):
+                self.get_tile(tile_x, tile_y)
+
+    def prefetch_path(self, path, radius=0):
+        """Load the tiles a planned route passes through"""
+        seen = set()
+        for x, y in path:
+            key = (x // self.tile_size, y // self.tile_size)
+            if key not in seen:
+                seen.add(key)
+                self.prefetch_around(x, y, radius)
+
+    def window(self, x0, y0, x1, y1):
+        """
+        Terrain for the cells x0 <= x < x1, y0 <= y < y1, assembled from tiles.
+        The same object is returned while the bounds and obstacles are unchanged,
+        so the planner's per-grid caches keep hitting.
+        """
+        x0, y0 = max(0, x0), max(0, y0)
+        x1, y1 = min(self.width, x1), min(self.height, y1)
+        key = (x0, y0, x1, y1, self.version)
+        if key == self._window_key:
+            return self._window
+
+        elevations = np.empty((x1 - x0, y1 - y0), dtype=np.float32)
+        obstacles = np.zeros((x1 - x0, y1 - y0), dtype=bool)
+        ts = self.tile_size
+        for tile_x in range(x0 // ts, (x1 - 1) // ts + 1):
+            for tile_y in range(y0 // ts, (y1 - 1) // ts + 1):
+                tile = self.get_tile(tile_x, tile_y)
+                tx0, ty0 = tile_x * ts, tile_y * ts
+                # Overlap of this tile with the requested window
+                ax0, ax1 = max(x0, tx0), min(x1, tx0 + tile.width)
+                ay0, ay1 = max(y0, ty0), min(y1, ty0 + tile.height)
+                target = (slice(ax0 - x0, ax1 - x0), slice(ay0 - y0, ay1 - y0))
+                elevations[target] = tile.elevations[ax0 - tx0:ax1 - tx0, ay0 - ty0:ay1 - ty0]
+                obstacles[target] = tile.obstacle_mask(ax0 - tx0, ay0 - ty0, ax1 - tx0, ay1 - ty0)
+
+        grid = Terrain(elevations, obstacles)
+        self._window_key = key
+        self._window = grid
+        return grid
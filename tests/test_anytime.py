@@ -0,0 +1,77 @@
+# tests/test_anytime.py
+import numpy as np
+import pytest
+
+from algorithm import Algorithm
+from anytime import AnytimeSearch, find_path_anytime
+from cost_field import CostToGoField
+from synthetic_terrain import make_terrain, sample_free_cells
+
+
+def walled_terrain(kind, seed):
+    grid = make_terrain(kind, 64, seed=seed)
+    # A wall with a single gap so that straight lines across it need a search
+    grid[32, 4:, 0] = 1
+    return grid
+
+
+def endpoints_across_wall(algorithm, grid, seed):
+    cells = sample_free_cells(algorithm, grid, 40, seed=seed)
+    start = next(c for c in cells if c[0] < 32 and c[1] > 8)
+    goal = next(c for c in cells if c[0] > 32 and c[1] > 8)
+    return start, goal
+
+
+@pytest.mark.parametrize("kind", ["rolling", "cliffs"])
+@pytest.mark.parametrize("seed", [0, 1])
+def test_solutions_respect_their_bounds_and_end_optimal(kind, seed):
+    grid = walled_terrain(kind, seed)
+    algorithm = Algorithm()
+    start, goal = endpoints_across_wall(algorithm, grid, seed)
+    optimal = CostToGoField(algorithm, grid, goal).cost[start]
+
+    search = AnytimeSearch(algorithm, start, goal, grid, epsilon=3.0, epsilon_step=0.5)
+    bounds = []
+    for path, bound in search.run():
+        assert path[0] == start and path[-1] == goal
+        assert algorithm.path_cost(path, grid) <= bound * optimal + 1e-6
+        bounds.append(bound)
+    assert search.done
+    assert bounds == sorted(bounds, reverse=True)
+    assert bounds[-1] == 1.0 and len(bounds) > 1
+    assert algorithm.last_stats.outcome == "search"
+    assert algorithm.path_cost(search.path, grid) == pytest.approx(optimal)
+
+
+def test_resumed_search_matches_an_uninterrupted_one():
+    grid = walled_terrain("cliffs", 3)
+    algorithm = Algorithm()
+    start, goal = endpoints_across_wall(algorithm, grid, 7)
+
+    whole = AnytimeSearch(algorithm, start, goal, grid)
+    for _ in whole.run():
+        pass
+
+    resumed = AnytimeSearch(algorithm, start, goal, grid)
+    calls = 0
+    while not resumed.done:
+        for _ in resumed.run(expansion_budget=50):
+            pass
+        calls += 1
+    assert calls > 1
+    assert resumed.nodes_expanded == whole.nodes_expanded
+    assert algorithm.path_cost(resumed.path, grid) == pytest.approx(algorithm.path_cost(whole.path, grid))
+    assert resumed.bound == 1.0
+
+
+def test_endpoint_outcomes_match_find_path():
+    grid = np.zeros((16, 16, 2))
+    grid[8, :, 0] = 1
+    algorithm = Algorithm()
+    assert find_path_anytime(algorithm, (0, 0), (16, 0), grid) == (None, np.inf)
+    assert algorithm.last_stats.outcome == "out_of_bounds"
+    assert find_path_anytime(algorithm, (0, 0), (15, 15), grid) == (None, np.inf)
+    assert algorithm.last_stats.outcome == "no_path"
+    path, bound = find_path_anytime(algorithm, (0, 0), (0, 5), grid)
+    assert bound == 1.0 and path[-1] == (0, 5)
+    assert algorithm.last_stats.outcome == "direct"
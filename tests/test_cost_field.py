@@ -0,0 +1,58 @@
+# tests/test_cost_field.py
+import numpy as np
+import pytest
+
+from algorithm import Algorithm
+from cost_field import CostFieldCache, CostToGoField
+from synthetic_terrain import make_terrain, sample_free_cells
+
+
+@pytest.mark.parametrize("kind", ["rolling", "cliffs", "maze"])
+def test_field_paths_cost_the_same_as_a_star(kind):
+    grid = make_terrain(kind, 64, seed=2)
+    algorithm = Algorithm()
+    cells = sample_free_cells(algorithm, grid, 9, seed=3)
+    goal = cells[0]
+    field = CostToGoField(algorithm, grid, goal)
+    for start in cells[1:]:
+        expected = algorithm._search_array(start, goal, grid)
+        path = field.path_from(start)
+        assert (path is None) == (expected is None)
+        if path is not None:
+            assert path[0] == start and path[-1] == goal
+            assert algorithm.path_cost(path, grid) == pytest.approx(algorithm.path_cost(expected, grid))
+            assert field.cost_to_go(start) == pytest.approx(algorithm.path_cost(path, grid))
+
+
+def test_field_is_built_after_repeated_requests_and_retired_by_edits():
+    grid = make_terrain("maze", 48, seed=1)
+    algorithm = Algorithm()
+    cache = CostFieldCache(algorithm, build_after=2)
+    start, other, goal = sample_free_cells(algorithm, grid, 3, seed=4)
+    cache.find_path(start, goal, grid)
+    assert cache.builds == 0
+    cache.find_path(other, goal, grid)
+    assert cache.builds == 1
+    assert cache.get_field(goal, grid, build=False) is not None
+
+    grid[0, 0, 0] = 1 - grid[0, 0, 0]
+    algorithm.update_terrain_cells(grid, [(0, 0)])
+    assert cache.get_field(goal, grid, build=False) is None
+
+
+def test_oversized_grids_never_build_fields():
+    grid = np.zeros((40, 40, 2))
+    grid[20, 1:39, 0] = 1
+    cache = CostFieldCache(Algorithm(), build_after=1, max_cells=39 * 39)
+    for start in ((1, 1), (2, 30), (5, 5)):
+        assert cache.find_path(start, (38, 20), grid) is not None
+    assert cache.builds == 0
+
+
+def test_request_tracking_is_bounded():
+    grid = np.zeros((32, 32, 2))
+    cache = CostFieldCache(Algorithm(), build_after=3, max_tracked=8)
+    for goal in [(x, y) for x in range(0, 32, 4) for y in range(0, 32, 4)]:
+        cache.find_path((0, 31), goal, grid)
+    assert len(cache._requests) == 8
+    assert list(cache._requests)[-1] == (28, 28)
@@ -0,0 +1,61 @@
+# tests/test_dstar_lite.py
+import random
+
+import numpy as np
+import pytest
+
+from algorithm import Algorithm, DStarLite
+from cost_field import CostToGoField
+from synthetic_terrain import make_terrain
+
+SIZE = 48
+
+
+def check_against_fresh_search(planner, grid):
+    """The repaired path must agree with a fresh find_path and cost the 4-connected optimum"""
+    path = planner.plan()
+    fresh = Algorithm()
+    expected = fresh.find_path(planner.start, planner.goal, grid)
+    assert (path is None) == (expected is None)
+    if path is None:
+        return None
+    assert path[0] == planner.start and path[-1] == planner.goal
+    optimum = CostToGoField(fresh, grid, planner.goal).cost_to_go(planner.start)
+    assert fresh.path_cost(path, grid) == pytest.approx(optimum, rel=1e-9)
+    return path
+
+
+@pytest.mark.parametrize("kind", ["rolling", "cliffs", "maze"])
+@pytest.mark.parametrize("edit_elevation", [False, True])
+def test_repairs_match_fresh_search(kind, edit_elevation):
+    for seed in range(16):
+        grid = make_terrain(kind, SIZE, seed=seed)
+        rng = random.Random(seed)
+        algorithm = Algorithm()
+        free = np.argwhere(~algorithm.get_blocked_mask(grid)).tolist()
+        start, goal = tuple(rng.choice(free)), tuple(rng.choice(free))
+        planner = DStarLite(algorithm, grid, start, goal)
+        check_against_fresh_search(planner, grid)
+
+        for _ in range(10):
+            cells = [(rng.randrange(SIZE), rng.randrange(SIZE)) for _ in range(rng.randint(1, 25))]
+            cells = [cell for cell in cells if cell not in (planner.start, goal)]
+            for x, y in cells:
+                grid[x, y, 0] = 1 - grid[x, y, 0]
+                if edit_elevation and rng.random() < 0.5:
+                    grid[x, y, 1] += rng.uniform(-1.5, 1.5)
+            planner.update_cells(cells)
+            path = check_against_fresh_search(planner, grid)
+            # Move along the route as a robot would
+            if path is not None and len(path) > 5:
+                planner.update_start(path[rng.randint(1, 4)])
+
+
+def test_unreachable_goal_returns_none():
+    grid = np.zeros((12, 12, 2))
+    grid[6, :, 0] = 1
+    planner = DStarLite(Algorithm(), grid, (1, 1), (10, 10))
+    assert planner.plan() is None
+    grid[6, 5, 0] = 0
+    planner.update_cells([(6, 5)])
+    assert planner.plan() is not None
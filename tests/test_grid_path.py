@@ -0,0 +1,112 @@
+# tests/test_grid_path.py
+import numpy as np
+import pytest
+
+from algorithm import Algorithm
+from grid_path import ElevationProfile, GridPath
+from synthetic_terrain import make_terrain, sample_free_cells
+
+CELLS = [(0, 0), (0, 1), (1, 1), (2, 1), (2, 2), (4, 4), (7, 5)]
+
+
+def test_indexing_len_and_iteration_behave_like_a_list_of_tuples():
+    path = GridPath.from_cells(CELLS)
+    assert len(path) == len(CELLS)
+    assert path[0] == (0, 0) and path[-1] == (7, 5)
+    assert type(path[2]) is tuple and all(type(v) is int for v in path[2])
+    assert list(path) == CELLS and path.tolist() == CELLS
+    assert list(reversed(path)) == CELLS[::-1]
+    assert isinstance(path[1:4], GridPath) and list(path[1:4]) == CELLS[1:4]
+    assert list(path[::-2]) == CELLS[::-2]
+    with pytest.raises(IndexError):
+        path[len(CELLS)]
+
+
+def test_membership_and_index():
+    path = GridPath.from_cells(CELLS + [(2, 1)])
+    assert (2, 1) in path and (3, 3) not in path
+    assert path.index((2, 1)) == 3 and path.index((2, 1), 4) == 7
+    assert path.find((3, 3)) == -1
+    with pytest.raises(ValueError):
+        path.index((3, 3))
+    assert path.count((2, 1)) == 2
+
+
+def test_equality_with_lists_tuples_and_paths():
+    path = GridPath.from_cells(CELLS)
+    assert path == CELLS and CELLS == path
+    assert path == tuple(CELLS)
+    assert path == GridPath(np.array(CELLS))
+    assert path != CELLS[:-1] and path != CELLS[::-1]
+    assert path != [(0, 0)] * len(CELLS)
+    assert GridPath.from_cells([]) == [] and len(GridPath.from_cells([])) == 0
+    assert (path == 3) is False
+    with pytest.raises(TypeError):
+        hash(path)
+
+
+def test_constructors_and_shifting():
+    path = GridPath.from_cells(CELLS)
+    assert GridPath.from_cells(path) is path
+    assert GridPath.from_indices([x * 9 + y for x, y in CELLS], 9) == CELLS
+    assert path.shifted(3, -1) == [(x + 3, y - 1) for x, y in CELLS]
+    np.testing.assert_array_equal(np.asarray(path), np.array(CELLS))
+    np.testing.assert_allclose(path.step_lengths(),
+                               [np.hypot(b[0] - a[0], b[1] - a[1]) for a, b in zip(CELLS, CELLS[1:])])
+
+
+def reference_geometry(algorithm, profile, grid, x, y, width, height):
+    """Screen points and steep-step markers as the original per-cell drawing loop computed them"""
+    elevations = [e for _, e in profile]
+    low, high = min(elevations), max(elevations)
+    span = high - low or 1
+    points = []
+    for i, (_, elevation) in enumerate(profile):
+        px = x + (i / (len(profile) - 1)) * width
+        py = y + height - ((elevation - low) / span) * height
+        points.append((int(px), int(py)))
+    markers = []
+    for i in range(len(points) - 1):
+        if algorithm.get_slope(profile[i][0], profile[i + 1][0], grid) > algorithm.max_slope * 0.8:
+            markers.append(((points[i][0] + points[i + 1][0]) // 2, (points[i][1] + points[i + 1][1]) // 2))
+    return points, markers
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_profile_geometry_matches_the_per_cell_loop(seed):
+    grid = make_terrain("cliffs", 48, seed=seed)
+    algorithm = Algorithm()
+    cells = sample_free_cells(algorithm, grid, 20, seed=seed)
+    path = max((algorithm._search_array(a, b, grid) for a, b in zip(cells[::2], cells[1::2])),
+               key=lambda found: len(found or ()))
+    smoothed = algorithm.smooth_path(path, grid)
+    # Planned routes avoid steep steps, so also profile a rough line to get markers
+    bumpy = grid.copy()
+    bumpy[..., 1] = np.random.default_rng(seed).random(grid.shape[:2]) * 2
+    line = [(x, x // 2) for x in range(40)]
+    for route, terrain in ((path, grid), (smoothed, grid), (line, bumpy)):
+        profile = ElevationProfile.from_grid(route, terrain)
+        assert len(profile) == len(route)
+        assert profile[3] == (route[3], float(terrain[route[3][0], route[3][1], 1]))
+        expected = reference_geometry(algorithm, profile, terrain, 10, 20, 300, 120)
+        points, markers = profile.geometry(10, 20, 300, 120, algorithm.max_slope * 0.8)
+        assert points == expected[0] and markers == expected[1]
+        assert markers or route is not line
+        # Cached per rectangle and threshold
+        assert profile.geometry(10, 20, 300, 120, algorithm.max_slope * 0.8) is profile._geometry[
+            (10, 20, 300, 120, algorithm.max_slope * 0.8)]
+        assert profile.geometry(0, 0, 100, 50, algorithm.max_slope * 0.8)[0] != points
+
+
+def test_profile_distances_slopes_and_slicing():
+    grid = make_terrain("rolling", 16, seed=3)
+    algorithm = Algorithm()
+    profile = ElevationProfile.from_grid(CELLS, grid)
+    np.testing.assert_allclose(profile.distances, np.concatenate(([0.0], np.cumsum(GridPath(CELLS).step_lengths()))))
+    np.testing.assert_allclose(profile.slopes, [algorithm.get_slope(a, b, grid) for a, b in zip(CELLS, CELLS[1:])])
+    tail = profile[2:]
+    assert isinstance(tail, ElevationProfile) and tail.path == CELLS[2:]
+    np.testing.assert_array_equal(tail.elevations, profile.elevations[2:])
+    moved = profile.shifted(5, 5)
+    assert moved.path == [(x + 5, y + 5) for x, y in CELLS]
+    np.testing.assert_array_equal(moved.elevations, profile.elevations)
@@ -0,0 +1,80 @@
+# tests/test_hierarchical.py
+import random
+
+import numpy as np
+import pytest
+
+from algorithm import DIRECTIONS, Algorithm
+from hierarchical import HierarchicalPlanner
+from synthetic_terrain import make_terrain, sample_free_cells
+
+
+def assert_valid(path, algorithm, grid, start, goal):
+    assert path[0] == tuple(start) and path[-1] == tuple(goal)
+    edge_costs = algorithm.get_edge_costs(grid)
+    for a, b in zip(path, path[1:]):
+        step = (b[0] - a[0], b[1] - a[1])
+        assert step in DIRECTIONS
+        assert np.isfinite(edge_costs[DIRECTIONS.index(step), a[0], a[1]])
+
+
+def entrance_cells(planner):
+    return sorted({cell for pairs in planner._entrances.values() for pair in pairs for cell in pair})
+
+
+@pytest.mark.parametrize("kind", ["maze", "rolling", "cliffs"])
+def test_reachability_matches_find_path(kind):
+    grid = make_terrain(kind, 96, seed=4)
+    algorithm = Algorithm()
+    planner = HierarchicalPlanner(algorithm, cluster_size=16)
+    cells = sample_free_cells(algorithm, grid, 80, seed=5)
+    for start, goal in zip(cells[::2], cells[1::2]):
+        expected = algorithm.find_path(start, goal, grid)
+        path = planner.find_path(start, goal, grid)
+        assert (path is None) == (expected is None), (start, goal)
+        if path is not None:
+            assert_valid(path, algorithm, grid, start, goal)
+
+
+def test_queries_starting_on_an_entrance():
+    grid = make_terrain("maze", 96, seed=4)
+    algorithm = Algorithm()
+    planner = HierarchicalPlanner(algorithm, cluster_size=16)
+    planner.build(grid)
+    rng = random.Random(1)
+    entrances = entrance_cells(planner)
+    goals = sample_free_cells(algorithm, grid, 30, seed=6)
+    for goal in goals:
+        start = rng.choice(entrances)
+        expected = algorithm.find_path(start, goal, grid)
+        path = planner.find_path(start, goal, grid)
+        assert (path is None) == (expected is None), (start, goal)
+        if path is not None:
+            assert_valid(path, algorithm, grid, start, goal)
+
+
+def test_entrances_never_touch_blocked_cells():
+    grid = make_terrain("maze", 96, seed=4)
+    algorithm = Algorithm()
+    planner = HierarchicalPlanner(algorithm, cluster_size=16)
+    planner.build(grid)
+    blocked = algorithm.get_blocked_mask(grid)
+    assert entrance_cells(planner)
+    assert not any(blocked[cell] for cell in entrance_cells(planner))
+
+
+def test_update_cells_matches_rebuild():
+    grid = make_terrain("rolling", 64, seed=2)
+    algorithm = Algorithm()
+    planner = HierarchicalPlanner(algorithm, cluster_size=16)
+    planner.build(grid)
+    # Wall across the border between two clusters
+    cells = [(16, y) for y in range(0, 40)] + [(15, y) for y in range(0, 40)]
+    for x, y in cells:
+        grid[x, y, 0] = 1
+    planner.update_cells(grid, cells)
+
+    rebuilt = HierarchicalPlanner(Algorithm(), cluster_size=16)
+    rebuilt.build(grid)
+    assert planner._entrances == rebuilt._entrances
+    assert planner._inter == rebuilt._inter
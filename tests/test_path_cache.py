@@ -0,0 +1,97 @@
+# tests/test_path_cache.py
+import numpy as np
+import pytest
+
+from algorithm import Algorithm
+from path_cache import PathCache
+
+
+def walled_grid():
+    grid = np.zeros((24, 24, 2))
+    grid[12, 2:22, 0] = 1  # A wall, so routes need a real search
+    return grid
+
+
+def test_exact_hit_returns_the_cached_path():
+    grid = walled_grid()
+    cache = PathCache(Algorithm())
+    first = cache.find_path((2, 2), (20, 20), grid)
+    second = cache.find_path((2, 2), (20, 20), grid)
+    assert second is first
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.algorithm.last_stats.outcome == "path_cache"
+    assert cache.algorithm.last_stats.path_cache_hit == "exact"
+
+
+def test_no_path_results_are_cached():
+    grid = walled_grid()
+    grid[12, :, 0] = 1
+    cache = PathCache(Algorithm())
+    assert cache.find_path((2, 2), (20, 20), grid) is None
+    assert cache.find_path((2, 2), (20, 20), grid) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.algorithm.last_stats.outcome == "no_path"
+
+
+def test_start_on_a_cached_path_reuses_its_suffix():
+    grid = walled_grid()
+    cache = PathCache(Algorithm())
+    path = cache.find_path((2, 2), (20, 20), grid)
+    middle = path[len(path) // 2]
+    suffix = cache.find_path(middle, (20, 20), grid)
+    assert list(suffix) == list(path[len(path) // 2:])
+    assert cache.suffix_hits == 1 and cache.misses == 1
+    assert cache.algorithm.last_stats.path_cache_hit == "suffix"
+    assert len(cache.algorithm.elevation_profile) == len(suffix)
+
+
+def test_least_recently_used_entries_are_evicted():
+    grid = walled_grid()
+    cache = PathCache(Algorithm(), max_entries=2)
+    cache.find_path((2, 2), (20, 20), grid)
+    cache.find_path((2, 3), (20, 21), grid)
+    cache.find_path((2, 2), (20, 20), grid)  # Refreshes the first entry
+    cache.find_path((3, 2), (21, 20), grid)  # Evicts the second
+    assert len(cache._entries) == 2
+    misses = cache.misses
+    cache.find_path((2, 2), (20, 20), grid)
+    assert cache.misses == misses
+    cache.find_path((2, 3), (20, 21), grid)
+    assert cache.misses == misses + 1
+
+
+def test_total_path_length_is_bounded():
+    grid = walled_grid()
+    cache = PathCache(Algorithm(), max_cells=60)
+    for y in range(2, 8):
+        cache.find_path((2, y), (20, 20), grid)
+        assert cache.total_cells <= 60
+    assert cache.total_cells == sum(len(path) for path, _ in cache._entries.values())
+    assert set().union(*cache._by_goal.values()) == set(cache._entries)
+
+
+def test_terrain_edits_invalidate_entries():
+    grid = walled_grid()
+    algorithm = Algorithm()
+    cache = PathCache(algorithm)
+    path = cache.find_path((2, 2), (20, 20), grid)
+    blocked = path[len(path) // 2]
+    grid[blocked[0], blocked[1], 0] = 1
+    algorithm.invalidate_terrain()
+    replanned = cache.find_path((2, 2), (20, 20), grid)
+    assert cache.misses == 2
+    assert blocked not in replanned
+
+
+@pytest.mark.parametrize("setting, value", [("search_engine", "dict"), ("bidirectional", True),
+                                            ("heuristic_mode", "visibility")])
+def test_search_settings_are_part_of_the_key(setting, value):
+    grid = walled_grid()
+    algorithm = Algorithm()
+    cache = PathCache(algorithm)
+    path = cache.find_path((2, 2), (20, 20), grid)
+    setattr(algorithm, setting, value)
+    # Neither a query from a cell on the cached path nor the same query may reuse it
+    cache.find_path(path[3], (20, 20), grid)
+    cache.find_path((2, 2), (20, 20), grid)
+    assert cache.misses == 3 and cache.hits == 0 and cache.suffix_hits == 0
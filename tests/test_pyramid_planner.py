@@ -0,0 +1,51 @@
+# tests/test_pyramid_planner.py
+import numpy as np
+import pytest
+
+from algorithm import DIRECTIONS, Algorithm
+from pyramid_planner import PyramidPlanner
+from synthetic_terrain import make_terrain, sample_free_cells
+
+
+def test_cliff_inside_a_block_prunes_the_coarse_cell():
+    grid = np.zeros((32, 32, 2))
+    # A one-cell-wide wall of cliff faces, averaged away by a 4x4 block mean
+    grid[17, :, 1] = 5.0
+    algorithm = Algorithm()
+    planner = PyramidPlanner(algorithm, factor=4, levels=1)
+    planner.build(grid)
+
+    coarse = planner.grids[0]
+    assert planner.max_slopes[0][4, 0] > algorithm.max_slope
+    assert coarse[4, :, 0].all()
+    assert not coarse[3, :, 0].any() and not coarse[5, :, 0].any()
+    # The block-mean elevation alone would have let the coarse search cross
+    assert np.degrees(np.arctan(np.abs(np.diff(coarse[:, 0, 1])).max())) <= algorithm.max_slope
+
+
+def test_max_slope_layers_are_block_maxima():
+    grid = make_terrain("cliffs", 64, seed=1)
+    planner = PyramidPlanner(Algorithm(), factor=4, levels=2)
+    planner.build(grid)
+    fine, coarse = planner.max_slopes
+    assert fine.shape == (16, 16) and coarse.shape == (4, 4)
+    np.testing.assert_array_equal(coarse, fine.reshape(4, 4, 4, 4).max(axis=(1, 3)))
+
+
+@pytest.mark.parametrize("kind", ["rolling", "cliffs", "maze"])
+def test_paths_match_find_path_reachability(kind):
+    grid = make_terrain(kind, 96, seed=3)
+    algorithm = Algorithm()
+    planner = PyramidPlanner(algorithm)
+    edge_costs = algorithm.get_edge_costs(grid)
+    cells = sample_free_cells(algorithm, grid, 24, seed=5)
+    for start, goal in zip(cells[::2], cells[1::2]):
+        expected = algorithm.find_path(start, goal, grid)
+        path = planner.find_path(start, goal, grid)
+        assert (path is None) == (expected is None)
+        if path is None or algorithm.last_stats.outcome == "direct":
+            continue
+        assert path[0] == start and path[-1] == goal
+        for a, b in zip(path, path[1:]):
+            step = (b[0] - a[0], b[1] - a[1])
+            assert np.isfinite(edge_costs[DIRECTIONS.index(step), a[0], a[1]])
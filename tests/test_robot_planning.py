@@ -0,0 +1,92 @@
+# tests/test_robot_planning.py
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+
+from robot_class import Robot  # noqa: E402
+
+
+def robot_at(cell):
+    robot = Robot(cell[0] * 20 + 10, cell[1] * 20 + 10)
+    robot.async_planning = True
+    return robot
+
+
+def flat_grid(size=24):
+    grid = np.zeros((size, size, 2))
+    grid[12, 2:22, 0] = 1  # A wall, so routes need a real search
+    return grid
+
+
+def test_async_requests_do_not_cancel_waypoint_replans():
+    grid = flat_grid()
+    robot = robot_at((2, 2))
+    waypoints = [(2, 2), (20, 10), (2, 20), (20, 20)]
+    robot.set_waypoints(waypoints, grid)
+    answers = []
+    try:
+        for _ in range(20000):
+            # An outside caller asking for a different route every frame, as a UI would
+            robot.find_path_async((20 - robot.grid_x % 5, 5), grid, callback=answers.append)
+            robot.update(grid)
+            if robot.current_target_index >= len(waypoints):
+                break
+            if not robot.has_path:
+                robot.wait_for_plan(5)
+        assert robot.current_target_index >= len(waypoints)
+    finally:
+        robot.close_planner()
+    assert answers and all(path is not None for path in answers)
+
+
+def test_find_path_async_delivers_through_poll_plan():
+    grid = flat_grid()
+    robot = robot_at((2, 2))
+    results = []
+    try:
+        future = robot.find_path_async((20, 20), grid, callback=results.append)
+        assert robot.find_path_async((20, 20), grid) is future
+        robot.wait_for_plan(10)
+    finally:
+        robot.close_planner()
+    assert len(results) == 1
+    assert results[0][0] == (2, 2) and results[0][-1] == (20, 20)
+
+
+def test_new_request_replaces_only_the_previous_request():
+    grid = flat_grid()
+    robot = robot_at((2, 2))
+    try:
+        robot.set_waypoints([(2, 2), (20, 20)], grid)
+        replan = robot._pending[0]
+        first = robot.find_path_async((20, 2), grid)
+        second = robot.find_path_async((2, 20), grid)
+        assert first.cancelled() or first.done()
+        robot.wait_for_plan(10)
+        assert not replan.cancelled()
+        assert robot.has_path and robot.current_path[-1] == (20, 20)
+        assert second.result()[-1] == (2, 20)
+    finally:
+        robot.close_planner()
+
+
+def test_obstacle_change_on_tiled_terrain_replans(tmp_path):
+    rasterio = pytest.importorskip("rasterio")
+    from terrain_provider import TiledTerrainProvider
+
+    path = tmp_path / "flat.tif"
+    with rasterio.open(path, "w", driver="GTiff", width=64, height=64, count=1, dtype="float32") as dst:
+        dst.write(np.zeros((64, 64), dtype=np.float32), 1)
+    robot = Robot(2 * 20 + 10, 2 * 20 + 10)
+    with TiledTerrainProvider(str(path), tile_size=16) as provider:
+        robot.set_waypoints([(2, 2), (30, 2)], provider)
+        assert robot.has_path
+        blocked = robot.current_path[len(robot.current_path) // 2]
+        provider.set_obstacle(*blocked)
+        robot.handle_obstacle_change(provider, [blocked])
+        assert robot.incremental_planner is None
+        assert robot.has_path and blocked not in robot.current_path
+        assert robot.current_path[-1] == (30, 2)
@@ -0,0 +1,59 @@
+# tests/test_search_engines.py
+import numpy as np
+import pytest
+
+from algorithm import Algorithm
+from synthetic_terrain import make_terrain, sample_free_cells
+
+
+def random_grid(seed, size=40):
+    """Scattered obstacles over bumpy ground, with steep cells and cliffs"""
+    rng = np.random.default_rng(seed)
+    grid = np.zeros((size, size, 2))
+    grid[..., 0] = rng.random((size, size)) < 0.25
+    grid[..., 1] = rng.random((size, size)) * 1.2
+    return grid
+
+
+def grids():
+    for seed in range(6):
+        yield f"random-{seed}", random_grid(seed)
+    for kind in ("rolling", "cliffs", "maze"):
+        yield kind, make_terrain(kind, 48, seed=4)
+
+
+GRIDS = dict(grids())
+
+
+def query_pairs(algorithm, grid, seed, count=12):
+    cells = sample_free_cells(algorithm, grid, 2 * count, seed=seed)
+    return list(zip(cells[::2], cells[1::2]))
+
+
+@pytest.mark.parametrize("heuristic", ["cost_scaled", "manhattan", "octile", "euclidean"])
+@pytest.mark.parametrize("name", GRIDS)
+def test_bidirectional_cost_matches_array_engine(name, heuristic):
+    grid = GRIDS[name]
+    algorithm = Algorithm()
+    for start, goal in query_pairs(algorithm, grid, seed=len(name)):
+        expected = algorithm._search_array(start, goal, grid, heuristic)
+        path = algorithm._search_bidirectional(start, goal, grid, heuristic)
+        assert (path is None) == (expected is None)
+        if path is not None:
+            assert path[0] == start and path[-1] == goal
+            assert algorithm.path_cost(path, grid) == pytest.approx(algorithm.path_cost(expected, grid))
+
+
+@pytest.mark.parametrize("heuristic", ["cost_scaled", "manhattan", "octile", "euclidean"])
+@pytest.mark.parametrize("name", GRIDS)
+def test_array_and_dict_engines_agree(name, heuristic):
+    grid = GRIDS[name]
+    algorithm = Algorithm()
+    for start, goal in query_pairs(algorithm, grid, seed=len(name) + 1):
+        expected = algorithm._search_dict(start, goal, grid, heuristic)
+        path = algorithm._search_array(start, goal, grid, heuristic)
+        assert (path is None) == (expected is None)
+        if path is not None:
+            assert algorithm.path_cost(path, grid) == pytest.approx(algorithm.path_cost(expected, grid))
+            # Expansion and tie-breaking order match, so even equal-cost alternatives agree
+            assert path == expected
@@ -0,0 +1,96 @@
+# tests/test_smoothing.py
+import math
+
+import numpy as np
+import pytest
+
+from algorithm import Algorithm
+from synthetic_terrain import make_terrain, sample_free_cells
+
+
+def planned_paths(kind, seed, count=8):
+    grid = make_terrain(kind, 64, seed=seed)
+    # A wall with a single gap so that straight lines across it need a search
+    grid[32, 4:, 0] = 1
+    algorithm = Algorithm()
+    cells = sample_free_cells(algorithm, grid, 2 * count, seed=seed)
+    paths = []
+    for start, goal in zip(cells[::2], cells[1::2]):
+        path = algorithm._search_array(start, goal, grid)
+        if path is not None and len(path) > 2:
+            paths.append(path)
+    assert paths
+    return algorithm, grid, paths
+
+
+def smoothed_cost(algorithm, smoothed, grid):
+    return sum(algorithm.segment_cost(a, b, grid) for a, b in zip(smoothed, smoothed[1:]))
+
+
+CASES = [(kind, seed) for kind in ("rolling", "cliffs", "maze") for seed in (0, 1)]
+
+
+@pytest.mark.parametrize("tolerance", [0.0, 0.1])
+@pytest.mark.parametrize("kind, seed", CASES)
+def test_smoothing_keeps_endpoints_and_never_costs_more(kind, seed, tolerance):
+    algorithm, grid, paths = planned_paths(kind, seed)
+    shortened = 0
+    for path in paths:
+        smoothed = algorithm.smooth_path(path, grid, tolerance)
+        assert smoothed[0] == path[0] and smoothed[-1] == path[-1]
+        shortened += len(smoothed) < len(path)
+        # Every corner of the smoothed path is a cell of the original, in order
+        indices = [path.find(cell) for cell in smoothed]
+        assert indices == sorted(indices) and min(indices) >= 0
+        assert smoothed_cost(algorithm, smoothed, grid) <= algorithm.path_cost(path, grid) * (1 + tolerance) + 1e-6
+    assert shortened
+
+
+@pytest.mark.parametrize("kind, seed", CASES)
+def test_smoothed_segments_stay_off_blocked_cells(kind, seed):
+    algorithm, grid, paths = planned_paths(kind, seed)
+    blocked = algorithm.get_blocked_mask(grid)
+    for path in paths:
+        smoothed = algorithm.smooth_path(path, grid)
+        for a, b in zip(smoothed, smoothed[1:]):
+            xs, ys = algorithm._segment_cells(a, b)
+            assert not blocked[xs, ys].any()
+            # No squeezing diagonally between two blocked cells that touch at a corner
+            for (x0, y0), (x1, y1) in zip(zip(xs, ys), zip(xs[1:], ys[1:])):
+                if x0 != x1 and y0 != y1:
+                    assert not (blocked[x1, y0] or blocked[x0, y1])
+            assert math.isfinite(algorithm.segment_cost(a, b, grid))
+
+
+def test_segment_cost_rejects_obstacles_corners_and_steep_steps():
+    algorithm = Algorithm()
+    grid = np.zeros((10, 10, 2))
+    assert algorithm.segment_cost((0, 0), (6, 0), grid) == pytest.approx(6.0)
+    grid[3, 0, 0] = 1
+    algorithm.invalidate_terrain()
+    assert algorithm.segment_cost((0, 0), (6, 0), grid) == math.inf
+    # Diagonal step between (5, 6) and (6, 5), both blocked
+    grid[5, 6, 0] = grid[6, 5, 0] = 1
+    algorithm.invalidate_terrain()
+    assert algorithm.segment_cost((5, 5), (6, 6), grid) == math.inf
+    grid = np.zeros((10, 10, 2))
+    grid[0, 4, 1] = 2.0  # A bump too steep to cross on the line
+    assert algorithm.segment_cost((0, 0), (0, 8), grid) == math.inf
+    grid[0, 4, 1] = 0.5
+    algorithm.invalidate_terrain()
+    assert algorithm.segment_cost((0, 0), (0, 8), grid) == pytest.approx(
+        8 + 0.5 * algorithm.uphill_weight + 0.5 * algorithm.downhill_weight)
+
+
+def test_scalar_and_vectorized_segment_checks_agree():
+    algorithm, grid, _ = planned_paths("cliffs", 3)
+    blocked, elevation = algorithm.get_blocked_mask(grid), algorithm.get_elevation(grid)
+    rng = np.random.default_rng(0)
+    for _ in range(500):
+        # Lines longer than 4 cells take the vectorized branch of _segment_cost
+        a = tuple(int(v) for v in rng.integers(10, 54, 2))
+        b = tuple(int(v) for v in np.array(a) + rng.integers(-10, 11, 2))
+        if max(abs(b[0] - a[0]), abs(b[1] - a[1])) <= 4:
+            continue
+        expected = algorithm._short_segment_cost(a, b, blocked, elevation)
+        assert algorithm._segment_cost(a, b, blocked, elevation) == pytest.approx(expected)
@@ -0,0 +1,62 @@
+# tests/test_sparse_backend.py
+import numpy as np
+import pytest
+
+from algorithm import Algorithm
+from cost_field import CostToGoField
+from sparse_backend import SparseGraphBackend
+from synthetic_terrain import make_terrain, sample_free_cells
+
+# SparseGraphBackend imports SciPy on first use
+pytest.importorskip("scipy")
+
+
+def query_pairs(algorithm, grid, seed):
+    """Random free pairs plus impassable and out-of-bounds endpoints"""
+    cells = sample_free_cells(algorithm, grid, 16, seed=seed)
+    pairs = list(zip(cells[::2], cells[1::2]))
+    impassable = np.argwhere(algorithm.get_impassable_mask(grid))
+    if len(impassable):
+        pairs.append((cells[0], tuple(impassable[0].tolist())))
+    pairs.append((cells[0], (grid.shape[0], 0)))
+    return pairs
+
+
+@pytest.mark.parametrize("kind", ["rolling", "cliffs", "maze"])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_find_path_matches_algorithm(kind, seed):
+    grid = make_terrain(kind, 64, seed=seed)
+    # A wall with a single gap so that straight lines across it need a search
+    grid[32, 4:, 0] = 1
+    algorithm = Algorithm()
+    backend = SparseGraphBackend(Algorithm())
+    outcomes = set()
+    for start, goal in query_pairs(algorithm, grid, seed):
+        expected = algorithm.find_path(start, goal, grid)
+        expected_outcome = algorithm.last_stats.outcome
+        path = backend.find_path(start, goal, grid)
+        assert backend.algorithm.last_stats.outcome == expected_outcome
+        outcomes.add(expected_outcome)
+        assert (path is None) == (expected is None)
+        if path is not None:
+            assert path[0] == tuple(start) and path[-1] == tuple(goal)
+            assert algorithm.path_cost(path, grid) == pytest.approx(algorithm.path_cost(expected, grid))
+    assert {"search", "out_of_bounds"} <= outcomes
+
+
+def test_cost_to_go_matches_cost_field():
+    grid = make_terrain("cliffs", 48, seed=5)
+    algorithm = Algorithm()
+    goal = sample_free_cells(algorithm, grid, 1, seed=6)[0]
+    dist = SparseGraphBackend(algorithm).cost_to_go(goal, grid)
+    np.testing.assert_allclose(dist, CostToGoField(algorithm, grid, goal).cost)
+
+
+def test_multi_source_takes_the_nearest_start():
+    grid = np.zeros((20, 20, 2))
+    backend = SparseGraphBackend(Algorithm())
+    starts = [(0, 0), (19, 19)]
+    dist, _, nearest = backend.multi_source(starts, grid)
+    assert dist[2, 1] == pytest.approx(3.0)
+    assert nearest[2 * 20 + 1] == 0
+    assert nearest[18 * 20 + 17] == 19 * 20 + 19
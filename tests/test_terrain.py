@@ -0,0 +1,97 @@
+# tests/test_terrain.py
+import numpy as np
+import pytest
+
+from synthetic_terrain import grid_from_elevation
+from terrain import Terrain, elevation_at, elevation_of, obstacle_mask
+
+
+@pytest.fixture
+def dense():
+    rng = np.random.default_rng(0)
+    grid = np.zeros((13, 11, 2))
+    grid[..., 0] = rng.random((13, 11)) < 0.3
+    # float32-representable elevations so both layouts hold the same values
+    grid[..., 1] = rng.integers(0, 100, (13, 11)) / 4
+    return grid
+
+
+KEYS = [
+    (3, 4, 0), (3, 4, 1), (-1, -1, 0), (-13, 0, 0), (0, -11, 0), (-2, 5, 1), (-1, 2, -2), (4, 4, -1),
+    (Ellipsis, 0), (Ellipsis, 1), (Ellipsis, -2),
+    (slice(2, 9), slice(1, 7), 0), (slice(-5, None), slice(None, -3), 0), (slice(None, None, 2), 3, 0),
+    (slice(None, None, -3), slice(1, 9, 2), 0), (5, slice(None), 0), (slice(None), -4, 0),
+    (np.array([0, 5, -1, 12]), np.array([10, 0, -3, 4]), 0), (np.array([1, -2]), np.array([3, 3]), 1),
+    (np.array([[0, 1], [2, 3]]), 2, 0),
+]
+
+
+@pytest.mark.parametrize("key", KEYS, ids=repr)
+def test_getitem_matches_dense_layout(dense, key):
+    terrain = Terrain.from_grid(dense)
+    np.testing.assert_array_equal(terrain[key], dense[key])
+
+
+@pytest.mark.parametrize("key", KEYS, ids=repr)
+def test_setitem_matches_dense_layout(dense, key):
+    terrain = Terrain.from_grid(dense)
+    value = 1 - np.asarray(dense[key])
+    dense[key] = value
+    terrain[key] = value
+    np.testing.assert_array_equal(terrain.to_grid(), dense)
+
+
+def test_single_cell_accessors_take_negative_indices(dense):
+    terrain = Terrain.from_grid(dense)
+    for x in range(-13, 13):
+        for y in range(-11, 11):
+            assert terrain.is_obstacle(x, y) == (dense[x, y, 0] == 1)
+            assert terrain.elevation(x, y) == dense[x, y, 1]
+    terrain.set_obstacle(-1, -1, 1)
+    terrain.set_obstacle(-13, -11, 0)
+    assert terrain.is_obstacle(12, 10) and not terrain.is_obstacle(0, 0)
+
+
+@pytest.mark.parametrize("x, y", [(13, 0), (0, 11), (-14, 0), (0, -12)])
+def test_out_of_range_cells_raise_index_error(dense, x, y):
+    terrain = Terrain.from_grid(dense)
+    with pytest.raises(IndexError):
+        dense[x, y, 0]
+    with pytest.raises(IndexError):
+        terrain.is_obstacle(x, y)
+    with pytest.raises(IndexError):
+        terrain.set_obstacle(x, y)
+    with pytest.raises(IndexError):
+        terrain[x, y, 0]
+    with pytest.raises(IndexError):
+        terrain[x, y, 0] = 1
+    # Neighbouring cells are untouched
+    np.testing.assert_array_equal(terrain.to_grid(), dense)
+
+
+@pytest.mark.parametrize("block", [(0, 0, None, None), (3, 2, 9, 10), (12, 0, 13, 11), (1, 5, 2, 6)])
+def test_obstacle_mask_blocks_match_dense_layout(dense, block):
+    terrain = Terrain.from_grid(dense)
+    np.testing.assert_array_equal(obstacle_mask(terrain, *block), obstacle_mask(dense, *block))
+
+
+def test_round_trips_and_module_helpers(dense):
+    terrain = Terrain.from_grid(dense)
+    np.testing.assert_array_equal(terrain.to_grid(), dense)
+    np.testing.assert_array_equal(np.asarray(terrain), dense)
+    np.testing.assert_array_equal(Terrain.from_grid(terrain.to_grid()).obstacle_bits, terrain.obstacle_bits)
+    np.testing.assert_array_equal(elevation_of(terrain), elevation_of(dense))
+    assert elevation_at(terrain, 4, 7) == elevation_at(dense, 4, 7)
+    assert terrain.shape == dense.shape
+
+
+def test_from_elevation_matches_grid_from_elevation():
+    rng = np.random.default_rng(1)
+    raster = (rng.random((7, 12)) * 40).astype(np.float32)  # (rows, cols) = (y, x)
+    obstacles = rng.random((7, 12)) < 0.3
+    grid = grid_from_elevation(raster)
+    grid[..., 0] = obstacles.T
+    terrain = Terrain.from_elevation(raster, obstacles)
+    assert terrain.shape == (12, 7, 2)
+    np.testing.assert_array_equal(terrain.to_grid(), grid)
+    np.testing.assert_array_equal(Terrain.from_elevation(raster).obstacle_mask(), np.zeros((12, 7), dtype=bool))
@@ -0,0 +1,52 @@
+# tests/test_terrain_cache.py
+import os
+
+import numpy as np
+import pytest
+
+from terrain_cache import build_cache, cache_path, load_terrain
+
+rasterio = pytest.importorskip("rasterio")
+
+
+def write_tiff(path, data):
+    with rasterio.open(path, "w", driver="GTiff", width=data.shape[1], height=data.shape[0], count=1,
+                       dtype=data.dtype) as dst:
+        dst.write(data, 1)
+
+
+def test_load_terrain_matches_source(tmp_path):
+    data = np.arange(48, dtype=np.float32).reshape(6, 8)
+    tiff = tmp_path / "dem.tif"
+    write_tiff(tiff, data)
+    cache_dir = tmp_path / "cache"
+
+    loaded = load_terrain(str(tiff), cache_dir=str(cache_dir))
+    np.testing.assert_array_equal(loaded, data)
+    assert os.path.exists(cache_path(str(tiff), cache_dir=str(cache_dir)))
+
+
+def test_rebuild_keeps_same_named_rasters_elsewhere(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    first, second = tmp_path / "a" / "dem.tif", tmp_path / "b" / "dem.tif"
+    for i, tiff in enumerate((first, second)):
+        tiff.parent.mkdir()
+        write_tiff(tiff, np.full((4, 4), i, dtype=np.float32))
+
+    first_cache = build_cache(str(first), cache_dir=cache_dir)
+    second_cache = build_cache(str(second), cache_dir=cache_dir)
+    assert first_cache != second_cache
+    assert os.path.exists(first_cache) and os.path.exists(second_cache)
+
+
+def test_rebuild_drops_older_versions_of_the_same_raster(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    tiff = tmp_path / "dem.tif"
+    write_tiff(tiff, np.zeros((4, 4), dtype=np.float32))
+    old_cache = build_cache(str(tiff), cache_dir=cache_dir)
+
+    write_tiff(tiff, np.ones((5, 5), dtype=np.float32))
+    new_cache = build_cache(str(tiff), cache_dir=cache_dir)
+    assert new_cache != old_cache
+    assert not os.path.exists(old_cache)
+    assert os.listdir(cache_dir) == [os.path.basename(new_cache)]
@@ -0,0 +1,101 @@
+# tests/test_terrain_masks.py
+import numpy as np
+import pytest
+
+from algorithm import DIRECTIONS, Algorithm
+from terrain import Terrain
+
+
+def reference_impassable(grid, max_slope):
+    """The original per-cell loop: a non-obstacle cell is impassable if any in-bounds neighbour is too steep"""
+    cells = set()
+    for x in range(grid.shape[0]):
+        for y in range(grid.shape[1]):
+            if grid[x, y, 0] == 1:
+                continue
+            for dx, dy in DIRECTIONS:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < grid.shape[0] and 0 <= ny < grid.shape[1]:
+                    slope = np.degrees(np.arctan2(abs(grid[nx, ny, 1] - grid[x, y, 1]), 1.0))
+                    if slope > max_slope:
+                        cells.add((x, y))
+                        break
+    return cells
+
+
+def reference_neighbors(algorithm, pos, grid, impassable):
+    """The original get_neighbors, including its downward-cliff check"""
+    neighbors = []
+    for dx, dy in DIRECTIONS:
+        nx, ny = pos[0] + dx, pos[1] + dy
+        if not (0 <= nx < grid.shape[0] and 0 <= ny < grid.shape[1]):
+            continue
+        if grid[nx, ny, 0] == 1 or (nx, ny) in impassable:
+            continue
+        elevation_diff = grid[nx, ny, 1] - grid[pos[0], pos[1], 1]
+        slope = np.degrees(np.arctan2(abs(elevation_diff), 1.0))
+        if slope <= algorithm.max_slope:
+            if elevation_diff < 0 and abs(elevation_diff) > algorithm.cliff_threshold:
+                if np.degrees(np.arctan2(abs(elevation_diff), 1.0)) <= algorithm.max_slope:
+                    neighbors.append((nx, ny))
+            else:
+                neighbors.append((nx, ny))
+    return neighbors
+
+
+def rough_grid(seed, width=23, height=17):
+    """Obstacles and elevation steps of up to 2 cells, steep ones along every border"""
+    rng = np.random.default_rng(seed)
+    grid = np.zeros((width, height, 2))
+    grid[..., 0] = rng.random((width, height)) < 0.1
+    # Quarter steps are exact in float32, so the compact Terrain layout sees the same slopes
+    grid[..., 1] = np.round(rng.random((width, height)) * 8) / 4
+    grid[0, ::3, 1] += 3.0
+    grid[-1, 1::4, 1] += 3.0
+    grid[::5, 0, 1] += 3.0
+    grid[2::3, -1, 1] += 3.0
+    return grid
+
+
+@pytest.mark.parametrize("max_slope", [30, 45, 60])
+@pytest.mark.parametrize("seed", range(4))
+def test_impassable_mask_matches_per_cell_loop(seed, max_slope):
+    grid = rough_grid(seed)
+    algorithm = Algorithm()
+    algorithm.max_slope = max_slope
+    expected = reference_impassable(grid, max_slope)
+    mask = algorithm.get_impassable_mask(grid)
+    assert set(map(tuple, np.argwhere(mask).tolist())) == expected
+    assert algorithm.calculate_impassable_terrain(grid) == expected
+    # Border cells are covered, and the compact layout gives the same mask
+    border = {(x, y) for x, y in expected if x in (0, grid.shape[0] - 1) or y in (0, grid.shape[1] - 1)}
+    assert border
+    np.testing.assert_array_equal(algorithm.get_impassable_mask(Terrain.from_grid(grid)), mask)
+
+
+@pytest.mark.parametrize("cliff_threshold", [0.5, 1.0])
+@pytest.mark.parametrize("max_slope", [45, 60])
+@pytest.mark.parametrize("seed", range(3))
+def test_edge_costs_allow_the_same_moves_as_the_original_neighbours(seed, max_slope, cliff_threshold):
+    grid = rough_grid(seed)
+    algorithm = Algorithm()
+    algorithm.max_slope = max_slope
+    algorithm.cliff_threshold = cliff_threshold
+    impassable = reference_impassable(grid, max_slope)
+    for x in range(grid.shape[0]):
+        for y in range(grid.shape[1]):
+            assert algorithm.get_neighbors((x, y), grid) == reference_neighbors(algorithm, (x, y), grid, impassable)
+
+
+def test_patched_mask_matches_a_full_rebuild():
+    grid = rough_grid(7)
+    algorithm = Algorithm()
+    algorithm.get_edge_costs(grid)
+    rng = np.random.default_rng(7)
+    for _ in range(20):
+        x, y = int(rng.integers(grid.shape[0])), int(rng.integers(grid.shape[1]))
+        grid[x, y, 1] = rng.random() * 4
+        algorithm.update_terrain_cells(grid, [(x, y)])
+        fresh = Algorithm()
+        np.testing.assert_array_equal(algorithm.get_impassable_mask(grid), fresh.get_impassable_mask(grid))
+        np.testing.assert_array_equal(algorithm.get_edge_costs(grid), fresh.get_edge_costs(grid))
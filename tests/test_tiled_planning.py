@@ -0,0 +1,148 @@
+# tests/test_tiled_planning.py
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from algorithm import Algorithm
+from synthetic_terrain import grid_from_elevation
+
+rasterio = pytest.importorskip("rasterio")
+from terrain_provider import TiledTerrainProvider  # noqa: E402
+
+
+@pytest.fixture
+def raster(tmp_path):
+    """(path, elevation) of a gently rolling 256x256 GeoTIFF with one needle-sharp peak"""
+    rows, cols = np.mgrid[0:256, 0:256]
+    elevation = (np.sin(rows / 17.0) + np.cos(cols / 23.0)).astype(np.float32)
+    elevation[200, 220] += 50.0
+    path = tmp_path / "terrain.tif"
+    with rasterio.open(path, "w", driver="GTiff", width=256, height=256, count=1, dtype="float32") as dst:
+        dst.write(elevation, 1)
+    return str(path), elevation
+
+
+def open_provider(path, **kwargs):
+    return TiledTerrainProvider(path, tile_size=32, **kwargs)
+
+
+def test_tiled_path_matches_dense_cost(raster):
+    path, elevation = raster
+    dense = grid_from_elevation(elevation)
+    algorithm = Algorithm()
+    with open_provider(path) as provider:
+        tiled = algorithm.find_path((5, 5), (150, 120), provider)
+    expected = Algorithm().find_path((5, 5), (150, 120), dense)
+    assert tiled is not None
+    assert algorithm.path_cost(tiled, dense) == pytest.approx(Algorithm().path_cost(expected, dense))
+
+
+def test_impassable_goal_stops_without_widening(raster, caplog):
+    path, _ = raster
+    algorithm = Algorithm()
+    with open_provider(path) as provider:
+        assert algorithm.find_path((150, 150), (220, 200), provider) is None
+        assert algorithm.last_stats.outcome == "impassable"
+        # Only the first window's 6x6 tiles were read, not the whole 8x8-tile raster
+        assert provider.tile_misses == 36
+    assert "(220, 200)" in caplog.text
+
+
+def test_out_of_bounds_goal_loads_nothing(raster):
+    path, _ = raster
+    algorithm = Algorithm()
+    with open_provider(path) as provider:
+        assert algorithm.find_path((10, 10), (300, 5), provider) is None
+        assert algorithm.last_stats.outcome == "out_of_bounds"
+        assert provider.tile_misses == 0
+
+
+def test_window_growth_stays_within_memory_budget(raster):
+    path, _ = raster
+    algorithm = Algorithm()
+    budget = 16 * 32 * 32 * 5  # Room for 16 tiles
+    with open_provider(path, memory_budget=budget) as provider:
+        # Wall off the start so every window fails and the search keeps widening
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                if dx or dy:
+                    provider.set_obstacle(100 + dx, 100 + dy)
+        assert algorithm.find_path((100, 100), (110, 110), provider) is None
+        assert provider.memory_used <= budget
+        assert provider.tile_misses <= 16
+
+
+def test_window_edge_sees_cliffs_just_outside_it(tmp_path):
+    # A ridge along x=15, one cell outside a tile_margin=4 window around x=5..10
+    elevation = np.zeros((64, 64), dtype=np.float32)
+    elevation[:, 15] = 10.0
+    # A wall across y=25 with a gap at x=13..14; (13, 25) is too steep next to the
+    # wall, and (14, 25) only because of the ridge outside the window
+    elevation[25, :13] = 10.0
+    path = tmp_path / "ridge.tif"
+    with rasterio.open(path, "w", driver="GTiff", width=64, height=64, count=1, dtype="float32") as dst:
+        dst.write(elevation, 1)
+
+    dense = grid_from_elevation(elevation)
+    expected = Algorithm().find_path((10, 20), (10, 30), dense)
+    algorithm = Algorithm()
+    algorithm.tile_margin = 4
+    with open_provider(str(path)) as provider:
+        tiled = algorithm.find_path((10, 20), (10, 30), provider)
+    assert expected is None
+    assert tiled is None
+    assert algorithm.last_stats.outcome == "no_path"
+
+
+def test_planner_working_set_counts_against_memory_budget(raster):
+    path, _ = raster
+    algorithm = Algorithm()
+    budget = 1024 * 1024
+    with open_provider(path, memory_budget=budget) as provider:
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                if dx or dy:
+                    provider.set_obstacle(100 + dx, 100 + dy)
+        tracemalloc.start()
+        try:
+            assert algorithm.find_path((100, 100), (140, 140), provider) is None
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    assert peak <= budget
+
+
+def wall_off_straight_line(provider):
+    """Obstacles along x=80 for y < 200, so (5, 5) -> (150, 120) needs a search"""
+    for y in range(200):
+        provider.set_obstacle(80, y)
+
+
+@pytest.mark.parametrize("options, engine", [({"engine": "dict"}, "dict"), ({"bidirectional": True}, "bidirectional"),
+                                             ({"heuristic": "manhattan"}, "array")])
+def test_per_call_options_reach_the_window_search(raster, options, engine):
+    path, elevation = raster
+    dense = grid_from_elevation(elevation)
+    dense[80, :200, 0] = 1
+    algorithm = Algorithm()
+    with open_provider(path) as provider:
+        wall_off_straight_line(provider)
+        tiled = algorithm.find_path((5, 5), (150, 120), provider, **options)
+    assert algorithm.last_stats.engine == engine
+    expected = Algorithm().find_path((5, 5), (150, 120), dense)
+    assert algorithm.path_cost(tiled, dense) == pytest.approx(Algorithm().path_cost(expected, dense))
+
+
+def test_corridor_mask_applies_to_tiled_search(raster):
+    path, _ = raster
+    allowed = np.zeros((256, 256), dtype=bool)
+    allowed[5, 5:211] = True  # Up x=5, across y=210, then down x=150
+    allowed[5:151, 210] = True
+    allowed[150, 120:211] = True
+    algorithm = Algorithm()
+    with open_provider(path) as provider:
+        wall_off_straight_line(provider)
+        tiled = algorithm.find_path((5, 5), (150, 120), provider, allowed=allowed)
+    assert tiled is not None
+    assert all(allowed[x, y] for x, y in tiled)